@@ -0,0 +1,43 @@
+"""Medición de memoria de 1.000.000 de líneas de venta (diccionarios vs ItemVenta).
+
+Uso (desde la raíz del proyecto): python -m benchmarks.memoria_ventas
+"""
+
+import json
+import tracemalloc
+
+from models.venta import ItemVenta
+
+
+class _Producto:
+    def __init__(self, i):
+        self.codigo = f"{i:03d}"
+        self.nombre = f"Producto {i}"
+        self.precio = 1000 + i
+        self.unidad = 'unidades'
+
+
+def medir(convertir, crudo: str, lineas: int, productos: int):
+    """Memoria (bytes) y cantidad de las líneas cargadas con convertir, mientras siguen en uso."""
+    tracemalloc.start()
+    cargadas = [convertir(linea) for _ in range(lineas // productos) for linea in json.loads(crudo)]
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return actual, len(cargadas)
+
+
+def main(lineas: int = 1_000_000):
+    productos = [_Producto(i) for i in range(500)]
+    # Cada línea se lee del JSON como un diccionario con sus propias copias de los textos
+    crudo = json.dumps([{'codigo': p.codigo, 'nombre': p.nombre, 'cantidad': 2, 'precio_unitario': p.precio,
+                         'subtotal': 2 * p.precio, 'unidad': p.unidad} for p in productos])
+
+    como_dict, cantidad = medir(lambda linea: linea, crudo, lineas, len(productos))
+    compacto, _ = medir(ItemVenta.from_dict, crudo, lineas, len(productos))
+    print(f"Líneas: {cantidad}")
+    print(f"Diccionarios: {como_dict / 2**20:.0f} MiB | ItemVenta: {compacto / 2**20:.0f} MiB | "
+          f"Reducción: {(1 - compacto / como_dict) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Medición de la aceleración de los reportes en paralelo con un historial sintético.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.reportes_paralelos [cantidad_ventas] [procesos]
+
+ReporteController calcula en secuencia por defecto; conviene pasarle procesos > 1
+solo si esta medición muestra una aceleración en la máquina donde corre el POS.
+"""
+
+import os
+import random
+import sys
+import time
+
+from controllers.reporte_controller import ReporteController
+from models.venta import Venta
+
+
+class _Categoria:
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+
+class _Producto:
+    def __init__(self, categoria):
+        self.categoria = _Categoria(categoria)
+
+
+class _Productos:
+    productos = {str(i): _Producto(f"Categoria {i % 10}") for i in range(500)}
+
+
+class _Ventas:
+    ventas = []
+
+
+def generar_ventas(cantidad: int, semilla: int = 0) -> list:
+    """Ventas sintéticas de 1 a 8 items en 2023-2025."""
+    azar = random.Random(semilla)
+    ventas = []
+    for i in range(cantidad):
+        items = [{'codigo': str(azar.randint(0, 499)), 'nombre': 'Producto', 'cantidad': 1,
+                  'precio_unitario': 0, 'subtotal': azar.randint(500, 9000), 'unidad': 'unidades'}
+                 for _ in range(azar.randint(1, 8))]
+        ventas.append(Venta.from_dict({
+            'id': i + 1,
+            'fecha': f"{azar.randint(2023, 2025)}-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d} 10:00:00",
+            'items': items,
+            'total': sum(item['subtotal'] for item in items),
+            'descuento': 0.0
+        }))
+    return ventas
+
+
+def main(cantidad: int = 400000, procesos: int = 0):
+    procesos = procesos or os.cpu_count() or 1
+    _Ventas.ventas = generar_ventas(cantidad)
+    reportes = ReporteController(_Ventas, _Productos, procesos=procesos)
+
+    # La primera consulta incluye copiar el historial a columnas; las siguientes solo agregan lo nuevo
+    inicio = time.perf_counter()
+    reportes.ingresos_mensuales_por_categoria(paralelo=False)
+    t_copia = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    serial = reportes.ingresos_mensuales_por_categoria(paralelo=False)
+    t_serial = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    paralelo = reportes.ingresos_mensuales_por_categoria(paralelo=True)
+    t_paralelo = time.perf_counter() - inicio
+    if serial != paralelo:
+        sys.exit("Error: el cálculo paralelo no coincide con el secuencial")
+
+    print(f"Ventas: {cantidad} | Núcleos: {os.cpu_count()} | Procesos: {reportes.procesos}")
+    print(f"Primera consulta (con copia a columnas): {t_copia:.2f} s")
+    print(f"Secuencial: {t_serial:.2f} s | Paralelo: {t_paralelo:.2f} s | Aceleración: {t_serial / t_paralelo:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,86 @@
+"""Utilidades para compartir los archivos de datos entre varios procesos.
+
+Returns:
+    function: bloqueo_archivo, escribir_json_atomico, firma_archivo
+"""
+
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+# fcntl solo existe en sistemas tipo Unix; en Windows se usa msvcrt
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+@contextmanager
+def bloqueo_archivo(ruta: str):
+    """
+    Bloqueo exclusivo entre procesos sobre un archivo de datos.
+    Se bloquea un archivo auxiliar '<ruta>.lock' para no interferir con la
+    escritura atómica (que reemplaza el archivo de datos). Mientras dure el
+    bloque 'with', ninguna otra instancia del POS puede leer-modificar-escribir
+    el mismo archivo.
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta + '.lock', 'a+') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def escribir_json_atomico(ruta: str, datos, **opciones_json):
+    """
+    Escribe un JSON en un archivo temporal y luego lo reemplaza de una vez,
+    de modo que otro proceso nunca lea un archivo a medio escribir.
+    """
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, **opciones_json)
+        # La fecha de modificación debe crecer en cada escritura: con relojes de baja
+        # resolución y el inodo reutilizado, la firma podría repetirse y otro proceso
+        # no detectaría el cambio
+        try:
+            anterior = os.stat(ruta).st_mtime_ns
+            actual = os.stat(temporal).st_mtime_ns
+            if actual <= anterior:
+                os.utime(temporal, ns=(anterior + 1, anterior + 1))
+        except FileNotFoundError:
+            pass
+        os.replace(temporal, ruta)
+    except Exception:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def firma_archivo(ruta: str) -> Optional[Tuple[int, int, int]]:
+    """Retorna (inodo, fecha de modificación, tamaño) para detectar si otro proceso cambió el archivo."""
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    return (estado.st_ino, estado.st_mtime_ns, estado.st_size)
@@ -0,0 +1,207 @@
+"""Controlador para el análisis de canasta de mercado (productos comprados juntos).
+
+Returns:
+    class: Clase CanastaController
+"""
+
+import math
+import threading
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from models.venta import Venta
+from .venta_controller import VentaController
+
+class CanastaController:
+    """
+    Controlador que analiza el historial de ventas como canastas de compra.
+    Recorre las ventas una sola vez contando productos y pares de productos,
+    y genera reglas "comprados juntos frecuentemente" con soporte, confianza y lift.
+
+    Los pares se cuentan con el algoritmo Lossy Counting: al cerrar cada
+    "cubeta" de ventas se descartan los pares poco frecuentes, por lo que la
+    memoria queda acotada aunque el historial sea muy grande. El error máximo
+    en el conteo de un par es error_maximo * total_canastas.
+
+    Cada venta solo actualiza los contadores (O(pares de la canasta)) y programa
+    la regeneración de las reglas en un hilo aparte; mientras tanto las consultas
+    responden con las reglas anteriores. Así ni cobrar ni consultar sugerencias
+    (en cada cambio del carrito) depende de cuántos pares se siguen. Las ventas
+    que llegan durante una regeneración se juntan en la siguiente.
+    """
+
+    def __init__(self, venta_controller: VentaController, soporte_minimo: float = 0.01,
+                 confianza_minima: float = 0.2, error_maximo: float = 0.001,
+                 max_sugerencias: int = 5):
+        # Controlador de ventas del cual se obtiene el historial
+        self.venta_controller = venta_controller
+        # Fracción mínima de canastas en las que debe aparecer un par
+        self.soporte_minimo = soporte_minimo
+        # Probabilidad mínima de comprar B dado que se compró A
+        self.confianza_minima = confianza_minima
+        # Error tolerado en el conteo de pares (debe ser menor al soporte mínimo)
+        self.error_maximo = min(error_maximo, soporte_minimo)
+        # Cantidad máxima de sugerencias guardadas por producto
+        self.max_sugerencias = max_sugerencias
+        # Tamaño de cada cubeta del algoritmo Lossy Counting
+        self._ancho_cubeta = math.ceil(1 / self.error_maximo)
+
+        # Contadores dispersos: solo existen entradas para lo que efectivamente se vendió
+        self.total_canastas = 0
+        self.frecuencias: Dict[str, int] = {}
+        # Par (codigo_a, codigo_b) ordenado -> [conteo, error_maximo_del_conteo]
+        self.pares: Dict[Tuple[str, str], List[int]] = {}
+        # Reglas indexadas por producto antecedente para consulta O(1) desde el POS
+        self.reglas: Dict[str, List[dict]] = {}
+        # Las reglas reflejan los contadores actuales (False tras nuevas ventas)
+        self._reglas_al_dia = False
+        # Hay un hilo regenerando las reglas; el evento se activa cuando no queda ninguna pendiente
+        self._regenerando = False
+        self._reglas_listas = threading.Event()
+        self._reglas_listas.set()
+        # Aumenta con cada análisis completo (descarta regeneraciones de contadores ya reemplazados)
+        self._generacion = 0
+        # Protege los contadores: las ventas cuentan desde sus hilos mientras se regeneran las reglas
+        self._candado = threading.RLock()
+
+        # Análisis inicial del historial y suscripción a nuevas ventas
+        self.analizar()
+        self.venta_controller.suscribir(self._on_evento_venta)
+
+    def analizar(self):
+        """Recorre todo el historial de ventas y reconstruye contadores y reglas."""
+        with self._candado:
+            self.total_canastas = 0
+            self.frecuencias = {}
+            self.pares = {}
+            for venta in self.venta_controller.ventas:
+                self._contar_canasta(venta)
+            self._generacion += 1
+            self._reglas_al_dia = True
+            self.reglas = self._generar_reglas(self.pares, self.frecuencias, self.total_canastas)
+
+    def _on_evento_venta(self, evento: str, datos):
+        """Actualiza los contadores de forma incremental cuando se registran ventas."""
+        if evento == 'ventas_recargadas':
+            # El historial cambió por completo: se rehace el análisis
+            self.analizar()
+            return
+        if evento != 'ventas_agregadas':
+            return
+        with self._candado:
+            for venta in datos:
+                self._contar_canasta(venta)
+            # Las reglas se regeneran en segundo plano (la venta no espera)
+            self._programar_reglas()
+
+    def _contar_canasta(self, venta: Venta):
+        """Cuenta los productos y pares de productos de una venta (una canasta de ItemVenta)."""
+        # Productos distintos de la canasta, ordenados para que cada par tenga una sola clave
+        codigos = sorted({item.codigo for item in venta.items})
+        if not codigos:
+            return
+
+        self.total_canastas += 1
+        # Identificador de la cubeta actual (Lossy Counting)
+        cubeta = math.ceil(self.total_canastas / self._ancho_cubeta)
+
+        for codigo in codigos:
+            self.frecuencias[codigo] = self.frecuencias.get(codigo, 0) + 1
+
+        for par in combinations(codigos, 2):
+            entrada = self.pares.get(par)
+            if entrada:
+                entrada[0] += 1
+            else:
+                # Un par nuevo pudo haber aparecido hasta (cubeta - 1) veces antes sin registrarse
+                self.pares[par] = [1, cubeta - 1]
+
+        # Al cerrar una cubeta se podan los pares que no alcanzan la frecuencia mínima posible
+        if self.total_canastas % self._ancho_cubeta == 0:
+            self.pares = {par: entrada for par, entrada in self.pares.items()
+                          if entrada[0] + entrada[1] > cubeta}
+
+    def _programar_reglas(self):
+        """Marca las reglas como viejas y lanza su regeneración si no hay una en curso (requiere el candado)."""
+        self._reglas_al_dia = False
+        if self._regenerando:
+            return
+        self._regenerando = True
+        self._reglas_listas.clear()
+        threading.Thread(target=self._regenerar, daemon=True, name='reglas-canasta').start()
+
+    def _regenerar(self):
+        """Hilo de regeneración: recalcula las reglas hasta que reflejen los contadores actuales."""
+        while True:
+            with self._candado:
+                if self._reglas_al_dia:
+                    self._regenerando = False
+                    self._reglas_listas.set()
+                    return
+                self._reglas_al_dia = True
+                generacion = self._generacion
+                # Copias de los diccionarios (rápidas, en C) para calcular sin frenar a las ventas
+                pares, frecuencias, n = dict(self.pares), dict(self.frecuencias), self.total_canastas
+            reglas = self._generar_reglas(pares, frecuencias, n)
+            with self._candado:
+                if generacion == self._generacion:
+                    # Reemplazo en una sola asignación: las consultas ven las reglas viejas o las nuevas
+                    self.reglas = reglas
+
+    def esperar_reglas(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que las reglas reflejen todas las ventas registradas. False si se agotó el tiempo."""
+        return self._reglas_listas.wait(timeout)
+
+    def _generar_reglas(self, pares: Dict[Tuple[str, str], List[int]], frecuencias: Dict[str, int],
+                        n: int) -> Dict[str, List[dict]]:
+        """Calcula las reglas A -> B a partir de los contadores de pares."""
+        reglas: Dict[str, List[dict]] = {}
+        if n == 0:
+            return reglas
+
+        # Umbral de conteo descontando el error tolerado por la poda
+        conteo_minimo = (self.soporte_minimo - self.error_maximo) * n
+
+        for (a, b), (conteo, _) in pares.items():
+            if conteo < conteo_minimo:
+                continue
+            soporte = conteo / n
+            # Se evalúa la regla en ambas direcciones: A -> B y B -> A
+            for antecedente, consecuente in ((a, b), (b, a)):
+                confianza = conteo / frecuencias[antecedente]
+                if confianza < self.confianza_minima:
+                    continue
+                lift = confianza / (frecuencias[consecuente] / n)
+                reglas.setdefault(antecedente, []).append({
+                    'antecedente': antecedente,
+                    'consecuente': consecuente,
+                    'soporte': soporte,
+                    'confianza': confianza,
+                    'lift': lift
+                })
+
+        # Deja solo las mejores sugerencias por producto (mayor lift y luego confianza)
+        for antecedente, lista in reglas.items():
+            lista.sort(key=lambda r: (r['lift'], r['confianza']), reverse=True)
+            del lista[self.max_sugerencias:]
+        return reglas
+
+    def obtener_reglas(self, codigo: str) -> List[dict]:
+        """Retorna las reglas "comprados juntos" cuyo antecedente es el producto indicado."""
+        # Búsqueda directa en el diccionario (O(1))
+        return self.reglas.get(codigo, [])
+
+    def obtener_sugerencias(self, codigos) -> List[str]:
+        """
+        Retorna códigos de productos sugeridos para venta cruzada dado un carrito.
+        Excluye los productos que ya están en el carrito.
+        """
+        codigos = list(codigos)
+        en_carrito = set(codigos)
+        reglas = self.reglas
+        sugeridos = []
+        for codigo in codigos:
+            for regla in reglas.get(codigo, []):
+                consecuente = regla['consecuente']
+                if consecuente not in en_carrito and consecuente not in sugeridos:
+                    sugeridos.append(consecuente)
+        return sugeridos
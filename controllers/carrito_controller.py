@@ -0,0 +1,191 @@
+"""Controlador del carrito de compras de una caja.
+
+Returns:
+    class: Clase CarritoController
+"""
+
+from typing import Dict, List, Optional
+from models.venta import Venta
+from models.dinero import multiplicar, porcentaje
+from .observable import Observable
+from .producto_controller import ProductoController
+from .reserva_controller import ReservaController
+from .promocion_controller import PromocionController
+from .venta_controller import VentaController
+
+
+class LineaCarrito:
+    """
+    Línea del carrito con sus montos ya calculados.
+    Atributos:
+        codigo (str): Código del producto.
+        nombre (str): Nombre del producto.
+        cantidad (float): Unidades (o kg) en el carrito.
+        unidad (str): Unidad de venta del producto (ej. 'kg').
+        subtotal (int): Monto de la línea, neto de la promoción.
+        promocion (str): Nombre de la promoción aplicada (None si no hay).
+        ahorro (int): Monto rebajado por la promoción.
+    """
+    __slots__ = ('codigo', 'nombre', 'cantidad', 'unidad', 'subtotal', 'promocion', 'ahorro')
+
+    def __init__(self, codigo: str, nombre: str, cantidad: float, unidad: str,
+                 subtotal: int, promocion: Optional[str] = None, ahorro: int = 0):
+        self.codigo = codigo
+        self.nombre = nombre
+        self.cantidad = cantidad
+        self.unidad = unidad
+        self.subtotal = subtotal
+        self.promocion = promocion
+        self.ahorro = ahorro
+
+
+class CarritoController(Observable):
+    """
+    Carrito abierto de una caja, sin dependencias de la interfaz gráfica (sirve
+    igual para la ventana, una API de punto de venta o un script).
+
+    Mantiene cada línea con su subtotal y promoción ya calculados, y las sumas del
+    carrito: cambiar una línea recalcula solo esa línea y ajusta las sumas por la
+    diferencia, así que agregar un producto cuesta lo mismo con 3 o 200 líneas.
+    Las promociones dependen solo de su línea (producto y cantidad), así que el
+    resultado es el mismo que evaluar el carrito completo.
+
+    El stock agregado se reserva (ReservaController) con el identificador del carrito.
+    Eventos: 'linea_actualizada' (LineaCarrito), 'linea_eliminada' (codigo),
+    'carrito_vaciado' (None) y 'descuento_actualizado' (porcentaje).
+    Un carrito es de una sola caja: sus métodos se llaman desde un mismo hilo.
+    """
+
+    def __init__(self, id_carrito: str, producto_controller: ProductoController,
+                 reserva_controller: Optional[ReservaController] = None,
+                 promocion_controller: Optional[PromocionController] = None,
+                 venta_controller: Optional[VentaController] = None):
+        super().__init__()
+        self.id = id_carrito
+        self.producto_controller = producto_controller
+        self.reserva_controller = reserva_controller
+        self.promocion_controller = promocion_controller
+        self.venta_controller = venta_controller
+        # Cantidades por producto {codigo: cantidad} y sus líneas calculadas, en orden de llegada
+        self.items: Dict[str, float] = {}
+        self.lineas: Dict[str, LineaCarrito] = {}
+        # Suma de los subtotales (ya netos de promociones) y de los ahorros
+        self.subtotal = 0
+        self.ahorro = 0
+        # Porcentaje de descuento (0-100) sobre el subtotal, como en Venta.aplicar_descuento
+        self.descuento = 0.0
+
+    @property
+    def total(self) -> int:
+        """Monto a pagar: el subtotal menos el descuento del carrito."""
+        return self.subtotal - porcentaje(self.subtotal, self.descuento)
+
+    def lista_items(self) -> List[tuple]:
+        """Items como lista de (codigo, cantidad), el formato de realizar_venta."""
+        return list(self.items.items())
+
+    # --- Modificación ---
+    def agregar(self, codigo: str, cantidad: float) -> bool:
+        """Agrega 'cantidad' de un producto reservando su stock. Retorna False si no alcanza."""
+        if cantidad <= 0 or codigo not in self.producto_controller.productos:
+            return False
+        if self.reserva_controller is not None and not self.reserva_controller.reservar(self.id, codigo, cantidad):
+            return False
+        self.items[codigo] = self.items.get(codigo, 0) + cantidad
+        self._recalcular_linea(codigo)
+        return True
+
+    def agregar_hasta(self, codigo: str, cantidad: int) -> int:
+        """
+        Agrega hasta 'cantidad' unidades de un producto, tantas como alcance el stock
+        disponible (ej. varias lecturas del escáner). Retorna las unidades agregadas.
+        """
+        if self.agregar(codigo, cantidad):
+            return cantidad
+        if self.reserva_controller is None:
+            return 0
+        cantidad = min(cantidad, int(self.reserva_controller.disponible(codigo)))
+        return cantidad if cantidad > 0 and self.agregar(codigo, cantidad) else 0
+
+    def quitar(self, codigo: str):
+        """Quita un producto del carrito y libera su reserva."""
+        if codigo not in self.items:
+            return
+        if self.reserva_controller is not None:
+            self.reserva_controller.liberar(self.id, codigo)
+        del self.items[codigo]
+        self._recalcular_linea(codigo)
+
+    def vaciar(self):
+        """Quita todos los productos y libera todas las reservas del carrito."""
+        if self.reserva_controller is not None:
+            self.reserva_controller.liberar(self.id)
+        self._reiniciar()
+
+    def establecer_descuento(self, descuento: float):
+        """Fija el porcentaje de descuento (0-100) del carrito."""
+        if not 0 <= descuento <= 100:
+            raise ValueError("El descuento debe estar entre 0 y 100.")
+        self.descuento = descuento
+        self._notificar('descuento_actualizado', descuento)
+
+    def recalcular(self, codigos):
+        """
+        Recalcula las líneas de los productos indicados (ej. cambió su precio o su
+        nombre); las de productos eliminados se quitan del carrito.
+        """
+        productos = self.producto_controller.productos
+        for codigo in codigos:
+            if codigo not in self.items:
+                continue
+            if codigo in productos:
+                self._recalcular_linea(codigo)
+            else:
+                self.quitar(codigo)
+
+    def finalizar(self) -> Optional[Venta]:
+        """Registra la venta del carrito (con sus reservas y descuento) y lo vacía. None si falla."""
+        if not self.items or self.venta_controller is None:
+            return None
+        venta = self.venta_controller.realizar_venta(self.lista_items(), self.descuento, self.id)
+        if venta:
+            # realizar_venta ya liberó las reservas del carrito
+            self._reiniciar()
+        return venta
+
+    # --- Cálculo incremental ---
+    def _reiniciar(self):
+        """Deja el carrito vacío y sin descuento."""
+        self.items = {}
+        self.lineas = {}
+        self.subtotal = 0
+        self.ahorro = 0
+        self.descuento = 0.0
+        self._notificar('carrito_vaciado')
+
+    def _recalcular_linea(self, codigo: str):
+        """Recalcula una línea y ajusta las sumas del carrito por la diferencia."""
+        # Descuenta lo que la línea aportaba antes (la nueva la reemplaza en su misma posición)
+        anterior = self.lineas.get(codigo)
+        if anterior is not None:
+            self.subtotal -= anterior.subtotal
+            self.ahorro -= anterior.ahorro
+        cantidad = self.items.get(codigo, 0)
+        if not cantidad:
+            if anterior is not None:
+                del self.lineas[codigo]
+                self._notificar('linea_eliminada', codigo)
+            return
+
+        producto = self.producto_controller.productos[codigo]
+        subtotal = multiplicar(producto.precio, cantidad)
+        promocion, ahorro = None, 0
+        if self.promocion_controller is not None:
+            mejor = self.promocion_controller.mejor_promocion(codigo, cantidad)
+            if mejor:
+                promocion, ahorro = mejor[0].nombre, mejor[1]
+        linea = LineaCarrito(codigo, producto.nombre, cantidad, str(producto.unidad), subtotal - ahorro, promocion, ahorro)
+        self.lineas[codigo] = linea
+        self.subtotal += linea.subtotal
+        self.ahorro += ahorro
+        self._notificar('linea_actualizada', linea)
@@ -0,0 +1,116 @@
+"""Controlador para la clasificación ABC (Pareto) del inventario.
+
+Returns:
+    class: Clase ClasificacionABCController
+"""
+
+from datetime import date
+from typing import Dict
+from models.dinero import multiplicar
+from .producto_controller import ProductoController
+from .resumen_controller import ResumenDiarioController
+
+class ClasificacionABCController:
+    """
+    Clasifica los productos en A, B o C según su aporte a los ingresos:
+    - A: productos que suman el primer 80% de los ingresos.
+    - B: los que llevan el acumulado hasta el 95%.
+    - C: el resto (incluye los productos sin ventas).
+
+    El aporte de cada producto es unidades vendidas * precio actual.
+    El resultado queda en caché y solo se recalcula cuando los ingresos
+    acumulados desde la última clasificación superan una fracción
+    (tolerancia) del total: por debajo de ese umbral ningún porcentaje
+    acumulado puede moverse más que la tolerancia. Los cambios del catálogo
+    (precio editado, producto nuevo o eliminado) invalidan la caché de inmediato,
+    porque cambian los aportes sin que haya ventas.
+    """
+
+    def __init__(self, resumen_controller: ResumenDiarioController, producto_controller: ProductoController,
+                 limite_a: float = 0.80, limite_b: float = 0.95, tolerancia: float = 0.05):
+        # Resumen diario del que se obtienen las unidades vendidas por producto
+        self.resumen_controller = resumen_controller
+        # Controlador de productos para obtener los precios
+        self.producto_controller = producto_controller
+        # Porcentajes acumulados que separan las clases A/B y B/C
+        self.limite_a = limite_a
+        self.limite_b = limite_b
+        # Fracción de ingresos nuevos que obliga a reclasificar
+        self.tolerancia = tolerancia
+
+        # Caché de la clasificación: {codigo: 'A' | 'B' | 'C'}
+        self.clases: Dict[str, str] = {}
+        # Ingresos totales al momento de clasificar y los acumulados desde entonces
+        self._ingresos_base = 0
+        self._ingresos_nuevos = 0
+        self._vigente = False
+
+        # Escucha las ventas y los cambios de productos para decidir cuándo invalidar la caché
+        self.resumen_controller.venta_controller.suscribir(self._on_evento_venta)
+        self.producto_controller.suscribir(self._on_evento_producto)
+
+    def invalidar(self):
+        """Fuerza el recálculo en la próxima consulta."""
+        self._vigente = False
+
+    def _on_evento_venta(self, evento: str, datos):
+        """Acumula los ingresos nuevos e invalida la caché si superan la tolerancia."""
+        if evento == 'ventas_recargadas':
+            self.invalidar()
+            return
+        if evento != 'ventas_agregadas' or not self._vigente:
+            return
+        productos = self.producto_controller.productos
+        for venta in datos:
+            for item in venta.items:
+                producto = productos.get(item.codigo)
+                if producto:
+                    self._ingresos_nuevos += multiplicar(producto.precio, item.cantidad)
+        if self._ingresos_nuevos > self.tolerancia * self._ingresos_base:
+            self._vigente = False
+
+    def _on_evento_producto(self, evento: str, producto):
+        """Invalida la caché cuando cambia el catálogo (el stock no afecta la clasificación)."""
+        if evento in ('producto_agregado', 'producto_actualizado', 'producto_eliminado', 'productos_recargados'):
+            self.invalidar()
+
+    def clasificar(self):
+        """Recalcula la clasificación completa a partir del resumen de ventas."""
+        productos = self.producto_controller.productos
+        vendidos = self.resumen_controller.reporte_rango(date.min, date.today())
+
+        # Aporte de cada producto existente (unidades históricas * precio actual)
+        aportes = {codigo: multiplicar(p.precio, vendidos[codigo]['unidades']) if codigo in vendidos else 0
+                   for codigo, p in productos.items()}
+        total = sum(aportes.values())
+
+        clases = {}
+        acumulado = 0
+        for codigo, aporte in sorted(aportes.items(), key=lambda x: x[1], reverse=True):
+            if total <= 0 or aporte <= 0:
+                clases[codigo] = 'C'
+                continue
+            # La clase se decide por el acumulado antes de sumar el producto, así el
+            # producto que cruza el límite del 80% todavía pertenece a la clase A
+            if acumulado < self.limite_a * total:
+                clases[codigo] = 'A'
+            elif acumulado < self.limite_b * total:
+                clases[codigo] = 'B'
+            else:
+                clases[codigo] = 'C'
+            acumulado += aporte
+
+        self.clases = clases
+        self._ingresos_base = total
+        self._ingresos_nuevos = 0
+        self._vigente = True
+
+    def obtener_clasificacion(self) -> Dict[str, str]:
+        """Retorna la clasificación vigente, recalculándola solo si fue invalidada."""
+        if not self._vigente:
+            self.clasificar()
+        return self.clases
+
+    def obtener_clase(self, codigo: str) -> str:
+        """Retorna la clase ABC de un producto ('C' si es nuevo o no tiene ventas)."""
+        return self.obtener_clasificacion().get(codigo, 'C')
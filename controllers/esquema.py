@@ -0,0 +1,32 @@
+"""Versión de esquema de los archivos de datos.
+
+Returns:
+    function: leer_registros, con_version
+"""
+
+import json
+from typing import List, Tuple
+
+# Versión actual del formato de productos.json, ventas.json y usuarios.json
+# (el resumen diario también la guarda, para reconstruirse cuando cambia).
+# 1: lista JSON sin versión (formato original, con datos antiguos que requieren corrección)
+# 2: {"version_esquema": 2, "<clave>": [...]} con registros ya normalizados
+# 3: montos (precios, subtotales, ahorros y totales) como enteros (ver models.dinero)
+VERSION_ESQUEMA = 3
+
+
+def leer_registros(ruta: str, clave: str) -> Tuple[List[dict], int]:
+    """
+    Lee un archivo de datos y retorna (registros, versión de esquema).
+    Los archivos del formato original (una lista sin versión) son la versión 1.
+    """
+    with open(ruta, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    if isinstance(datos, list):
+        return datos, 1
+    return datos[clave], datos.get('version_esquema', 1)
+
+
+def con_version(clave: str, registros: List[dict]) -> dict:
+    """Envuelve los registros con la versión de esquema actual, listo para escribir."""
+    return {'version_esquema': VERSION_ESQUEMA, clave: registros}
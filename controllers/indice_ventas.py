@@ -0,0 +1,155 @@
+"""Índice del historial de ventas para consultas paginadas con filtros.
+
+Returns:
+    class: Clase IndiceVentas
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from models.venta import Venta
+# NumPy es opcional: si está instalado, los conteos con filtros por monto se vectorizan
+from models.importacion import numpy
+
+
+def _clave_fecha(fecha: datetime) -> float:
+    """Fecha como número creciente (segundos desde el año 1), sin depender de la zona horaria."""
+    return (fecha.toordinal() * 86400 + fecha.hour * 3600 + fecha.minute * 60 + fecha.second
+            + fecha.microsecond / 1e6)
+
+
+class IndiceVentas:
+    """
+    Columnas compactas del historial, por posición de la venta en la lista
+    (IDs, fechas y totales en array de enteros/floats) y, por producto, la lista
+    ordenada de posiciones de las ventas que lo incluyen.
+
+    Como las ventas solo se agregan al final, las listas se mantienen ordenadas
+    agregando al final (O(items) por venta). Si las fechas también están en orden
+    (lo normal; un lote importado con fechas pasadas lo rompe), un rango de fechas
+    se traduce con bisect a un rango de posiciones. Así el conteo de coincidencias
+    de rango de fechas y producto sale del índice en O(log n); el filtro por total
+    mínimo cuenta sobre los candidatos ya acotados (con NumPy, vectorizado).
+
+    No es seguro entre hilos: el VentaController lo usa bajo su candado.
+    """
+
+    def __init__(self, ventas: List[Venta] = ()):
+        self.reiniciar(ventas)
+
+    def reiniciar(self, ventas: List[Venta]):
+        """Vuelve a construir el índice para un historial completo."""
+        self._ids = array('q')
+        self._fechas = array('d')
+        self._totales = array('q')
+        self._por_producto: Dict[str, array] = {}
+        # Las fechas crecen junto con las posiciones (permite acotar por fecha con bisect)
+        self.fechas_ordenadas = True
+        self.agregar(ventas)
+
+    def __len__(self):
+        return len(self._totales)
+
+    def agregar(self, ventas: List[Venta]):
+        """Agrega al índice ventas que se agregaron al final del historial."""
+        for venta in ventas:
+            posicion = len(self._totales)
+            clave = _clave_fecha(venta.fecha)
+            if self._fechas and clave < self._fechas[-1]:
+                self.fechas_ordenadas = False
+            self._fechas.append(clave)
+            self._totales.append(venta.total)
+            # Los IDs son crecientes (los asigna el controlador); uno inválido cuenta como 0
+            self._ids.append(venta.id if isinstance(venta.id, int) else 0)
+            # Un producto repetido en la venta se indexa una vez
+            for codigo in {item.codigo for item in venta.items}:
+                posiciones = self._por_producto.get(codigo)
+                if posiciones is None:
+                    self._por_producto[codigo] = posiciones = array('q')
+                posiciones.append(posicion)
+
+    def posicion_id(self, id_venta: int) -> int:
+        """Posición de la primera venta con ID mayor o igual a id_venta."""
+        return bisect_left(self._ids, id_venta)
+
+    def consultar(self, desde: Optional[date] = None, hasta: Optional[date] = None,
+                  total_minimo: Optional[int] = None, codigo: Optional[str] = None,
+                  antes_de: Optional[int] = None, limite: int = 50) -> Tuple[List[int], int, bool]:
+        """
+        Busca las ventas entre las fechas desde y hasta (días inclusive), con total
+        mayor o igual a total_minimo y que incluyan el producto codigo (los filtros
+        None no se aplican). Retorna (posiciones de la página, de la más nueva a la
+        más antigua; cantidad total de coincidencias; si hay más páginas).
+        antes_de es el cursor: la página empieza en la venta con ID menor a él.
+        """
+        d = _clave_fecha(datetime.combine(desde, datetime.min.time())) if desde else None
+        h = _clave_fecha(datetime.combine(hasta + timedelta(days=1), datetime.min.time())) if hasta else None
+
+        # 1. Rango de posiciones por fecha (o filtro fila a fila si las fechas no están ordenadas)
+        inicio, fin = 0, len(self._totales)
+        filtrar_fecha = not self.fechas_ordenadas and (d is not None or h is not None)
+        if self.fechas_ordenadas:
+            if d is not None:
+                inicio = bisect_left(self._fechas, d)
+            if h is not None:
+                fin = bisect_left(self._fechas, h)
+        fin = max(inicio, fin)
+
+        # 2. Candidatos: el rango completo o las posiciones del producto dentro del rango
+        if codigo is not None:
+            posiciones = self._por_producto.get(codigo, array('q'))
+            candidatos = posiciones[bisect_left(posiciones, inicio):bisect_left(posiciones, fin)]
+        else:
+            candidatos = range(inicio, fin)
+
+        def coincide(posicion):
+            if total_minimo is not None and self._totales[posicion] < total_minimo:
+                return False
+            if filtrar_fecha:
+                clave = self._fechas[posicion]
+                if (d is not None and clave < d) or (h is not None and clave >= h):
+                    return False
+            return True
+
+        # 3. Conteo: sin filtros fila a fila, es la cantidad de candidatos
+        if total_minimo is None and not filtrar_fecha:
+            total = len(candidatos)
+        else:
+            total = self._contar(candidatos, coincide, total_minimo, filtrar_fecha, d, h)
+
+        # 4. Página: recorre hacia atrás desde el cursor hasta juntar limite + 1 coincidencias
+        tope = len(candidatos)
+        if antes_de is not None:
+            tope = bisect_left(candidatos, self.posicion_id(antes_de))
+        pagina = []
+        for i in range(tope - 1, -1, -1):
+            posicion = candidatos[i]
+            if coincide(posicion):
+                if len(pagina) == limite:
+                    return pagina, total, True
+                pagina.append(posicion)
+        return pagina, total, False
+
+    def _contar(self, candidatos, coincide, total_minimo, filtrar_fecha, d, h) -> int:
+        """Cuenta los candidatos que pasan los filtros fila a fila."""
+        np = numpy()
+        if np is None:
+            return sum(1 for posicion in candidatos if coincide(posicion))
+        # Copias de las columnas acotadas (un array exportado a NumPy no podría crecer)
+        if isinstance(candidatos, range):
+            totales = np.frombuffer(self._totales[candidatos.start:candidatos.stop], dtype=np.int64)
+            fechas = np.frombuffer(self._fechas[candidatos.start:candidatos.stop], dtype=np.float64) if filtrar_fecha else None
+        else:
+            indices = np.frombuffer(candidatos, dtype=np.int64)
+            totales = np.array(self._totales, dtype=np.int64)[indices]
+            fechas = np.array(self._fechas, dtype=np.float64)[indices] if filtrar_fecha else None
+        mascara = np.ones(len(totales), dtype=bool)
+        if total_minimo is not None:
+            mascara &= totales >= total_minimo
+        if filtrar_fecha:
+            if d is not None:
+                mascara &= fechas >= d
+            if h is not None:
+                mascara &= fechas < h
+        return int(mascara.sum())
@@ -0,0 +1,265 @@
+"""Controlador para el historial del inventario (snapshots y deltas).
+
+Returns:
+    class: Clase InventarioHistoricoController
+"""
+
+import os
+import re
+import json
+import threading
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+from models.dinero import multiplicar, redondear
+from .producto_controller import ProductoController
+from .bloqueo_archivo import bloqueo_archivo
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+# Encabezado de cada línea de snapshot: se lee sin decodificar el catálogo completo
+_ENCABEZADO_SNAPSHOT = re.compile(rb'^\{"fecha":"([^"]+)","offset_delta":(\d+),')
+
+class InventarioHistoricoController:
+    """
+    Permite consultar el inventario (stock y valor) en cualquier fecha pasada.
+
+    Guarda snapshots periódicos y compactos del stock y precio de cada producto,
+    y entre snapshots registra solo los cambios (deltas) en un archivo de solo
+    agregado. Para responder "¿cuál era el valor del inventario en la fecha D?"
+    se busca el snapshot más cercano anterior a D (búsqueda binaria) y se
+    reaplican únicamente los deltas posteriores a ese snapshot hasta D.
+
+    Los snapshots también se agregan a su propio archivo (una línea JSON por
+    snapshot) y cada uno apunta a la posición en bytes del archivo de deltas
+    desde la que hay que reaplicar, así varias instancias del POS pueden escribir
+    los mismos archivos. En memoria solo queda el índice de snapshots (fecha y
+    posiciones); el catálogo de un snapshot se lee del disco al consultarlo.
+    Los snapshots se toman en un hilo aparte, fuera del camino de la venta.
+    """
+
+    def __init__(self, producto_controller: ProductoController,
+                 archivo_snapshots: str = 'data/inventario_snapshots.jsonl',
+                 archivo_deltas: str = 'data/inventario_deltas.jsonl',
+                 intervalo_deltas: int = 500):
+        # Rutas de persistencia: snapshots y deltas (una línea JSON por registro)
+        self.archivo_snapshots = archivo_snapshots
+        self.archivo_deltas = archivo_deltas
+        # Cantidad de cambios tras la cual se toma un nuevo snapshot
+        self.intervalo_deltas = intervalo_deltas
+        # Controlador de productos que provee el estado actual y notifica cambios
+        self.producto_controller = producto_controller
+
+        # Índice de snapshots: (posición de la línea en su archivo, offset en el archivo de deltas)
+        self._indice: List[Tuple[int, int]] = []
+        # Fechas en una lista paralela para búsqueda binaria
+        self._fechas_snapshots: List[str] = []
+        # Bytes del archivo de snapshots ya indexados (lo agregado luego, por cualquier instancia, se indexa al consultar)
+        self._tamano_indexado = 0
+        # Protege el índice: los snapshots se toman en otro hilo mientras se consulta
+        self._candado = threading.RLock()
+
+        # Cambios registrados desde el último snapshot y día de ese snapshot (disparan el siguiente)
+        self._deltas_desde_snapshot = 0
+        self._dia_ultimo_snapshot: Optional[str] = None
+        # Hilo de snapshots: pedido pendiente y evento que se activa cuando no queda ninguno
+        self._tomando = False
+        self._snapshot_pendiente = False
+        self._snapshots_listos = threading.Event()
+        self._snapshots_listos.set()
+
+        # Carga inicial y suscripción a los cambios de productos
+        self.cargar_historial()
+        self.producto_controller.suscribir(self._on_evento_producto)
+
+    def cargar_historial(self):
+        """Indexa los snapshots guardados; si no hay ninguno, toma el primero."""
+        try:
+            self._migrar_snapshots_antiguos()
+            with self._candado:
+                self._indice, self._fechas_snapshots, self._tamano_indexado = [], [], 0
+                self._actualizar_indice()
+            print(f"Historial de inventario cargado: {len(self._indice)} snapshots")
+        except Exception as e:
+            print(f"Error al cargar historial de inventario: {e}")
+            self._indice, self._fechas_snapshots, self._tamano_indexado = [], [], 0
+
+        if not self._fechas_snapshots:
+            self.tomar_snapshot()
+        if self._fechas_snapshots:
+            self._dia_ultimo_snapshot = self._fechas_snapshots[-1][:10]
+
+    def _actualizar_indice(self):
+        """Indexa las líneas agregadas al archivo de snapshots desde la última vez (requiere el candado)."""
+        if not os.path.exists(self.archivo_snapshots):
+            return
+        with open(self.archivo_snapshots, 'rb') as f:
+            f.seek(self._tamano_indexado)
+            posicion = self._tamano_indexado
+            for linea in f:
+                # Una línea sin salto todavía se está escribiendo
+                if not linea.endswith(b'\n'):
+                    break
+                encabezado = _ENCABEZADO_SNAPSHOT.match(linea)
+                if encabezado:
+                    fecha, offset = encabezado.group(1).decode('utf-8'), int(encabezado.group(2))
+                else:
+                    registro = json.loads(linea)
+                    fecha, offset = registro['fecha'], registro['offset_delta']
+                self._indice.append((posicion, offset))
+                self._fechas_snapshots.append(fecha)
+                posicion += len(linea)
+            self._tamano_indexado = posicion
+
+    def _migrar_snapshots_antiguos(self):
+        """
+        Convierte el archivo de snapshots anterior (una lista JSON con 'indice_delta',
+        la posición del delta en la lista) al formato de una línea por snapshot con
+        el offset en bytes del archivo de deltas. El archivo anterior no se borra.
+        """
+        anterior = os.path.splitext(self.archivo_snapshots)[0] + '.json'
+        if anterior == self.archivo_snapshots or not os.path.exists(anterior) \
+                or os.path.exists(self.archivo_snapshots):
+            return
+        with open(anterior, 'r', encoding='utf-8') as f:
+            snapshots = json.load(f)
+
+        # Offset en bytes de cada línea del archivo de deltas
+        offsets = [0]
+        if os.path.exists(self.archivo_deltas):
+            with open(self.archivo_deltas, 'rb') as f:
+                for linea in f:
+                    offsets.append(offsets[-1] + len(linea))
+        with bloqueo_archivo(self.archivo_snapshots), open(self.archivo_snapshots, 'ab') as f:
+            for snapshot in snapshots:
+                offset = offsets[min(snapshot['indice_delta'], len(offsets) - 1)]
+                f.write(self._linea_snapshot(snapshot['fecha'], offset, snapshot['productos']))
+        print(f"Snapshots de inventario migrados a {self.archivo_snapshots}: {len(snapshots)}")
+
+    @staticmethod
+    def _linea_snapshot(fecha: str, offset_delta: int, productos: Dict[str, list]) -> bytes:
+        """Serializa un snapshot con el encabezado (fecha y offset) al comienzo de la línea."""
+        registro = {'fecha': fecha, 'offset_delta': offset_delta, 'productos': productos}
+        return (json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def tomar_snapshot(self):
+        """Registra el stock y precio actuales de todos los productos (agregando una línea)."""
+        try:
+            # El offset se toma antes que el estado: los deltas posteriores ya aplicados
+            # al estado se reaplican con el mismo valor, y los siguientes lo corrigen en orden
+            offset = os.path.getsize(self.archivo_deltas) if os.path.exists(self.archivo_deltas) else 0
+            productos = self.producto_controller.estado_inventario()
+            fecha = datetime.now().strftime(FORMATO_FECHA)
+            linea = self._linea_snapshot(fecha, offset, productos)
+
+            # El bloqueo evita que las líneas de dos instancias se mezclen
+            with bloqueo_archivo(self.archivo_snapshots):
+                with open(self.archivo_snapshots, 'ab') as f:
+                    f.write(linea)
+                with self._candado:
+                    self._actualizar_indice()
+        except Exception as e:
+            print(f"Error al guardar snapshot de inventario: {e}")
+
+    def _programar_snapshot(self):
+        """Pide un snapshot al hilo de snapshots, lanzándolo si no está corriendo."""
+        with self._candado:
+            self._deltas_desde_snapshot = 0
+            self._dia_ultimo_snapshot = datetime.now().strftime('%Y-%m-%d')
+            self._snapshot_pendiente = True
+            if self._tomando:
+                return
+            self._tomando = True
+            self._snapshots_listos.clear()
+        threading.Thread(target=self._tomar_snapshots_pendientes, daemon=True,
+                         name='snapshots-inventario').start()
+
+    def _tomar_snapshots_pendientes(self):
+        """Hilo de snapshots: los pedidos que llegan mientras se toma uno se juntan en el siguiente."""
+        while True:
+            with self._candado:
+                if not self._snapshot_pendiente:
+                    self._tomando = False
+                    self._snapshots_listos.set()
+                    return
+                self._snapshot_pendiente = False
+            self.tomar_snapshot()
+
+    def esperar_snapshots(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se guarden los snapshots pedidos. Retorna False si se agotó el tiempo."""
+        return self._snapshots_listos.wait(timeout)
+
+    def _registrar_delta(self, codigo: str, stock, precio):
+        """Agrega un cambio al archivo de deltas (sin reescribirlo)."""
+        fecha = datetime.now().strftime(FORMATO_FECHA)
+        delta = [fecha, codigo, stock, precio]
+        try:
+            os.makedirs(os.path.dirname(self.archivo_deltas), exist_ok=True)
+            with open(self.archivo_deltas, 'ab') as f:
+                f.write((json.dumps(delta, ensure_ascii=False) + '\n').encode('utf-8'))
+        except Exception as e:
+            print(f"Error al guardar cambio de inventario: {e}")
+
+        # Snapshot periódico: cada 'intervalo_deltas' cambios o al comenzar un nuevo día
+        self._deltas_desde_snapshot += 1
+        if (self._deltas_desde_snapshot >= self.intervalo_deltas
+                or self._dia_ultimo_snapshot != fecha[:10]):
+            self._programar_snapshot()
+
+    def _on_evento_producto(self, evento: str, producto):
+        """Traduce los eventos del controlador de productos en deltas o snapshots."""
+        if evento in ('producto_agregado', 'producto_actualizado', 'stock_actualizado'):
+            self._registrar_delta(producto.codigo, producto.stock, producto.precio)
+        elif evento == 'producto_eliminado':
+            self._registrar_delta(producto.codigo, None, None)
+        elif evento == 'productos_recargados':
+            # El inventario cambió completo (recarga o reinicio): conviene un snapshot nuevo
+            self._programar_snapshot()
+
+    def inventario_en_fecha(self, fecha: Union[date, datetime]) -> Optional[Dict[str, list]]:
+        """
+        Retorna {codigo: [stock, precio]} tal como estaba en la fecha indicada.
+        Si se entrega un date (sin hora), se considera el final de ese día.
+        Retorna None si la fecha es anterior al primer snapshot.
+        """
+        if isinstance(fecha, datetime):
+            clave = fecha.strftime(FORMATO_FECHA)
+        else:
+            clave = f"{fecha.isoformat()} 23:59:59"
+
+        with self._candado:
+            # Incluye los snapshots que otras instancias agregaron al archivo
+            self._actualizar_indice()
+            # Snapshot más reciente con fecha <= D
+            i = bisect_right(self._fechas_snapshots, clave) - 1
+            if i < 0:
+                return None
+            posicion, offset = self._indice[i]
+
+        with open(self.archivo_snapshots, 'rb') as f:
+            f.seek(posicion)
+            estado = json.loads(f.readline())['productos']
+
+        # Reaplicar solo los deltas entre el snapshot y la fecha D
+        if os.path.exists(self.archivo_deltas):
+            with open(self.archivo_deltas, 'rb') as f:
+                f.seek(offset)
+                for linea in f:
+                    if not linea.endswith(b'\n'):
+                        break
+                    fecha_delta, codigo, stock, precio = json.loads(linea)
+                    if fecha_delta > clave:
+                        break
+                    if stock is None:
+                        estado.pop(codigo, None)
+                    else:
+                        estado[codigo] = [stock, precio]
+        return estado
+
+    def valor_en_fecha(self, fecha: Union[date, datetime]) -> Optional[int]:
+        """Retorna el valor del inventario (stock * precio) en la fecha indicada, como monto entero."""
+        estado = self.inventario_en_fecha(fecha)
+        if estado is None:
+            return None
+        # redondear() también cubre los snapshots antiguos con precios float
+        return sum(multiplicar(redondear(precio), stock) for stock, precio in estado.values())
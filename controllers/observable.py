@@ -0,0 +1,46 @@
+"""Mecanismo de notificación de cambios entre controladores.
+
+Returns:
+    class: Clase Observable
+"""
+
+import threading
+from typing import Callable, List
+
+
+class Observable:
+    """
+    Clase base que implementa el patrón Observador.
+    Permite que otros componentes (análisis, reportes, vistas) se suscriban
+    a los cambios de un controlador sin que este los conozca directamente.
+    Cada observador recibe el nombre del evento y los datos asociados.
+    Las notificaciones se entregan de a una aunque provengan de distintos hilos,
+    por lo que los observadores no necesitan sincronización propia.
+    """
+
+    def __init__(self):
+        # Lista de funciones a invocar cuando ocurre un evento
+        self._observadores: List[Callable[[str, object], None]] = []
+        # Serializa la entrega de eventos (reentrante por si un observador provoca otro evento)
+        self._candado_notificacion = threading.RLock()
+
+    def suscribir(self, callback: Callable[[str, object], None]):
+        """Registra una función que será llamada como callback(evento, datos)."""
+        if callback not in self._observadores:
+            self._observadores.append(callback)
+
+    def desuscribir(self, callback: Callable[[str, object], None]):
+        """Elimina un observador previamente registrado."""
+        if callback in self._observadores:
+            self._observadores.remove(callback)
+
+    def _notificar(self, evento: str, datos=None):
+        """Informa un evento a todos los observadores registrados."""
+        with self._candado_notificacion:
+            # Iteramos sobre una copia por si un observador se desuscribe durante la notificación
+            for callback in list(self._observadores):
+                try:
+                    callback(evento, datos)
+                except Exception as e:
+                    # Un observador defectuoso no debe interrumpir la operación principal
+                    print(f"Error en observador de '{evento}': {e}")
@@ -5,36 +5,94 @@ Returns:
 """
 
 import os
-import json
 import csv
-from typing import Dict, List
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
 from models.producto import Producto
 from models.categoria import Categoria
 from models.unidad import Unidad
+from models.almacen_columnar import AlmacenColumnar
+from models.dinero import multiplicar
+from .observable import Observable
+from .bloqueo_archivo import bloqueo_archivo, escribir_json_atomico, firma_archivo
+from .esquema import VERSION_ESQUEMA, leer_registros, con_version
 
-class ProductoController:
+class ProductoController(Observable):
     """
     Controlador encargado de la gestión del inventario de productos.
     Maneja la carga, guardado, actualización y búsqueda de productos.
+    Notifica a sus observadores los eventos 'producto_agregado', 'producto_actualizado',
+    'stock_actualizado', 'producto_eliminado' (con el producto) y 'productos_recargados'.
+
+    Es seguro para varias cajas (hilos) simultáneas: cada producto tiene su propio
+    candado y las operaciones que tocan varios productos los adquieren en orden
+    de código, lo que evita bloqueos mutuos (deadlocks) y permite que ventas
+    de productos distintos avancen en paralelo.
+
+    También admite varias instancias del POS (procesos) sobre el mismo archivo:
+    cada cambio se confirma leyendo-modificando-escribiendo bajo un bloqueo de
+    archivo, partiendo de lo que hay en disco. Los cambios de stock se suman a lo
+    que otras instancias ya guardaron (se fusionan); las ediciones de un producto
+    se rechazan si otra instancia lo modificó después (versión distinta).
+
+    Con 'columnar' (por defecto), precio, stock y stock mínimo de todo el catálogo
+    viven en un AlmacenColumnar y los cálculos sobre todos los productos
+    (valorización, stock bajo, disponibles) se hacen sobre sus arreglos.
     """
     
-    def __init__(self, archivo_productos: str = 'data/productos.json'):
+    def __init__(self, archivo_productos: str = 'data/productos.json', columnar: bool = True):
+        # Inicializa la lista de observadores
+        Observable.__init__(self)
         # Ruta del archivo JSON donde se persisten los datos
         self.archivo_productos = archivo_productos
         # Diccionario en memoria para acceso rápido por código (O(1))
         self.productos: Dict[str, Producto] = {} 
+        # Almacén columnar de los valores numéricos (None si se usan solo los objetos)
+        self.columnar = columnar
+        self.almacen = AlmacenColumnar() if columnar else None
+        # Candados por producto (reentrantes: una venta puede volver a tomarlos)
+        self._candados: Dict[str, threading.RLock] = {}
+        # Protege la creación de candados y los cambios en el catálogo (altas y bajas)
+        self._candado_catalogo = threading.RLock()
+        # Serializa las transacciones sobre el archivo entre hilos de este proceso
+        self._candado_archivo = threading.Lock()
+        # Últimos registros confirmados en disco por código (base para fusionar cambios)
+        self._registros: Dict[str, dict] = {}
+        # Firma del archivo tras la última lectura/escritura propia (detecta cambios externos)
+        self._firma = None
+        # Índice ordenado por nombre para las vistas: (generación, [(codigo, texto de búsqueda)]).
+        # La generación aumenta con cada alta, baja o edición; los cambios de stock no la afectan
+        self._indice_nombres = None
+        self._generacion_indice = 0
         # Carga inicial de datos
         self.cargar_productos()
 
     def cargar_productos(self):
-        """Lee el archivo JSON y reconstruye los objetos Producto en memoria."""
+        """
+        Lee el archivo JSON y reconstruye los objetos Producto en memoria.
+        Un archivo en la versión de esquema actual se carga por la vía rápida; uno
+        antiguo se convierte registro a registro y se reescribe migrado (una sola vez).
+        """
         if os.path.exists(self.archivo_productos):
             try:
-                with open(self.archivo_productos, 'r', encoding='utf-8') as f:
-                    productos_data = json.load(f)
+                productos_data, version = leer_registros(self.archivo_productos, 'productos')
+                migrar = version < VERSION_ESQUEMA
                 # Convierte cada diccionario del JSON en un objeto Producto
-                self.productos = {p['codigo']: Producto.from_dict(p) for p in productos_data}
+                crear = Producto.from_dict if migrar else Producto.desde_registro
+                productos = {p['codigo']: crear(p) for p in productos_data}
+                # Almacén nuevo: los objetos anteriores conservan el suyo por si alguien aún los usa
+                if self.columnar:
+                    self.almacen = AlmacenColumnar()
+                    for producto in productos.values():
+                        producto.vincular(self.almacen)
+                self.productos = productos
+                self._registros = {codigo: p.to_dict() for codigo, p in self.productos.items()}
+                self._firma = firma_archivo(self.archivo_productos)
                 print(f"Productos cargados: {len(self.productos)}")
+                if migrar:
+                    print(f"Migrando {self.archivo_productos} al esquema v{VERSION_ESQUEMA}")
+                    self.guardar_productos()
             except Exception as e:
                 print(f"Error al cargar productos: {e}")
                 # Si falla la carga, crea datos de prueba para no dejar el sistema vacío
@@ -42,34 +100,229 @@ class ProductoController:
         else:
             print("No se encontró archivo de productos. Creando productos de ejemplo.")
             self._crear_productos_ejemplo()
+        # El inventario completo pudo cambiar: los observadores deben recalcular su estado
+        self._notificar('productos_recargados')
 
     def guardar_productos(self):
-        """Serializa el estado actual de los productos y lo escribe en el archivo JSON."""
+        """
+        Escribe el estado completo en memoria como el nuevo contenido del archivo.
+        Se usa para guardados explícitos (datos de ejemplo, reinicio); los cambios
+        habituales se confirman producto a producto con fusión de versiones.
+        """
         try:
-            # Asegurar que el directorio existe antes de escribir
-            os.makedirs(os.path.dirname(self.archivo_productos), exist_ok=True)
-            
-            # Convierte todos los objetos Producto a diccionarios
-            productos_list = [p.to_dict() for p in self.productos.values()]
-            with open(self.archivo_productos, 'w', encoding='utf-8') as f:
-                # Escribe el JSON con indentación para legibilidad
-                json.dump(productos_list, f, indent=2, ensure_ascii=False)
+            with self._transaccion():
+                registros = {}
+                for codigo, producto in list(self.productos.items()):
+                    anterior = self._registros.get(codigo)
+                    registro = producto.to_dict()
+                    # Solo se incrementa la versión de los registros que realmente cambian
+                    if anterior is None or {**anterior, 'version': registro['version']} != registro:
+                        producto.version = max(producto.version, anterior['version'] if anterior else 0) + 1
+                        registro['version'] = producto.version
+                    registros[codigo] = registro
+                self._registros = registros
+                self._escribir_registros()
         except Exception as e:
             print(f"Error al guardar productos: {e}")
 
+    def _escribir_registros(self):
+        """Escribe los registros confirmados de forma atómica (requiere la transacción)."""
+        # Escribe el JSON con indentación para legibilidad
+        escribir_json_atomico(self.archivo_productos, con_version('productos', list(self._registros.values())),
+                              indent=2, ensure_ascii=False)
+        self._firma = firma_archivo(self.archivo_productos)
+
+    @contextmanager
+    def _transaccion(self):
+        """
+        Sección crítica de lectura-modificación-escritura del archivo de productos.
+        Bloquea a los demás hilos y procesos, e incorpora primero los cambios que
+        otras instancias hayan guardado. Los eventos de esos cambios externos se
+        notifican al terminar, fuera de los bloqueos.
+        """
+        with self._candado_archivo, bloqueo_archivo(self.archivo_productos):
+            eventos = self._sincronizar_desde_disco()
+            yield
+        for evento, producto in eventos:
+            self._notificar(evento, producto)
+
+    def sincronizar(self):
+        """Incorpora a memoria los cambios guardados por otras instancias del POS."""
+        with self._transaccion():
+            pass
+
+    def _sincronizar_desde_disco(self) -> list:
+        """
+        Lee el archivo solo si otra instancia lo cambió y adopta los registros
+        con versión mayor. Retorna la lista de eventos (evento, producto) a notificar.
+        """
+        firma = firma_archivo(self.archivo_productos)
+        if firma is None or firma == self._firma:
+            return []
+        registros, version = leer_registros(self.archivo_productos, 'productos')
+        en_disco = {r['codigo']: r for r in registros}
+        crear = Producto.desde_registro if version == VERSION_ESQUEMA else Producto.from_dict
+
+        # Registros que otra instancia creó o modificó (versión mayor a la conocida)
+        cambiados = [(codigo, registro) for codigo, registro in en_disco.items()
+                     if codigo not in self._registros
+                     or registro.get('version', 0) > self._registros[codigo].get('version', 0)]
+
+        eventos = []
+        nuevos = []
+        # El stock de los productos existentes se reescribe bajo sus candados, como en las ventas
+        with self.bloquear_productos(codigo for codigo, _ in cambiados if codigo in self.productos):
+            for codigo, registro in cambiados:
+                anterior = self._registros.get(codigo)
+                nuevo = crear(registro)
+                producto = self.productos.get(codigo)
+                if producto is None:
+                    nuevos.append(nuevo)
+                    eventos.append(('producto_agregado', nuevo))
+                else:
+                    # Se conservan los cambios de stock en curso de este proceso (aún sin confirmar)
+                    en_curso = producto.stock - anterior['stock'] if anterior else 0
+                    producto.nombre = nuevo.nombre
+                    producto.precio = nuevo.precio
+                    producto.categoria = nuevo.categoria
+                    producto.unidad = nuevo.unidad
+                    producto.stock_minimo = nuevo.stock_minimo
+                    producto.imagen_path = nuevo.imagen_path
+                    producto.version = nuevo.version
+                    producto.stock = nuevo.stock + en_curso
+                    eventos.append(('producto_actualizado', producto))
+                self._registros[codigo] = nuevo.to_dict()
+        self._poner_nuevos(nuevos)
+
+        # Productos que otra instancia eliminó
+        eliminados = [c for c in self._registros if c not in en_disco]
+        for codigo in eliminados:
+            del self._registros[codigo]
+        for producto in self._quitar_varios(eliminados):
+            eventos.append(('producto_eliminado', producto))
+
+        self._firma = firma
+        return eventos
+
+    def _notificar(self, evento: str, datos=None):
+        """Notifica a los observadores e invalida el índice por nombre si el catálogo cambió."""
+        if evento != 'stock_actualizado':
+            self._generacion_indice += 1
+        Observable._notificar(self, evento, datos)
+
+    def _indice(self) -> List[Tuple[str, str]]:
+        """
+        [(codigo, texto de búsqueda)] de todos los productos ordenados por nombre.
+        Se reconstruye solo si hubo altas, bajas o ediciones desde la última vez.
+        """
+        generacion = self._generacion_indice
+        indice = self._indice_nombres
+        if indice is None or indice[0] != generacion:
+            productos = sorted(list(self.productos.values()), key=lambda p: (p.nombre, p.codigo))
+            indice = (generacion, [(p.codigo, self._texto_busqueda(p)) for p in productos])
+            self._indice_nombres = indice
+        return indice[1]
+
+    @staticmethod
+    def _texto_busqueda(producto: Producto) -> str:
+        """Código, nombre y categoría en minúsculas, separados para que un término no abarque dos campos."""
+        return f"{producto.codigo}\n{producto.nombre}\n{producto.categoria.nombre}".lower()
+
+    def coincide(self, producto: Producto, termino: str) -> bool:
+        """Indica si un producto coincide con un término de búsqueda (misma regla que buscar_producto)."""
+        return termino.lower() in self._texto_busqueda(producto)
+
+    def codigos_ordenados(self, termino: str = '') -> List[str]:
+        """
+        Códigos de los productos ordenados por nombre, filtrados por coincidencia
+        parcial en código, nombre o categoría si se indica un término.
+        """
+        termino = termino.lower()
+        if not termino:
+            return [codigo for codigo, _ in self._indice()]
+        return [codigo for codigo, texto in self._indice() if termino in texto]
+
+    def _poner(self, producto: Producto):
+        """Agrega o reemplaza un producto en memoria, vinculándolo al almacén columnar."""
+        anterior = self.productos.get(producto.codigo)
+        if anterior is producto:
+            return
+        if anterior is None:
+            self._poner_nuevos([producto])
+            return
+        # Primero se libera la posición del objeto reemplazado (mismo código)
+        anterior.desvincular()
+        if self.almacen is not None:
+            producto.vincular(self.almacen)
+        self.productos[producto.codigo] = producto
+
+    def _poner_nuevos(self, nuevos: List[Producto]):
+        """
+        Agrega productos con códigos nuevos. El diccionario se reemplaza por una copia
+        en lugar de modificarse: quien lo esté recorriendo en otro hilo (la ventana
+        mientras se guarda en segundo plano) sigue con el anterior sin error.
+        """
+        if not nuevos:
+            return
+        productos = dict(self.productos)
+        for producto in nuevos:
+            if self.almacen is not None:
+                producto.vincular(self.almacen)
+            productos[producto.codigo] = producto
+        self.productos = productos
+
+    def _quitar(self, codigo: str):
+        """Quita un producto de memoria; el objeto conserva sus valores fuera del almacén."""
+        quitados = self._quitar_varios([codigo])
+        return quitados[0] if quitados else None
+
+    def _quitar_varios(self, codigos: List[str]) -> List[Producto]:
+        """Quita varios productos de memoria (con una copia del diccionario, como _poner_nuevos)."""
+        productos = dict(self.productos)
+        quitados = [productos.pop(codigo) for codigo in codigos if codigo in productos]
+        if quitados:
+            self.productos = productos
+        for producto in quitados:
+            producto.desvincular()
+        return quitados
+
+    def _candado(self, codigo: str) -> threading.RLock:
+        """Retorna (creándolo si hace falta) el candado de un producto."""
+        candado = self._candados.get(codigo)
+        if candado is None:
+            with self._candado_catalogo:
+                candado = self._candados.setdefault(codigo, threading.RLock())
+        return candado
+
+    @contextmanager
+    def bloquear_productos(self, codigos: Iterable[str]):
+        """
+        Adquiere los candados de varios productos durante un bloque 'with'.
+        Se toman siempre en orden de código para que dos cajas nunca esperen
+        una por la otra en sentido contrario.
+        """
+        candados = [self._candado(codigo) for codigo in sorted(set(codigos))]
+        for candado in candados:
+            candado.acquire()
+        try:
+            yield
+        finally:
+            for candado in reversed(candados):
+                candado.release()
+
     def _crear_productos_ejemplo(self):
         """Genera un set inicial de productos para demostración."""
         # Lista de productos predefinidos para poblar el sistema
         productos_ejemplo = [
-            Producto("1", "Arroz", 1500, 50.0, Categoria("Abarrotes"), Unidad("kg"), 10.0),
-            Producto("2", "Leche", 1200, 30, Categoria("Lácteos"), Unidad("unidades"), 5),
-            Producto("3", "Pan", 800, 100, Categoria("Panadería"), Unidad("unidades"), 20),
-            Producto("4", "Manzanas", 2500, 20.5, Categoria("Frutas"), Unidad("kg"), 5.0),
-            Producto("5", "Pollo", 5000, 15.0, Categoria("Carnes"), Unidad("kg"), 5.0),
+            Producto("1", "Arroz", 1500, 50.0, Categoria.obtener("Abarrotes"), Unidad.obtener("kg"), 10.0),
+            Producto("2", "Leche", 1200, 30, Categoria.obtener("Lácteos"), Unidad.obtener("unidades"), 5),
+            Producto("3", "Pan", 800, 100, Categoria.obtener("Panadería"), Unidad.obtener("unidades"), 20),
+            Producto("4", "Manzanas", 2500, 20.5, Categoria.obtener("Frutas"), Unidad.obtener("kg"), 5.0),
+            Producto("5", "Pollo", 5000, 15.0, Categoria.obtener("Carnes"), Unidad.obtener("kg"), 5.0),
         ]
         # Agrega los productos al diccionario en memoria
         for producto in productos_ejemplo:
-            self.productos[producto.codigo] = producto
+            self._poner(producto)
         # Persiste los cambios
         self.guardar_productos()
         print("Productos de ejemplo creados")
@@ -93,22 +346,27 @@ class ProductoController:
         Registra un nuevo producto en el sistema.
         Retorna False si el código ya existe o si el nombre ya está en uso.
         """
-        # Validar código único
-        if producto.codigo in self.productos:
-            print(f"Ya existe un producto con el código {producto.codigo}")
-            return False
-        
-        # Validar nombre único (case-insensitive) para evitar duplicados como "Arroz" y "arroz"
-        nombre_nuevo = producto.nombre.strip().lower()
-        for p in self.productos.values():
-            if p.nombre.strip().lower() == nombre_nuevo:
-                print(f"Ya existe un producto con el nombre '{producto.nombre}'")
+        # Las validaciones se hacen tras sincronizar, para ver también lo creado por otras instancias
+        with self._transaccion(), self._candado_catalogo:
+            # Validar código único
+            if producto.codigo in self.productos:
+                print(f"Ya existe un producto con el código {producto.codigo}")
                 return False
-        
-        # Agrega y guarda
-        self.productos[producto.codigo] = producto
-        self.guardar_productos()
+            
+            # Validar nombre único (case-insensitive) para evitar duplicados como "Arroz" y "arroz"
+            nombre_nuevo = producto.nombre.strip().lower()
+            for p in self.productos.values():
+                if p.nombre.strip().lower() == nombre_nuevo:
+                    print(f"Ya existe un producto con el nombre '{producto.nombre}'")
+                    return False
+            
+            # Agrega y guarda
+            producto.version = 1
+            self._poner(producto)
+            self._registros[producto.codigo] = producto.to_dict()
+            self._escribir_registros()
         print(f"Producto '{producto.nombre}' agregado exitosamente")
+        self._notificar('producto_agregado', producto)
         return True
 
     def actualizar_stock(self, codigo: str, cantidad: float, operacion: str = 'agregar') -> bool:
@@ -117,84 +375,186 @@ class ProductoController:
         operacion: 'agregar' o 'restar'.
         Retorna False si no hay stock suficiente o el producto no existe.
         """
-        # Busca el producto en memoria
-        producto = self.productos.get(codigo)
-        if not producto:
-            print(f"Producto con código {codigo} no encontrado")
-            return False
-        
-        # Aplica la operación solicitada
-        if operacion == 'agregar':
-            producto.stock += cantidad
-        elif operacion == 'restar':
-            # Verifica que haya suficiente stock antes de restar
-            if producto.stock < cantidad:
-                print(f"Stock insuficiente. Disponible: {producto.stock} {producto.unidad.nombre}")
+        # La verificación y la modificación ocurren bajo el candado del producto
+        with self.bloquear_productos([codigo]):
+            # Busca el producto en memoria
+            producto = self.productos.get(codigo)
+            if not producto:
+                print(f"Producto con código {codigo} no encontrado")
                 return False
-            producto.stock -= cantidad
+            
+            # Aplica la operación solicitada
+            if operacion == 'agregar':
+                delta = cantidad
+            elif operacion == 'restar':
+                # Verifica que haya suficiente stock antes de restar
+                if producto.stock < cantidad:
+                    print(f"Stock insuficiente. Disponible: {producto.stock} {producto.unidad.nombre}")
+                    return False
+                delta = -cantidad
+            else:
+                return False
+            producto.stock += delta
         
+        # Persiste los cambios (fusionándolos con los de otras instancias)
+        if not self.confirmar_stock({codigo: delta}):
+            return False
+
         print(f"Stock actualizado: {producto.nombre} ahora tiene {producto.stock} {producto.unidad.nombre}")
         # Verifica si se debe generar una alerta
         if producto.tiene_stock_bajo():
             print(f"ALERTA: {producto.nombre} tiene stock bajo ({producto.stock} {producto.unidad.nombre})")
-        
-        # Persiste los cambios
-        self.guardar_productos()
+        return True
+
+    def descontar_en_memoria(self, demanda: Dict[str, float]) -> bool:
+        """
+        Valida y descuenta el stock bajo los candados de los productos, sin persistir.
+        Todo o nada: si un producto no alcanza, no se modifica ninguno.
+        """
+        with self.bloquear_productos(demanda):
+            # Validación previa de todo el lote (atomicidad)
+            for codigo, cantidad in demanda.items():
+                producto = self.productos.get(codigo)
+                if not producto or producto.stock < cantidad:
+                    print(f"No se puede descontar {cantidad} de {codigo}: stock insuficiente o producto inexistente")
+                    return False
+
+            for codigo, cantidad in demanda.items():
+                self.productos[codigo].stock -= cantidad
+        return True
+
+    def confirmar_stock(self, deltas: Dict[str, float]) -> bool:
+        """
+        Guarda en disco cambios de stock ya aplicados en memoria: {codigo: delta}.
+        Cada delta se suma al stock que está en disco, así se fusiona con las ventas
+        que otras instancias del POS hayan guardado entretanto. Si con eso algún
+        stock quedaría negativo (otra caja vendió lo mismo), se rechaza el conjunto
+        completo y se revierte en memoria. Una sola escritura para todos los productos.
+        """
+        with self._transaccion():
+            nuevos = {}
+            conflicto = None
+            for codigo, delta in deltas.items():
+                registro = self._registros.get(codigo)
+                if registro is None:
+                    conflicto = f"el producto {codigo} fue eliminado en otra instancia"
+                    break
+                stock = registro['stock'] + delta
+                if stock < 0:
+                    conflicto = f"stock insuficiente de {registro['nombre']} tras los cambios de otra instancia"
+                    break
+                nuevos[codigo] = stock
+
+            if conflicto:
+                # Revierte en memoria los cambios que no se pudieron confirmar
+                # (bajo los candados: otras cajas pueden estar descontando estos productos)
+                with self.bloquear_productos(deltas):
+                    for codigo, delta in deltas.items():
+                        producto = self.productos.get(codigo)
+                        if producto:
+                            producto.stock -= delta
+                print(f"Conflicto al guardar stock: {conflicto}")
+                return False
+
+            for codigo, stock in nuevos.items():
+                version = self._registros[codigo]['version'] + 1
+                self._registros[codigo] = {**self._registros[codigo], 'stock': stock, 'version': version}
+                self.productos[codigo].version = version
+            self._escribir_registros()
+
+        for codigo in deltas:
+            self._notificar('stock_actualizado', self.productos[codigo])
         return True
 
     def actualizar_producto(self, producto: Producto) -> bool:
         """
         Actualiza la información de un producto existente.
         Reemplaza el objeto producto en el diccionario y guarda los cambios.
+        Se rechaza si otra instancia modificó el producto desde que se leyó
+        (su versión en disco ya no es la versión sobre la que se editó).
         """
-        if producto.codigo not in self.productos:
-            print(f"Error: No se puede actualizar. Producto {producto.codigo} no existe.")
-            return False
-            
-        # Actualiza el producto en memoria
-        self.productos[producto.codigo] = producto
-        # Persiste los cambios
-        self.guardar_productos()
+        # Versión sobre la que se hicieron los cambios (antes de sincronizar)
+        version_base = producto.version
+        with self._transaccion(), self._candado_catalogo, self.bloquear_productos([producto.codigo]):
+            registro = self._registros.get(producto.codigo)
+            if producto.codigo not in self.productos or registro is None:
+                print(f"Error: No se puede actualizar. Producto {producto.codigo} no existe.")
+                return False
+            if registro['version'] != version_base:
+                print(f"Conflicto: el producto {producto.codigo} fue modificado en otra instancia. Cambios rechazados.")
+                return False
+                
+            # Actualiza el producto en memoria y en disco con una versión nueva
+            producto.version = version_base + 1
+            self._poner(producto)
+            self._registros[producto.codigo] = producto.to_dict()
+            self._escribir_registros()
         print(f"Producto {producto.codigo} actualizado correctamente.")
+        self._notificar('producto_actualizado', producto)
         return True
 
     def buscar_producto(self, termino: str) -> List[Producto]:
         """Filtra productos por coincidencia parcial en código, nombre o categoría."""
         termino = termino.lower()
         # Retorna una lista de productos que coincidan con el término de búsqueda
-        return [p for p in self.productos.values() if 
-                termino in p.codigo.lower() or 
-                termino in p.nombre.lower() or 
-                termino in p.categoria.nombre.lower()]
+        return [p for p in self.productos.values() if termino in self._texto_busqueda(p)]
 
     def obtener_productos_disponibles(self) -> List[Producto]:
         """Retorna lista de productos que tienen stock mayor a 0."""
         # Filtra productos con stock positivo para la venta
+        if self.almacen is not None:
+            return self._productos_de(self.almacen.codigos_con_stock())
         return [p for p in self.productos.values() if p.stock > 0]
 
     def obtener_productos_stock_bajo(self) -> List[Producto]:
         """Retorna lista de productos que requieren reabastecimiento."""
         # Filtra productos que están por debajo del mínimo o agotados
+        if self.almacen is not None:
+            return self._productos_de(self.almacen.codigos_stock_bajo())
         return [p for p in self.productos.values() if p.tiene_stock_bajo() or p.stock == 0]
 
+    def _productos_de(self, codigos: Iterable[str]) -> List[Producto]:
+        """Objetos Producto de una lista de códigos (omite los que ya no existen)."""
+        productos = self.productos
+        return [productos[codigo] for codigo in codigos if codigo in productos]
+
+    def valor_inventario(self) -> int:
+        """Valor total del inventario (precio * stock de todos los productos), como monto entero."""
+        if self.almacen is not None:
+            return self.almacen.valor_total()
+        return sum(multiplicar(p.precio, p.stock) for p in self.productos.values())
+
+    def estado_inventario(self) -> Dict[str, list]:
+        """Retorna {codigo: [stock, precio]} de todos los productos."""
+        # Se llama desde el hilo de snapshots: el catálogo no cambia mientras se recorre
+        with self._candado_catalogo:
+            if self.almacen is not None:
+                return self.almacen.estado()
+            return {codigo: [p.stock, p.precio] for codigo, p in self.productos.items()}
+
     def eliminar_producto(self, codigo: str) -> bool:
         """Elimina permanentemente un producto del sistema."""
-        if codigo not in self.productos:
-            print(f"Producto con código {codigo} no encontrado")
-            return False
-        
-        # Elimina del diccionario y guarda
-        producto = self.productos[codigo]
-        del self.productos[codigo]
-        self.guardar_productos()
+        with self._transaccion(), self._candado_catalogo, self.bloquear_productos([codigo]):
+            if codigo not in self.productos:
+                print(f"Producto con código {codigo} no encontrado")
+                return False
+            
+            # Elimina del diccionario y guarda
+            producto = self._quitar(codigo)
+            self._registros.pop(codigo, None)
+            self._escribir_registros()
         print(f"Producto '{producto.nombre}' eliminado exitosamente")
+        self._notificar('producto_eliminado', producto)
         return True
 
     def reiniciar_productos(self) -> bool:
         """Borra todo el inventario y restaura los datos de ejemplo."""
         try:
-            self.productos.clear()
+            self.productos = {}
+            if self.columnar:
+                self.almacen = AlmacenColumnar()
             self._crear_productos_ejemplo()
+            self._notificar('productos_recargados')
             return True
         except Exception as e:
             print(f"Error al reiniciar productos: {e}")
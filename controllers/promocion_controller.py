@@ -0,0 +1,132 @@
+"""Controlador para las promociones y reglas de precios.
+
+Returns:
+    class: Clase PromocionController
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from models.promocion import Promocion
+from .producto_controller import ProductoController
+
+class PromocionController:
+    """
+    Motor de promociones (2x1, N-ésima unidad, porcentaje por categoría, precios por horario).
+
+    Cada vez que las reglas cambian se "compilan" en dos tablas de búsqueda:
+    {codigo: reglas del producto} y {categoria: reglas de la categoría}.
+    Evaluar un carrito consulta solo las reglas de cada línea, así el costo es
+    O(tamaño del carrito) y no O(reglas x carrito).
+    Las promociones no se acumulan: cada línea recibe la de mayor ahorro.
+    """
+
+    def __init__(self, producto_controller: ProductoController, archivo_promociones: str = 'data/promociones.json'):
+        # Ruta del archivo JSON de promociones
+        self.archivo_promociones = archivo_promociones
+        # Controlador de productos (precio y categoría de cada línea)
+        self.producto_controller = producto_controller
+        # Promociones por id
+        self.promociones: Dict[str, Promocion] = {}
+        # Tablas compiladas (se reemplazan completas, así una evaluación nunca ve una tabla a medias)
+        self._por_producto: Dict[str, Tuple[Promocion, ...]] = {}
+        self._por_categoria: Dict[str, Tuple[Promocion, ...]] = {}
+        # Serializa las modificaciones de las reglas
+        self._candado = threading.Lock()
+        # Carga inicial
+        self.cargar_promociones()
+
+    def cargar_promociones(self):
+        """Carga las promociones desde el archivo JSON y compila las tablas."""
+        self.promociones = {}
+        if os.path.exists(self.archivo_promociones):
+            try:
+                with open(self.archivo_promociones, 'r', encoding='utf-8') as f:
+                    registros = json.load(f)
+                for registro in registros:
+                    # Una promoción inválida (ej. por horario sin franja) se omite sin perder las demás
+                    try:
+                        promocion = Promocion.from_dict(registro)
+                    except ValueError as e:
+                        print(f"Promoción {registro.get('id')} omitida: {e}")
+                        continue
+                    self.promociones[promocion.id] = promocion
+                print(f"Promociones cargadas: {len(self.promociones)}")
+            except Exception as e:
+                print(f"Error al cargar promociones: {e}")
+        self._compilar()
+
+    def guardar_promociones(self):
+        """Guarda las promociones en el archivo JSON."""
+        try:
+            # Asegurar que el directorio existe
+            os.makedirs(os.path.dirname(self.archivo_promociones), exist_ok=True)
+
+            with open(self.archivo_promociones, 'w', encoding='utf-8') as f:
+                json.dump([p.to_dict() for p in self.promociones.values()], f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error al guardar promociones: {e}")
+
+    def _compilar(self):
+        """Construye las tablas de búsqueda por producto y por categoría con las reglas activas."""
+        por_producto: Dict[str, List[Promocion]] = {}
+        por_categoria: Dict[str, List[Promocion]] = {}
+        for promocion in self.promociones.values():
+            if not promocion.activa:
+                continue
+            if promocion.codigo is not None:
+                por_producto.setdefault(promocion.codigo, []).append(promocion)
+            else:
+                por_categoria.setdefault(promocion.categoria, []).append(promocion)
+        self._por_producto = {codigo: tuple(reglas) for codigo, reglas in por_producto.items()}
+        self._por_categoria = {categoria: tuple(reglas) for categoria, reglas in por_categoria.items()}
+
+    def agregar_promocion(self, promocion: Promocion) -> bool:
+        """Agrega o reemplaza una promoción y recompila las tablas."""
+        with self._candado:
+            self.promociones[promocion.id] = promocion
+            self._compilar()
+            self.guardar_promociones()
+        print(f"Promoción '{promocion.nombre}' guardada")
+        return True
+
+    def eliminar_promocion(self, id_promocion: str) -> bool:
+        """Elimina una promoción y recompila las tablas."""
+        with self._candado:
+            if id_promocion not in self.promociones:
+                print(f"Promoción {id_promocion} no encontrada")
+                return False
+            del self.promociones[id_promocion]
+            self._compilar()
+            self.guardar_promociones()
+        return True
+
+    def mejor_promocion(self, codigo: str, cantidad: float, momento: Optional[datetime] = None) -> Optional[Tuple[Promocion, float]]:
+        """Retorna (promoción, ahorro) de mayor ahorro para una línea, o None si no aplica ninguna."""
+        producto = self.producto_controller.productos.get(codigo)
+        if not producto:
+            return None
+        momento = momento or datetime.now()
+        categoria = producto.categoria.nombre if hasattr(producto.categoria, 'nombre') else producto.categoria
+        mejor = None
+        # Solo se revisan las reglas del producto y de su categoría
+        for promocion in self._por_producto.get(codigo, ()) + self._por_categoria.get(categoria, ()):
+            ahorro = promocion.ahorro(cantidad, producto.precio, momento)
+            if ahorro > 0 and (mejor is None or ahorro > mejor[1]):
+                mejor = (promocion, ahorro)
+        return mejor
+
+    def evaluar_carrito(self, items: Dict[str, float], momento: Optional[datetime] = None) -> Dict[str, Tuple[str, float]]:
+        """
+        Evalúa las promociones de un carrito {codigo: cantidad}.
+        Retorna {codigo: (nombre de la promoción, ahorro)} para las líneas con promoción.
+        """
+        momento = momento or datetime.now()
+        resultado = {}
+        for codigo, cantidad in items.items():
+            mejor = self.mejor_promocion(codigo, cantidad, momento)
+            if mejor:
+                resultado[codigo] = (mejor[0].nombre, mejor[1])
+        return resultado
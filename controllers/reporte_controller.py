@@ -0,0 +1,208 @@
+"""Controlador para reportes pesados sobre todo el historial (opcionalmente en paralelo).
+
+Returns:
+    class: Clase ReporteController
+"""
+
+import math
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+from models.dinero import repartir
+from models.venta import Venta
+from .producto_controller import ProductoController
+from .venta_controller import VentaController
+
+
+def _agregar_columnas(meses: array, totales: array, inicios: array,
+                      codigos: array, subtotales: array) -> Dict[Tuple[int, int], int]:
+    """
+    Suma los ingresos de una partición del historial por (mes, producto), ambos como
+    números (ver _HistorialCompacto). La venta i tiene los items inicios[i]..inicios[i+1]
+    (posiciones relativas a inicios[0]). Es una función de módulo, y recibe solo arrays,
+    para que pueda ejecutarse en otro proceso recibiendo los datos de forma compacta.
+    """
+    parcial: Dict[Tuple[int, int], int] = {}
+    base = inicios[0]
+    for i, (mes, total) in enumerate(zip(meses, totales)):
+        desde, hasta = inicios[i] - base, inicios[i + 1] - base
+        # Montos enteros con el descuento de la venta ya repartido: las sumas son exactas
+        netos = repartir(total, subtotales[desde:hasta].tolist())
+        for codigo, neto in zip(codigos[desde:hasta], netos):
+            clave = (mes, codigo)
+            parcial[clave] = parcial.get(clave, 0) + neto
+    return parcial
+
+
+class _HistorialCompacto:
+    """
+    Copia del historial en columnas (array) con lo que necesitan los reportes:
+    por venta, el mes (AAAAMM), el total y dónde empiezan sus items; por item, el
+    producto (como número) y el subtotal. Una partición son rebanadas de estos
+    arrays, que se envían a otro proceso como bytes (serializar miles de objetos
+    Venta costaría más que calcular el reporte).
+    Se pone al día agregando solo las ventas nuevas del final del historial.
+    """
+
+    def __init__(self):
+        self.reiniciar(None)
+
+    def reiniciar(self, fuente: Optional[list]):
+        """Vacía las columnas; fuente es la lista de ventas que se copiará."""
+        self.fuente = fuente
+        self.meses = array('l')
+        self.totales = array('q')
+        self.inicios = array('q', [0])
+        self.codigos = array('l')
+        self.subtotales = array('q')
+        # Número asignado a cada código de producto y su inversa
+        self.numeros: Dict[str, int] = {}
+        self.lista_codigos: List[str] = []
+
+    def __len__(self):
+        return len(self.totales)
+
+    def agregar(self, ventas: List[Venta]):
+        """Agrega ventas al final de las columnas."""
+        numeros = self.numeros
+        for venta in ventas:
+            self.meses.append(venta.fecha.year * 100 + venta.fecha.month)
+            self.totales.append(venta.total)
+            for item in venta.items:
+                numero = numeros.get(item.codigo)
+                if numero is None:
+                    numero = numeros[item.codigo] = len(self.lista_codigos)
+                    self.lista_codigos.append(item.codigo)
+                self.codigos.append(numero)
+                self.subtotales.append(item.subtotal)
+            self.inicios.append(len(self.codigos))
+
+    def particion(self, inicio: int, fin: int) -> tuple:
+        """Argumentos de _agregar_columnas para las ventas inicio..fin."""
+        desde, hasta = self.inicios[inicio], self.inicios[fin]
+        return (self.meses[inicio:fin], self.totales[inicio:fin], self.inicios[inicio:fin + 1],
+                self.codigos[desde:hasta], self.subtotales[desde:hasta])
+
+
+class ReporteController:
+    """
+    Controlador que genera los reportes que recorren todo el historial.
+    Divide las ventas en particiones, las agrega y combina los resultados
+    parciales. Informa el avance mediante un callback.
+
+    Por defecto el cálculo es secuencial, en el mismo proceso. Con procesos > 1
+    las particiones se procesan con ProcessPoolExecutor; los procesos se crean
+    con 'spawn' (un intérprete nuevo, sin heredar los hilos ni los candados de la
+    aplicación, como sí haría 'fork') y reciben su partición explícitamente, en
+    columnas compactas. Aun así, con menos de 'minimo_paralelo' ventas se calcula
+    en el mismo proceso, porque crear los procesos costaría más que lo que se gana.
+    Conviene activarlo solo si benchmarks/reportes_paralelos.py muestra una
+    aceleración en la máquina donde corre el POS.
+    """
+
+    def __init__(self, venta_controller: VentaController, producto_controller: ProductoController,
+                 procesos: int = 1, minimo_paralelo: int = 20000):
+        # Controladores que proveen el historial y las categorías de los productos
+        self.venta_controller = venta_controller
+        self.producto_controller = producto_controller
+        # Número de procesos a utilizar (1 = secuencial, en el mismo proceso)
+        self.procesos = max(1, procesos)
+        # Bajo esta cantidad de ventas no conviene pagar el costo de crear procesos
+        self.minimo_paralelo = minimo_paralelo
+        # Historial en columnas, al día con la última consulta (se protege de reportes simultáneos)
+        self._compacto = _HistorialCompacto()
+        self._candado = threading.Lock()
+
+    def _categorias_por_codigo(self) -> Dict[str, str]:
+        """Mapa código de producto -> nombre de categoría."""
+        return {codigo: (p.categoria.nombre if hasattr(p.categoria, 'nombre') else str(p.categoria))
+                for codigo, p in self.producto_controller.productos.items()}
+
+    def _rangos(self, cantidad: int) -> List[Tuple[int, int]]:
+        """Divide el historial en rangos contiguos (varios por proceso para reportar avance)."""
+        tamano = max(1, math.ceil(cantidad / (self.procesos * 4)))
+        return [(i, min(i + tamano, cantidad)) for i in range(0, cantidad, tamano)]
+
+    def _particiones(self) -> List[tuple]:
+        """Pone al día el historial compacto y lo divide en particiones."""
+        ventas = self.venta_controller.ventas
+        compacto = self._compacto
+        # Al recargar el historial la lista se reemplaza: se vuelve a copiar completa
+        if compacto.fuente is not ventas:
+            compacto.reiniciar(ventas)
+        # Las ventas solo se agregan al final: se copian las que faltan
+        compacto.agregar(ventas[len(compacto):])
+        return [compacto.particion(inicio, fin) for inicio, fin in self._rangos(len(compacto))]
+
+    def _agregar(self, progreso: Optional[Callable[[int, int], None]] = None,
+                 paralelo: Optional[bool] = None) -> Dict[Tuple[str, str], int]:
+        """Calcula los ingresos por (mes, categoría) de todo el historial."""
+        with self._candado:
+            particiones = self._particiones()
+            codigos = list(self._compacto.lista_codigos)
+            cantidad = len(self._compacto)
+        if paralelo is None:
+            paralelo = self.procesos > 1 and cantidad >= self.minimo_paralelo
+
+        total = len(particiones)
+        por_producto: Dict[Tuple[int, int], int] = {}
+
+        def combinar(parcial):
+            for clave, monto in parcial.items():
+                por_producto[clave] = por_producto.get(clave, 0) + monto
+
+        if not paralelo:
+            for i, particion in enumerate(particiones, 1):
+                combinar(_agregar_columnas(*particion))
+                if progreso:
+                    progreso(i, total)
+        else:
+            # Se importan recién aquí: solo los reportes paralelos los usan y retrasan el arranque
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=self.procesos, mp_context=contexto) as ejecutor:
+                futuros = [ejecutor.submit(_agregar_columnas, *particion) for particion in particiones]
+                # Se combinan a medida que terminan para informar el avance real
+                for i, futuro in enumerate(as_completed(futuros), 1):
+                    combinar(futuro.result())
+                    if progreso:
+                        progreso(i, total)
+
+        # Los productos se agrupan por su categoría actual
+        categorias = self._categorias_por_codigo()
+        resultado: Dict[Tuple[str, str], int] = {}
+        for (mes, numero), monto in por_producto.items():
+            clave = (f"{mes // 100}-{mes % 100:02d}", categorias.get(codigos[numero], 'Sin categoría'))
+            resultado[clave] = resultado.get(clave, 0) + monto
+        return resultado
+
+    def ingresos_mensuales_por_categoria(self, progreso=None, paralelo=None) -> Dict[str, Dict[str, int]]:
+        """Retorna {mes 'YYYY-MM': {categoria: ingresos}} ordenado por mes."""
+        meses: Dict[str, Dict[str, int]] = {}
+        for (mes, categoria), monto in sorted(self._agregar(progreso, paralelo).items()):
+            meses.setdefault(mes, {})[categoria] = monto
+        return meses
+
+    def comparacion_interanual(self, progreso=None, paralelo=None) -> List[dict]:
+        """
+        Compara los ingresos de cada mes con el mismo mes del año anterior.
+        Retorna una lista de dicts con mes, ingresos, ingresos del año anterior y variación (%).
+        """
+        totales: Dict[str, int] = {}
+        for (mes, _), monto in self._agregar(progreso, paralelo).items():
+            totales[mes] = totales.get(mes, 0) + monto
+
+        filas = []
+        for mes in sorted(totales):
+            anio, num_mes = mes.split('-')
+            anterior = totales.get(f"{int(anio) - 1}-{num_mes}")
+            variacion = ((totales[mes] - anterior) / anterior * 100) if anterior else None
+            filas.append({
+                'mes': mes,
+                'ingresos': totales[mes],
+                'ingresos_anio_anterior': anterior,
+                'variacion': variacion
+            })
+        return filas
@@ -0,0 +1,127 @@
+"""Controlador para las reservas de stock de los carritos abiertos.
+
+Returns:
+    class: Clase ReservaController
+"""
+
+import heapq
+import threading
+import time
+from typing import Dict, Optional
+from .producto_controller import ProductoController
+
+class ReservaController:
+    """
+    Reserva el stock que se agrega a un carrito mientras la venta no se finaliza,
+    para que otra caja no venda lo mismo y la venta falle en el último momento.
+    El stock disponible de un producto es su stock menos las reservas activas.
+
+    Cada carrito vence si pasa 'ttl' segundos sin actividad. Los vencimientos se
+    guardan en un heap (fecha de vencimiento, carrito): expirar cuesta O(log n)
+    por carrito vencido, sin recorrer todas las reservas. Al renovar un carrito
+    su entrada anterior queda obsoleta en el heap y se descarta al salir.
+    """
+
+    def __init__(self, producto_controller: ProductoController, ttl: float = 900.0):
+        # Controlador de productos que provee el stock y sus candados
+        self.producto_controller = producto_controller
+        # Segundos sin actividad tras los cuales se liberan las reservas de un carrito
+        self.ttl = ttl
+        # Reservas por carrito: {carrito: {codigo: cantidad}}
+        self.reservas: Dict[str, Dict[str, float]] = {}
+        # Vencimiento vigente de cada carrito
+        self._vencimientos: Dict[str, float] = {}
+        # Total reservado por producto (para calcular el disponible en O(1))
+        self._reservado: Dict[str, float] = {}
+        # Heap de (vencimiento, carrito); puede contener entradas obsoletas
+        self._heap = []
+        # Protege las estructuras anteriores
+        self._candado = threading.Lock()
+
+    def _descontar_reservado(self, codigo: str, cantidad: float):
+        """Resta una reserva del total del producto (requiere el candado)."""
+        restante = self._reservado.get(codigo, 0) - cantidad
+        # Tolerancia para los productos por kg (cantidades decimales)
+        if restante > 1e-9:
+            self._reservado[codigo] = restante
+        else:
+            self._reservado.pop(codigo, None)
+
+    def _liberar_carrito(self, carrito: str):
+        """Quita todas las reservas de un carrito (requiere el candado)."""
+        for codigo, cantidad in self.reservas.pop(carrito, {}).items():
+            self._descontar_reservado(codigo, cantidad)
+        self._vencimientos.pop(carrito, None)
+
+    def _expirar(self, ahora: float):
+        """Libera los carritos vencidos (requiere el candado)."""
+        while self._heap and self._heap[0][0] <= ahora:
+            vence, carrito = heapq.heappop(self._heap)
+            # Solo cuenta si es el vencimiento vigente (no una entrada obsoleta por renovación)
+            if self._vencimientos.get(carrito) == vence:
+                self._liberar_carrito(carrito)
+        # Si las renovaciones dejaron demasiadas entradas obsoletas, se reconstruye el heap
+        if len(self._heap) > 2 * len(self._vencimientos) + 64:
+            self._heap = [(vence, carrito) for carrito, vence in self._vencimientos.items()]
+            heapq.heapify(self._heap)
+
+    def _renovar(self, carrito: str, ahora: float):
+        """Extiende el vencimiento del carrito (requiere el candado)."""
+        vence = ahora + self.ttl
+        self._vencimientos[carrito] = vence
+        heapq.heappush(self._heap, (vence, carrito))
+
+    def expirar(self):
+        """Libera las reservas de los carritos vencidos."""
+        with self._candado:
+            self._expirar(time.monotonic())
+
+    def reservado(self, codigo: str, excluir_carrito: Optional[str] = None) -> float:
+        """Cantidad reservada de un producto, opcionalmente sin contar la de un carrito."""
+        with self._candado:
+            self._expirar(time.monotonic())
+            total = self._reservado.get(codigo, 0)
+            if excluir_carrito is not None:
+                total -= self.reservas.get(excluir_carrito, {}).get(codigo, 0)
+            return total
+
+    def disponible(self, codigo: str) -> float:
+        """Stock que todavía puede agregarse a un carrito (stock menos reservas activas)."""
+        producto = self.producto_controller.productos.get(codigo)
+        if not producto:
+            return 0
+        return producto.stock - self.reservado(codigo)
+
+    def reservar(self, carrito: str, codigo: str, cantidad: float) -> bool:
+        """
+        Reserva 'cantidad' adicional de un producto para el carrito.
+        Retorna False si el producto no existe o no hay suficiente stock disponible.
+        """
+        if cantidad <= 0:
+            return False
+        # Bajo el candado del producto: ninguna venta lo descuenta mientras se verifica
+        with self.producto_controller.bloquear_productos([codigo]):
+            producto = self.producto_controller.productos.get(codigo)
+            if not producto:
+                return False
+            with self._candado:
+                ahora = time.monotonic()
+                self._expirar(ahora)
+                if producto.stock - self._reservado.get(codigo, 0) < cantidad:
+                    return False
+                items = self.reservas.setdefault(carrito, {})
+                items[codigo] = items.get(codigo, 0) + cantidad
+                self._reservado[codigo] = self._reservado.get(codigo, 0) + cantidad
+                # Cualquier actividad mantiene vivo todo el carrito
+                self._renovar(carrito, ahora)
+        return True
+
+    def liberar(self, carrito: str, codigo: Optional[str] = None):
+        """Libera las reservas de un carrito (todas, o solo las de un producto)."""
+        with self._candado:
+            if codigo is None:
+                self._liberar_carrito(carrito)
+                return
+            cantidad = self.reservas.get(carrito, {}).pop(codigo, 0)
+            if cantidad:
+                self._descontar_reservado(codigo, cantidad)
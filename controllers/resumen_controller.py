@@ -0,0 +1,206 @@
+"""Controlador para los resúmenes diarios de ventas (rollups).
+
+Returns:
+    class: Clase ResumenDiarioController
+"""
+
+import os
+import json
+import threading
+from datetime import date, timedelta
+from typing import Dict
+from models.venta import Venta
+from .venta_controller import VentaController
+from .esquema import VERSION_ESQUEMA
+
+class ResumenDiarioController:
+    """
+    Mantiene una tabla persistida de ventas agregadas por día y producto
+    (unidades, ingresos y número de transacciones).
+    Se actualiza de forma incremental con cada venta confirmada y puede
+    reconstruirse desde el historial completo, de modo que los reportes por
+    rango de fechas (incluido el día en curso) no necesitan recorrer las ventas.
+
+    Las ventas solo actualizan la memoria y marcan el resumen como pendiente; el
+    archivo se escribe a lo sumo una vez cada 'intervalo_guardado' segundos en un
+    hilo aparte, y al cerrar (guardar_pendiente). Si el programa termina antes, el
+    archivo queda atrasado pero no se pierde nada: al cargarlo, sincronizar()
+    incorpora las ventas con ID mayor a 'ultimo_id'.
+    """
+
+    def __init__(self, venta_controller: VentaController, archivo_resumen: str = 'data/resumen_diario.json',
+                 intervalo_guardado: float = 5.0):
+        # Ruta del archivo JSON donde se persiste el resumen
+        self.archivo_resumen = archivo_resumen
+        # Controlador de ventas que provee el historial y notifica nuevas ventas
+        self.venta_controller = venta_controller
+        # Estructura: {'YYYY-MM-DD': {codigo: {'unidades', 'ingresos', 'transacciones'}}}
+        self.dias: Dict[str, Dict[str, dict]] = {}
+        # ID de la última venta incorporada al resumen
+        self.ultimo_id = 0
+        # Protege las celdas: las ventas las actualizan mientras otros hilos consultan rangos
+        self._candado = threading.RLock()
+        # Segundos entre escrituras del archivo mientras llegan ventas
+        self.intervalo_guardado = intervalo_guardado
+        # Hay cambios en memoria sin escribir; _temporizador es la escritura ya programada
+        self._pendiente = False
+        self._temporizador = None
+        # Serializa las escrituras del archivo (temporizador, cierre, reconstrucción)
+        self._candado_escritura = threading.Lock()
+        # Carga inicial y suscripción a nuevas ventas. Si el historial se está cargando
+        # en segundo plano, el resumen se carga al recibir 'ventas_recargadas'
+        # (antes se reconstruiría desde un historial vacío)
+        if self.venta_controller.historial_cargado():
+            self.cargar_resumen()
+        self.venta_controller.suscribir(self._on_evento_venta)
+
+    def cargar_resumen(self):
+        """Carga el resumen desde JSON y lo pone al día con las ventas que falten."""
+        if os.path.exists(self.archivo_resumen):
+            try:
+                with open(self.archivo_resumen, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
+                with self._candado:
+                    self.dias = datos.get('dias', {})
+                    self.ultimo_id = datos.get('ultimo_id', 0)
+                print(f"Resumen diario cargado: {len(self.dias)} días")
+            except Exception as e:
+                print(f"Error al cargar resumen diario: {e}")
+                self.reconstruir()
+                return
+            # Un resumen de otro esquema (ej. ingresos en float) se rehace desde el historial
+            if datos.get('version_esquema', 1) != VERSION_ESQUEMA:
+                print(f"Resumen diario con esquema antiguo. Reconstruyendo al esquema v{VERSION_ESQUEMA}.")
+                self.reconstruir()
+                return
+            self.sincronizar()
+        else:
+            print("No se encontró resumen diario. Reconstruyendo desde el historial.")
+            self.reconstruir()
+
+    def guardar_resumen(self):
+        """Escribe el resumen actual en el archivo JSON."""
+        with self._candado_escritura:
+            try:
+                # Asegurar que el directorio existe
+                os.makedirs(os.path.dirname(self.archivo_resumen), exist_ok=True)
+
+                with self._candado:
+                    texto = json.dumps({'version_esquema': VERSION_ESQUEMA, 'ultimo_id': self.ultimo_id,
+                                        'dias': self.dias}, ensure_ascii=False)
+                    self._pendiente = False
+                with open(self.archivo_resumen, 'w', encoding='utf-8') as f:
+                    f.write(texto)
+            except Exception as e:
+                print(f"Error al guardar resumen diario: {e}")
+
+    def guardar_pendiente(self):
+        """Escribe el resumen solo si tiene ventas sin guardar (ej. al cerrar la aplicación)."""
+        with self._candado:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+            if not self._pendiente:
+                return
+        self.guardar_resumen()
+
+    def _programar_guardado(self):
+        """Marca el resumen como pendiente y programa su escritura si no hay una programada."""
+        with self._candado:
+            self._pendiente = True
+            if self._temporizador is not None:
+                return
+            self._temporizador = threading.Timer(self.intervalo_guardado, self._guardar_programado)
+            # No retiene la salida del programa: lo que no se escriba se recupera con sincronizar()
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def _guardar_programado(self):
+        """Escritura periódica (hilo del temporizador)."""
+        with self._candado:
+            self._temporizador = None
+        self.guardar_resumen()
+
+    def reconstruir(self):
+        """Rehace el resumen completo recorriendo todo el historial de ventas."""
+        with self._candado:
+            self.dias = {}
+            self.ultimo_id = 0
+            for venta in self.venta_controller.ventas:
+                self._acumular_venta(venta)
+        self.guardar_resumen()
+
+    def sincronizar(self):
+        """
+        Incorpora las ventas con ID mayor al último resumido (por ejemplo,
+        si el archivo de resumen quedó atrasado). Recorre el historial desde
+        el final, por lo que solo toca las ventas faltantes.
+        """
+        pendientes = []
+        for venta in reversed(self.venta_controller.ventas):
+            if isinstance(venta.id, int) and venta.id <= self.ultimo_id:
+                break
+            pendientes.append(venta)
+
+        if pendientes:
+            with self._candado:
+                for venta in reversed(pendientes):
+                    self._acumular_venta(venta)
+            self.guardar_resumen()
+
+    def _on_evento_venta(self, evento: str, datos):
+        """Suma al resumen las ventas recién confirmadas (o lo recarga si cambió el historial)."""
+        if evento == 'ventas_recargadas':
+            self.cargar_resumen()
+            return
+        if evento != 'ventas_agregadas':
+            return
+        with self._candado:
+            for venta in datos:
+                self._acumular_venta(venta)
+        # La venta no espera la escritura del archivo completo
+        self._programar_guardado()
+
+    def _acumular_venta(self, venta: Venta):
+        """Suma una venta a las celdas (día, producto) correspondientes (requiere el candado)."""
+        dia = venta.fecha.date().isoformat()
+        resumen_dia = self.dias.setdefault(dia, {})
+        # Ingreso neto de cada item, con el descuento global de la venta ya repartido
+        for item, neto in zip(venta.items, venta.netos()):
+            celda = resumen_dia.setdefault(item.codigo, {'unidades': 0, 'ingresos': 0, 'transacciones': 0})
+            celda['unidades'] += item.cantidad
+            celda['ingresos'] += neto
+            celda['transacciones'] += 1
+
+        if isinstance(venta.id, int) and venta.id > self.ultimo_id:
+            self.ultimo_id = venta.id
+
+    def reporte_rango(self, desde: date, hasta: date) -> Dict[str, dict]:
+        """
+        Retorna las ventas agregadas por producto entre dos fechas (inclusive).
+        Todos los días, incluido el de hoy, se leen del resumen: cada venta confirmada
+        se suma a su celda al notificarse, sin importar en qué orden llegue su fecha
+        (ej. un lote importado con fechas pasadas queda al final del historial).
+        """
+        resultado: Dict[str, dict] = {}
+        # Las fechas ISO se comparan como texto
+        desde_str = desde.isoformat()
+        hasta_str = hasta.isoformat()
+        with self._candado:
+            for dia, celdas in self.dias.items():
+                if desde_str <= dia <= hasta_str:
+                    for codigo, celda in celdas.items():
+                        acumulado = resultado.setdefault(codigo, {'unidades': 0, 'ingresos': 0, 'transacciones': 0})
+                        acumulado['unidades'] += celda['unidades']
+                        acumulado['ingresos'] += celda['ingresos']
+                        acumulado['transacciones'] += celda['transacciones']
+        return resultado
+
+    def ingresos_rango(self, desde: date, hasta: date) -> int:
+        """Retorna los ingresos totales entre dos fechas (inclusive)."""
+        return sum(celda['ingresos'] for celda in self.reporte_rango(desde, hasta).values())
+
+    def ingresos_ultimos_dias(self, dias: int = 7) -> int:
+        """Retorna los ingresos de los últimos N días, incluyendo el día de hoy."""
+        hoy = date.today()
+        return self.ingresos_rango(hoy - timedelta(days=dias - 1), hoy)
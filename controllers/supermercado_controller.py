@@ -4,9 +4,18 @@ Returns:
     class: Clase SupermercadoController
 """
 
+import threading
 from .producto_controller import ProductoController
 from .usuario_controller import UsuarioController
 from .venta_controller import VentaController
+from .reserva_controller import ReservaController
+from .carrito_controller import CarritoController
+from .promocion_controller import PromocionController
+from .canasta_controller import CanastaController
+from .resumen_controller import ResumenDiarioController
+from .reporte_controller import ReporteController
+from .clasificacion_abc_controller import ClasificacionABCController
+from .inventario_historico_controller import InventarioHistoricoController
 
 class SupermercadoController:
     """
@@ -17,14 +26,47 @@ class SupermercadoController:
     
     def __init__(self, archivo_productos: str = 'data/productos.json', 
                  archivo_ventas: str = 'data/ventas.json',
-                 archivo_usuarios: str = 'data/usuarios.json'):
+                 archivo_usuarios: str = 'data/usuarios.json',
+                 archivo_resumen: str = 'data/resumen_diario.json',
+                 archivo_snapshots: str = 'data/inventario_snapshots.jsonl',
+                 archivo_deltas: str = 'data/inventario_deltas.jsonl',
+                 archivo_promociones: str = 'data/promociones.json',
+                 historial_en_segundo_plano: bool = False):
+        """
+        Con historial_en_segundo_plano=True el controlador queda listo con los
+        productos y usuarios cargados, y el historial de ventas se carga en otro
+        hilo (ver historial_cargado / esperar_historial). Las ventas que se
+        registren mientras tanto esperan a que termine.
+        """
         
         # Inicialización de sub-controladores
         # Cada controlador maneja un aspecto específico del dominio
         self.producto_controller = ProductoController(archivo_productos)
         self.usuario_controller = UsuarioController(archivo_usuarios)
-        # El controlador de ventas necesita acceso a productos para validar stock
-        self.venta_controller = VentaController(self.producto_controller, archivo_ventas)
+        # Reservas de stock de los carritos abiertos (con vencimiento)
+        self.reserva_controller = ReservaController(self.producto_controller)
+        # Promociones compiladas en tablas por producto y categoría
+        self.promocion_controller = PromocionController(self.producto_controller, archivo_promociones)
+        # El controlador de ventas necesita acceso a productos y reservas para validar stock
+        self.venta_controller = VentaController(self.producto_controller, archivo_ventas,
+                                                self.reserva_controller, self.promocion_controller,
+                                                cargar=not historial_en_segundo_plano)
+        # Análisis de canasta: se mantiene actualizado escuchando las nuevas ventas
+        self.canasta_controller = CanastaController(self.venta_controller)
+        # Resumen diario persistido para reportes por rango sin recorrer todo el historial
+        self.resumen_controller = ResumenDiarioController(self.venta_controller, archivo_resumen)
+        # Reportes pesados calculados sobre particiones del historial (secuencial por defecto)
+        self.reporte_controller = ReporteController(self.venta_controller, self.producto_controller)
+        # Clasificación ABC en caché, invalidada solo cuando las ventas nuevas lo justifican
+        self.abc_controller = ClasificacionABCController(self.resumen_controller, self.producto_controller)
+        # Snapshots y deltas del inventario para consultar su valor en fechas pasadas
+        self.historico_controller = InventarioHistoricoController(self.producto_controller, archivo_snapshots, archivo_deltas)
+
+        # Carga diferida del historial: los análisis que dependen de él se ponen
+        # al día con el evento 'ventas_recargadas' al terminar
+        if historial_en_segundo_plano:
+            threading.Thread(target=self.venta_controller.cargar_ventas, daemon=True,
+                             name='carga-historial').start()
 
     # Delegación de propiedades para mantener compatibilidad con la vista
     # Esto permite que la GUI acceda a 'controller.productos' directamente
@@ -43,18 +85,59 @@ class SupermercadoController:
         """Acceso directo al diccionario de usuarios."""
         return self.usuario_controller.usuarios
 
+    def historial_cargado(self):
+        """Indica si el historial de ventas ya está cargado."""
+        return self.venta_controller.historial_cargado()
+
+    def esperar_historial(self, timeout=None):
+        """Espera a que termine la carga del historial de ventas."""
+        return self.venta_controller.esperar_historial(timeout)
+
+    # Suscripción a cambios (la vista actualiza sus tablas fila a fila)
+    def suscribir_cambios(self, callback):
+        """
+        Registra callback(evento, datos) para los cambios de productos
+        (producto_agregado, producto_actualizado, stock_actualizado, producto_eliminado,
+        productos_recargados) y de ventas (ventas_agregadas, ventas_recargadas).
+        Puede invocarse desde cualquier hilo que modifique los datos.
+        """
+        self.producto_controller.suscribir(callback)
+        self.venta_controller.suscribir(callback)
+
+    def desuscribir_cambios(self, callback):
+        """Deja de notificar los cambios a un callback registrado con suscribir_cambios."""
+        self.producto_controller.desuscribir(callback)
+        self.venta_controller.desuscribir(callback)
+
     # Delegación de métodos de gestión de datos
-    def cargar_datos(self):
-        """Recarga todos los datos desde los archivos JSON."""
-        self.producto_controller.cargar_productos()
-        self.usuario_controller.cargar_usuarios()
-        self.venta_controller.cargar_ventas()
+    def cargar_datos(self, progreso=None):
+        """
+        Recarga todos los datos desde los archivos JSON.
+        Si se indica, progreso(fraccion, texto) se llama antes de cada paso.
+        """
+        pasos = [
+            ("Cargando productos...", self.producto_controller.cargar_productos),
+            ("Cargando usuarios...", self.usuario_controller.cargar_usuarios),
+            # Al recargar el historial, canasta, resumen diario y clasificación ABC
+            # se actualizan con el evento 'ventas_recargadas'
+            ("Cargando ventas...", self.venta_controller.cargar_ventas),
+            ("Cargando promociones...", self.promocion_controller.cargar_promociones),
+        ]
+        for i, (texto, paso) in enumerate(pasos):
+            if progreso:
+                progreso(i / len(pasos), texto)
+            paso()
 
     def guardar_datos(self):
         """Guarda todos los datos actuales en los archivos JSON."""
         self.producto_controller.guardar_productos()
         self.usuario_controller.guardar_usuarios()
         self.venta_controller.guardar_ventas()
+        self.resumen_controller.guardar_pendiente()
+
+    def cerrar(self):
+        """Escribe lo que quedó pendiente en memoria (resumen diario) antes de salir."""
+        self.resumen_controller.guardar_pendiente()
 
     # Métodos de Producto (Delegación)
     # Estos métodos redirigen las llamadas al controlador de productos
@@ -67,6 +150,12 @@ class SupermercadoController:
     def buscar_producto(self, termino):
         return self.producto_controller.buscar_producto(termino)
 
+    def codigos_ordenados(self, termino=''):
+        return self.producto_controller.codigos_ordenados(termino)
+
+    def coincide_busqueda(self, producto, termino):
+        return self.producto_controller.coincide(producto, termino)
+
     def obtener_productos_disponibles(self):
         return self.producto_controller.obtener_productos_disponibles()
 
@@ -81,6 +170,14 @@ class SupermercadoController:
         if hasattr(self.producto_controller, 'reiniciar_productos'):
             return self.producto_controller.reiniciar_productos()
 
+    def obtener_clasificacion_abc(self):
+        """Retorna {codigo: 'A' | 'B' | 'C'} usando la clasificación en caché."""
+        return self.abc_controller.obtener_clasificacion()
+
+    def valor_inventario_en_fecha(self, fecha):
+        """Valor del inventario en una fecha pasada (None si no hay historial)."""
+        return self.historico_controller.valor_en_fecha(fecha)
+
     def exportar_inventario_csv(self, ruta):
         return self.producto_controller.exportar_a_csv(ruta)
 
@@ -95,8 +192,61 @@ class SupermercadoController:
         return self.usuario_controller.cambiar_password(username, old_pass, new_pass)
 
     # Métodos de Venta (Delegación)
-    def realizar_venta(self, items, descuento=0.0):
-        return self.venta_controller.realizar_venta(items, descuento)
+    def realizar_venta(self, items, descuento=0.0, carrito=None):
+        return self.venta_controller.realizar_venta(items, descuento, carrito)
+
+    def crear_carrito(self, id_carrito):
+        """Retorna un carrito nuevo (CarritoController) cuyas reservas de stock usan id_carrito."""
+        return CarritoController(id_carrito, self.producto_controller, self.reserva_controller,
+                                 self.promocion_controller, self.venta_controller)
+
+    def reservar_stock(self, carrito, codigo, cantidad):
+        """Reserva stock para un carrito abierto. Retorna False si no hay disponible."""
+        return self.reserva_controller.reservar(carrito, codigo, cantidad)
+
+    def liberar_reservas(self, carrito, codigo=None):
+        return self.reserva_controller.liberar(carrito, codigo)
+
+    def stock_disponible(self, codigo):
+        """Stock de un producto que no está reservado por ningún carrito."""
+        return self.reserva_controller.disponible(codigo)
+
+    def consultar_ventas(self, desde=None, hasta=None, total_minimo=None, codigo=None, cursor=None, limite=50):
+        """Página del historial de ventas con filtros (ver VentaController.consultar_ventas)."""
+        return self.venta_controller.consultar_ventas(desde, hasta, total_minimo, codigo, cursor, limite)
+
+    def obtener_venta(self, id_venta):
+        return self.venta_controller.obtener_venta(id_venta)
+
+    def realizar_ventas_lote(self, lote):
+        return self.venta_controller.realizar_ventas_lote(lote)
+
+    def evaluar_promociones(self, items):
+        """Retorna {codigo: (promoción, ahorro)} para las líneas del carrito {codigo: cantidad}."""
+        return self.promocion_controller.evaluar_carrito(items)
+
+    def agregar_promocion(self, promocion):
+        return self.promocion_controller.agregar_promocion(promocion)
+
+    def eliminar_promocion(self, id_promocion):
+        return self.promocion_controller.eliminar_promocion(id_promocion)
+
+    def obtener_sugerencias(self, codigos):
+        """Retorna productos sugeridos (venta cruzada) para los códigos del carrito."""
+        return self.canasta_controller.obtener_sugerencias(codigos)
+
+    def reporte_ventas_rango(self, desde, hasta):
+        """Ventas agregadas por producto entre dos fechas, leídas desde el resumen diario."""
+        return self.resumen_controller.reporte_rango(desde, hasta)
+
+    def ingresos_ultimos_dias(self, dias=7):
+        return self.resumen_controller.ingresos_ultimos_dias(dias)
+
+    def ingresos_mensuales_por_categoria(self, progreso=None):
+        return self.reporte_controller.ingresos_mensuales_por_categoria(progreso)
+
+    def comparacion_interanual(self, progreso=None):
+        return self.reporte_controller.comparacion_interanual(progreso)
 
     def obtener_estadisticas(self):
         # Si el controlador de ventas tiene estadísticas, las retorna
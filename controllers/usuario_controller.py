@@ -5,20 +5,53 @@ Returns:
 """
 
 import os
-import json
+import hmac
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Dict, Optional
 from models.usuario import Usuario
+from models import credencial
+from .bloqueo_archivo import bloqueo_archivo, escribir_json_atomico, firma_archivo
+from .esquema import VERSION_ESQUEMA, leer_registros, con_version
 
 class UsuarioController:
     """
     Controlador encargado de la gestión de usuarios (autenticación y registro).
+    Los registros y cambios de contraseña releen el archivo bajo un bloqueo entre
+    procesos, para no pisar lo que otra instancia del POS haya guardado.
+
+    Las contraseñas se guardan como hash con sal (ver models.credencial); 'costo'
+    regula el tiempo de cada verificación. Como verificar es lento a propósito,
+    autenticar_usuario debe llamarse fuera del hilo de la interfaz, y las
+    verificaciones correctas se recuerdan en una caché en memoria (sin guardar la
+    contraseña) para no repetir el cálculo, por ejemplo al cambiar la contraseña.
+    Las contraseñas en texto plano de archivos antiguos se convierten a hash en el
+    primer inicio de sesión correcto de cada usuario.
     """
-    
-    def __init__(self, archivo_usuarios: str = 'data/usuarios.json'):
+    # Cantidad máxima de verificaciones recordadas
+    TAMANO_CACHE = 256
+
+    def __init__(self, archivo_usuarios: str = 'data/usuarios.json', costo: int = credencial.COSTO):
         # Ruta del archivo donde se almacenan los usuarios
         self.archivo_usuarios = archivo_usuarios
+        # Costo del hash de contraseñas (log2 del factor de trabajo)
+        self.costo = costo
         # Diccionario en memoria para acceso rápido por username
         self.usuarios: Dict[str, Usuario] = {}
+        # Evita que dos registros simultáneos usen el mismo nombre de usuario
+        self._candado = threading.RLock()
+        # Firma del archivo tras la última lectura/escritura propia (detecta cambios externos)
+        self._firma = None
+        # Caché LRU de verificaciones correctas. La clave es un HMAC (con una clave aleatoria
+        # de este proceso) del usuario, la contraseña y el hash guardado: no permite recuperar
+        # la contraseña y deja de coincidir sola cuando el hash cambia
+        self._verificados: OrderedDict = OrderedDict()
+        self._clave_cache = os.urandom(32)
+        self._candado_cache = threading.Lock()
+        # Hash de referencia para usuarios inexistentes (se calcula la primera vez)
+        self._hash_simulado = None
         # Carga inicial
         self.cargar_usuarios()
 
@@ -26,11 +59,14 @@ class UsuarioController:
         """Carga la base de datos de usuarios desde JSON."""
         if os.path.exists(self.archivo_usuarios):
             try:
-                with open(self.archivo_usuarios, 'r', encoding='utf-8') as f:
-                    usuarios_data = json.load(f)
+                usuarios_data, version = leer_registros(self.archivo_usuarios, 'usuarios')
                 # Convierte los datos JSON a objetos Usuario
                 self.usuarios = {u['username']: Usuario.from_dict(u) for u in usuarios_data}
+                self._firma = firma_archivo(self.archivo_usuarios)
                 print(f"Usuarios cargados: {len(self.usuarios)}")
+                if version < VERSION_ESQUEMA:
+                    print(f"Migrando {self.archivo_usuarios} al esquema v{VERSION_ESQUEMA}")
+                    self.guardar_usuarios()
             except Exception as e:
                 print(f"Error al cargar usuarios: {e}")
                 # Si falla, asegura que al menos exista el admin
@@ -42,21 +78,40 @@ class UsuarioController:
     def guardar_usuarios(self):
         """Persiste los usuarios en el archivo JSON."""
         try:
-            # Asegurar que el directorio existe
-            os.makedirs(os.path.dirname(self.archivo_usuarios), exist_ok=True)
-            
-            # Serializa todos los usuarios
-            usuarios_list = [u.to_dict() for u in self.usuarios.values()]
-            with open(self.archivo_usuarios, 'w', encoding='utf-8') as f:
-                json.dump(usuarios_list, f, indent=2, ensure_ascii=False)
+            with self._transaccion():
+                self._escribir_usuarios()
         except Exception as e:
             print(f"Error al guardar usuarios: {e}")
 
+    def _escribir_usuarios(self):
+        """Escribe todos los usuarios de forma atómica (requiere la transacción)."""
+        # Serializa todos los usuarios
+        usuarios_list = [u.to_dict() for u in self.usuarios.values()]
+        escribir_json_atomico(self.archivo_usuarios, con_version('usuarios', usuarios_list), indent=2, ensure_ascii=False)
+        self._firma = firma_archivo(self.archivo_usuarios)
+
+    @contextmanager
+    def _transaccion(self):
+        """Bloquea el archivo (hilos y procesos) e incorpora primero los cambios de otras instancias."""
+        with self._candado, bloqueo_archivo(self.archivo_usuarios):
+            firma = firma_archivo(self.archivo_usuarios)
+            if firma is not None and firma != self._firma:
+                for datos in leer_registros(self.archivo_usuarios, 'usuarios')[0]:
+                    usuario = self.usuarios.get(datos['username'])
+                    if usuario:
+                        # Se actualiza en el lugar: la sesión abierta conserva el mismo objeto
+                        usuario.password = datos['password']
+                        usuario.role = datos.get('role', usuario.role)
+                    else:
+                        self.usuarios[datos['username']] = Usuario.from_dict(datos)
+                self._firma = firma
+            yield
+
     def _crear_usuarios_ejemplo(self):
         """Genera un usuario administrador por defecto si no existe."""
         if "admin" not in self.usuarios:
             # Crea un superusuario por defecto para el primer acceso
-            admin = Usuario("admin", "admin123", "admin")
+            admin = Usuario("admin", credencial.generar("admin123", self.costo), "admin")
             self.usuarios[admin.username] = admin
             self.guardar_usuarios()
             print("Usuario admin creado (user: admin, pass: admin123)")
@@ -73,33 +128,95 @@ class UsuarioController:
         if set(username) == {'-'}:
              raise ValueError("El usuario no puede ser solo guiones.")
 
-        # Verifica duplicados
-        if username in self.usuarios:
+        # El hash se calcula antes de tomar el bloqueo del archivo (es lento)
+        hash_password = credencial.generar(password, self.costo)
+        with self._transaccion():
+            # Verifica duplicados (incluidos los registrados en otras instancias)
+            if username in self.usuarios:
+                return False
+            
+            # Crea y guarda el nuevo usuario
+            nuevo_usuario = Usuario(username, hash_password, role)
+            self.usuarios[username] = nuevo_usuario
+            self._escribir_usuarios()
+        return True
+
+    def _clave_verificacion(self, username: str, password: str, almacenado: str) -> bytes:
+        """Clave de la caché para una verificación (HMAC, no contiene la contraseña)."""
+        mensaje = '\0'.join((username, password, almacenado)).encode('utf-8')
+        return hmac.new(self._clave_cache, mensaje, hashlib.sha256).digest()
+
+    def _recordar(self, clave: bytes):
+        """Guarda una verificación correcta en la caché LRU."""
+        with self._candado_cache:
+            self._verificados[clave] = True
+            self._verificados.move_to_end(clave)
+            if len(self._verificados) > self.TAMANO_CACHE:
+                self._verificados.popitem(last=False)
+
+    def _verificar(self, usuario: Usuario, password: str) -> bool:
+        """Compara la contraseña con la guardada, usando la caché si ya se verificó antes."""
+        almacenado = usuario.password
+        clave = self._clave_verificacion(usuario.username, password, almacenado)
+        with self._candado_cache:
+            if clave in self._verificados:
+                self._verificados.move_to_end(clave)
+                return True
+        if not credencial.verificar(password, almacenado):
             return False
-        
-        # Crea y guarda el nuevo usuario
-        nuevo_usuario = Usuario(username, password, role)
-        self.usuarios[username] = nuevo_usuario
-        self.guardar_usuarios()
+        self._recordar(clave)
         return True
 
     def autenticar_usuario(self, username, password) -> Optional[Usuario]:
         """
         Valida las credenciales de un usuario.
         Retorna el objeto Usuario si es correcto, None en caso contrario.
+        Puede tardar cientos de milisegundos: no llamar desde el hilo de la interfaz.
         """
         # Busca el usuario
         usuario = self.usuarios.get(username)
-        # Verifica si existe y si la contraseña coincide
-        if usuario and usuario.password == password:
-            return usuario
-        return None
+        if not usuario:
+            # Igual se calcula un hash, para no delatar por el tiempo de respuesta
+            # que el usuario no existe
+            if self._hash_simulado is None:
+                self._hash_simulado = credencial.generar('', self.costo)
+            credencial.verificar(password, self._hash_simulado)
+            return None
+        # Verifica si la contraseña coincide
+        almacenado = usuario.password
+        if not self._verificar(usuario, password):
+            return None
+        # Texto plano antiguo o costo distinto al configurado: se guarda un hash nuevo
+        if credencial.requiere_actualizar(almacenado, self.costo):
+            self._actualizar_hash(usuario, password, almacenado)
+        return usuario
+
+    def _actualizar_hash(self, usuario: Usuario, password: str, anterior: str):
+        """Reemplaza la contraseña guardada por un hash nuevo (si nadie la cambió entretanto)."""
+        nuevo = credencial.generar(password, self.costo)
+        try:
+            with self._transaccion():
+                if usuario.password != anterior:
+                    return
+                usuario.password = nuevo
+                self._escribir_usuarios()
+            self._recordar(self._clave_verificacion(usuario.username, password, nuevo))
+            print(f"Contraseña de '{usuario.username}' actualizada a {credencial.ALGORITMO}")
+        except Exception as e:
+            print(f"Error al actualizar la contraseña de '{usuario.username}': {e}")
 
     def cambiar_password(self, username, old_pass, new_pass) -> bool:
-        """Cambia la contraseña de un usuario."""
+        """Cambia la contraseña de un usuario (también es lento: fuera del hilo de la interfaz)."""
         usuario = self.usuarios.get(username)
-        if usuario and usuario.password == old_pass:
-            usuario.password = new_pass
-            self.guardar_usuarios()
-            return True
-        return False
+        if not usuario or not self._verificar(usuario, old_pass):
+            return False
+        anterior = usuario.password
+        nuevo = credencial.generar(new_pass, self.costo)
+        with self._transaccion():
+            # Se rechaza si la contraseña cambió en otra instancia mientras se calculaba el hash
+            if usuario.password != anterior:
+                return False
+            usuario.password = nuevo
+            self._escribir_usuarios()
+        self._recordar(self._clave_verificacion(username, new_pass, nuevo))
+        return True
@@ -5,70 +5,230 @@ Returns:
 """
 
 import os
-import json
-from typing import List, Optional
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional
 from models.venta import Venta
+from models.dinero import formatear
 from .producto_controller import ProductoController
+from .reserva_controller import ReservaController
+from .promocion_controller import PromocionController
+from .observable import Observable
+from .indice_ventas import IndiceVentas
+from .bloqueo_archivo import bloqueo_archivo, escribir_json_atomico, firma_archivo
+from .esquema import VERSION_ESQUEMA, leer_registros, con_version
 
-class VentaController:
+class VentaController(Observable):
     """
     Controlador encargado de procesar las ventas y generar reportes.
     Mantiene el historial de transacciones.
+    Notifica el evento 'ventas_agregadas' (lista de ventas) a sus observadores, y
+    'ventas_recargadas' (historial completo) cada vez que el historial se carga.
+    Con cargar=False se crea sin historial para cargarlo luego (ej. en otro hilo con
+    cargar_ventas); mientras tanto las ventas nuevas esperan a que la carga termine.
+    Admite varias cajas (hilos) usando el mismo controlador: el stock se valida y
+    descuenta bajo los candados de los productos involucrados.
+    También admite varias instancias del POS (procesos) sobre el mismo archivo:
+    antes de agregar ventas se incorporan las guardadas por otras instancias y
+    los IDs se asignan bajo un bloqueo de archivo, así ninguna venta se pierde.
+    El historial se consulta por páginas con consultar_ventas (ver IndiceVentas).
     """
     
-    def __init__(self, producto_controller: ProductoController, archivo_ventas: str = 'data/ventas.json'):
+    def __init__(self, producto_controller: ProductoController, archivo_ventas: str = 'data/ventas.json',
+                 reserva_controller: Optional[ReservaController] = None,
+                 promocion_controller: Optional[PromocionController] = None, cargar: bool = True):
+        # Inicializa la lista de observadores
+        Observable.__init__(self)
         # Ruta del archivo de persistencia de ventas
         self.archivo_ventas = archivo_ventas
         # Inyección de dependencia: Necesitamos el controlador de productos para validar y descontar stock
         self.producto_controller = producto_controller 
-        # Lista en memoria para almacenar el historial de ventas
-        self.ventas: List[dict] = []
+        # Reservas de los carritos abiertos: su stock no está disponible para otras ventas
+        self.reserva_controller = reserva_controller
+        # Motor de promociones que se aplica a cada línea de la venta
+        self.promocion_controller = promocion_controller
+        # Historial de ventas en memoria (objetos Venta compactos; dict solo al serializar)
+        self.ventas: List[Venta] = []
+        # Serializa entre hilos la asignación de IDs, el agregado al historial y su escritura
+        self._candado_archivo = threading.Lock()
+        # ID más alto del historial (evita recorrer todas las ventas para el siguiente)
+        self._max_id = 0
+        # Índice para las consultas paginadas; se modifica junto con la lista de ventas
+        self._indice = IndiceVentas()
+        # Protege la lista de ventas y el índice mientras se agregan ventas o se consulta
+        # (se mantiene solo en memoria, no mientras se escribe el archivo)
+        self._candado_indice = threading.Lock()
+        # Firma del archivo tras la última lectura/escritura propia (detecta cambios externos)
+        self._firma = None
+        # Se activa al terminar la primera carga del historial (los IDs dependen de él)
+        self._cargado = threading.Event()
         # Carga inicial
-        self.cargar_ventas()
+        if cargar:
+            self.cargar_ventas()
+
+    def historial_cargado(self) -> bool:
+        """Indica si el historial ya se cargó (siempre, salvo si se creó con cargar=False)."""
+        return self._cargado.is_set()
+
+    def esperar_historial(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que termine la carga del historial. Retorna False si se agotó el tiempo."""
+        return self._cargado.wait(timeout)
 
     def cargar_ventas(self):
-        """Carga el historial de ventas desde el archivo JSON."""
+        """
+        Carga el historial de ventas desde el archivo JSON.
+        Un archivo en el esquema actual usa la vía rápida; uno antiguo se migra una vez.
+        Al terminar notifica 'ventas_recargadas' con el historial completo.
+        """
         if os.path.exists(self.archivo_ventas):
+            migrar = False
             try:
-                with open(self.archivo_ventas, 'r', encoding='utf-8') as f:
-                    self.ventas = json.load(f)
-                print(f"Ventas cargadas: {len(self.ventas)}")
+                ventas_data, version = leer_registros(self.archivo_ventas, 'ventas')
+                migrar = version < VERSION_ESQUEMA
+                crear = Venta.from_dict if migrar else Venta.desde_registro
+                ventas = [crear(v) for v in ventas_data]
+                firma = firma_archivo(self.archivo_ventas)
+                print(f"Ventas cargadas: {len(ventas)}")
             except Exception as e:
                 print(f"Error al cargar ventas: {e}")
-                self.ventas = []
+                ventas, firma = [], None
+            # El índice se arma antes de tomar los candados (las consultas siguen con el anterior)
+            indice = IndiceVentas(ventas)
+            with self._candado_archivo:
+                with self._candado_indice:
+                    self.ventas = ventas
+                    self._indice = indice
+                self._firma = firma
+                self._max_id = max((v.id for v in self.ventas if isinstance(v.id, int)), default=0)
+            self._cargado.set()
+            if migrar:
+                print(f"Migrando {self.archivo_ventas} al esquema v{VERSION_ESQUEMA}")
+                self.guardar_ventas()
         else:
             print("No se encontró archivo de ventas. Iniciando sin ventas.")
-            self.ventas = []
+            with self._candado_indice:
+                self.ventas = []
+                self._indice = IndiceVentas()
+            self._cargado.set()
             self.guardar_ventas()
+        self._notificar('ventas_recargadas', self.ventas)
 
     def guardar_ventas(self):
         """Guarda el historial de ventas actualizado en el archivo JSON."""
+        # Sin el historial cargado se escribiría un archivo incompleto
+        self._cargado.wait()
         try:
-            # Asegurar que el directorio existe
-            os.makedirs(os.path.dirname(self.archivo_ventas), exist_ok=True)
-            
-            with open(self.archivo_ventas, 'w', encoding='utf-8') as f:
-                json.dump(self.ventas, f, indent=2, ensure_ascii=False)
+            with self._candado_archivo, bloqueo_archivo(self.archivo_ventas):
+                externas = self._sincronizar_desde_disco()
+                self._escribir_ventas()
+            if externas:
+                self._notificar('ventas_agregadas', externas)
         except Exception as e:
             print(f"Error al guardar ventas: {e}")
 
-    def obtener_siguiente_id(self) -> int:
+    def _escribir_ventas(self):
+        """Escribe el historial de forma atómica (requiere los bloqueos del archivo)."""
+        escribir_json_atomico(self.archivo_ventas, con_version('ventas', [v.to_dict() for v in self.ventas]),
+                              indent=2, ensure_ascii=False)
+        self._firma = firma_archivo(self.archivo_ventas)
+
+    def _sincronizar_desde_disco(self) -> List[Venta]:
         """
-        Genera un ID autoincremental para la próxima venta.
-        Busca el ID más alto existente y le suma 1.
+        Incorpora las ventas que otras instancias guardaron desde la última lectura.
+        Los IDs se asignan en orden creciente bajo el bloqueo del archivo, así que
+        las ventas nuevas son las que tienen un ID mayor al máximo conocido.
+        Retorna las ventas incorporadas.
         """
-        if not self.ventas:
-            return 1
-        
-        # Buscar el ID máximo actual. Asumimos que las ventas tienen 'id'.
-        max_id = 0
-        for v in self.ventas:
-            v_id = v.get('id')
-            if isinstance(v_id, int) and v_id > max_id:
-                max_id = v_id
-        return max_id + 1
+        firma = firma_archivo(self.archivo_ventas)
+        if firma is None or firma == self._firma:
+            return []
+        en_disco, version = leer_registros(self.archivo_ventas, 'ventas')
+        crear = Venta.desde_registro if version == VERSION_ESQUEMA else Venta.from_dict
+        externas = []
+        # Las ventas nuevas están al final del archivo
+        for venta in reversed(en_disco):
+            if not isinstance(venta.get('id'), int) or venta['id'] <= self._max_id:
+                break
+            externas.append(crear(venta))
+        externas.reverse()
+        self._agregar_al_historial(externas)
+        if externas:
+            self._max_id = externas[-1].id
+        self._firma = firma
+        return externas
+
+    def _registrar_ventas(self, ventas: List[Venta]):
+        """
+        Asigna IDs consecutivos, agrega las ventas al historial y lo guarda, todo bajo
+        el bloqueo del archivo (entre hilos y entre procesos). Notifica las ventas de
+        otras instancias incorporadas y las nuevas.
+        """
+        # Los IDs continúan los del historial: si aún se está cargando, se espera
+        self._cargado.wait()
+        with self._candado_archivo, bloqueo_archivo(self.archivo_ventas):
+            externas = self._sincronizar_desde_disco()
+            for venta in ventas:
+                self._max_id += 1
+                venta.id = self._max_id
+            self._agregar_al_historial(ventas)
+            try:
+                self._escribir_ventas()
+            except Exception as e:
+                print(f"Error al guardar ventas: {e}")
+        # Informa a los observadores (análisis, reportes) de las ventas agregadas
+        self._notificar('ventas_agregadas', externas + ventas)
+
+    def _agregar_al_historial(self, ventas: List[Venta]):
+        """Agrega ventas al final del historial y a su índice (requiere el candado del archivo)."""
+        with self._candado_indice:
+            self.ventas.extend(ventas)
+            self._indice.agregar(ventas)
 
-    def realizar_venta(self, items: List[tuple], descuento: float = 0.0) -> Optional[Venta]:
+    def consultar_ventas(self, desde: Optional[date] = None, hasta: Optional[date] = None,
+                         total_minimo: Optional[int] = None, codigo: Optional[str] = None,
+                         cursor: Optional[int] = None, limite: int = 50) -> dict:
+        """
+        Retorna una página del historial, de la venta más nueva a la más antigua.
+        Filtros (None = sin filtro): fechas desde/hasta (días inclusive), total mínimo
+        de la venta y código de un producto que la venta debe incluir.
+        Retorna {'ventas': [...], 'total': coincidencias en todo el historial,
+        'siguiente': cursor de la página siguiente o None si es la última}.
+        El cursor es el ID de la última venta entregada, así una página no cambia
+        aunque entretanto se registren ventas nuevas.
+        """
+        with self._candado_indice:
+            posiciones, total, hay_mas = self._indice.consultar(desde, hasta, total_minimo, codigo, cursor, limite)
+            pagina = [self.ventas[posicion] for posicion in posiciones]
+        return {'ventas': pagina, 'total': total, 'siguiente': pagina[-1].id if hay_mas else None}
+
+    def obtener_venta(self, id_venta: int) -> Optional[Venta]:
+        """Busca una venta por su ID (búsqueda binaria en el índice)."""
+        with self._candado_indice:
+            posicion = self._indice.posicion_id(id_venta)
+            if posicion < len(self.ventas) and self.ventas[posicion].id == id_venta:
+                return self.ventas[posicion]
+        return None
+
+    def obtener_siguiente_id(self) -> int:
+        """Retorna el ID que tendría la próxima venta (el más alto conocido más 1)."""
+        return self._max_id + 1
+
+    def _stock_disponible(self, producto, carrito: Optional[str] = None) -> float:
+        """Stock de un producto menos lo reservado por otros carritos."""
+        if self.reserva_controller is None:
+            return producto.stock
+        return producto.stock - self.reserva_controller.reservado(producto.codigo, excluir_carrito=carrito)
+
+    def _aplicar_promociones(self, venta: Venta):
+        """Aplica a cada item la promoción de mayor ahorro (vigente a la fecha de la venta)."""
+        if self.promocion_controller is None:
+            return
+        for indice, item in enumerate(venta.items):
+            mejor = self.promocion_controller.mejor_promocion(item.codigo, item.cantidad, venta.fecha)
+            if mejor:
+                venta.aplicar_promocion(indice, mejor[0].nombre, mejor[1])
+
+    def realizar_venta(self, items: List[tuple], descuento: float = 0.0, carrito: Optional[str] = None) -> Optional[Venta]:
         """
         Procesa una nueva venta.
         1. Valida stock suficiente para todos los items.
@@ -76,6 +236,7 @@ class VentaController:
         3. Registra la venta.
         items: lista de tuplas (codigo_producto, cantidad)
         descuento: porcentaje de descuento (0-100)
+        carrito: identificador del carrito cuyas reservas se usan (y se liberan al vender)
         """
         # 1. Agrupar items y validar cantidades (por si el mismo producto aparece varias veces)
         items_agrupados = {}
@@ -85,42 +246,179 @@ class VentaController:
                 return None
             items_agrupados[codigo] = items_agrupados.get(codigo, 0) + cantidad
 
-        # 2. Validar stock total requerido antes de procesar nada (Atomicidad)
+        # 2. Validar y descontar bajo los candados de los productos (Atomicidad)
         # Si falta stock de UN solo producto, la venta completa falla.
-        for codigo, cantidad_total in items_agrupados.items():
-            producto = self.producto_controller.productos.get(codigo)
-            if not producto:
-                print(f"Error: Producto {codigo} no encontrado.")
-                return None
-            if producto.stock < cantidad_total:
-                print(f"Stock insuficiente para {producto.nombre}. Requerido: {cantidad_total}, Disponible: {producto.stock}")
+        # Otra caja no puede vender estos productos entre la validación y el descuento.
+        venta = Venta()
+        productos = self.producto_controller.productos
+        with self.producto_controller.bloquear_productos(items_agrupados):
+            for codigo, cantidad_total in items_agrupados.items():
+                producto = productos.get(codigo)
+                if not producto:
+                    print(f"Error: Producto {codigo} no encontrado.")
+                    return None
+                disponible = self._stock_disponible(producto, carrito)
+                if disponible < cantidad_total:
+                    print(f"Stock insuficiente para {producto.nombre}. Requerido: {cantidad_total}, Disponible: {disponible}")
+                    return None
+
+            # 3. Procesar la venta (Agregar items y descontar stock)
+            for codigo, cantidad_total in items_agrupados.items():
+                venta.agregar_item(productos[codigo], cantidad_total)
+            self._aplicar_promociones(venta)
+            if not self.producto_controller.descontar_en_memoria(items_agrupados):
                 return None
         
-        # 3. Generar ID y Objeto Venta
-        nuevo_id = self.obtener_siguiente_id()
-        venta = Venta(id_venta=nuevo_id)
-        
-        # 4. Procesar la venta (Descontar stock y agregar items)
-        for codigo, cantidad_total in items_agrupados.items():
-            producto = self.producto_controller.productos[codigo]
-            # Descuenta el stock usando el controlador de productos
-            self.producto_controller.actualizar_stock(codigo, cantidad_total, operacion='restar')
-            # Agrega el item al registro de la venta
-            venta.agregar_item(producto, cantidad_total)
-        
-        # Aplicar descuento si existe
+        # Aplicar descuento si existe (sobre el total ya rebajado por las promociones)
         if descuento > 0:
-            venta.descuento = descuento
-            # Aplicar descuento al total
-            descuento_monto = venta.total * (descuento / 100)
-            venta.total -= descuento_monto
-
-        # 5. Guardar la venta en el historial
-        self.ventas.append(venta.to_dict())
-        self.guardar_ventas()
-        print(f"Venta #{venta.id} realizada con éxito. Total: ${venta.total}")
+            venta.aplicar_descuento(descuento)
+
+        # 4. Persistir el stock fuera de los candados de productos para no frenar a otras cajas.
+        # Se rechaza si otra instancia del POS vendió entretanto el stock que quedaba.
+        if not self.producto_controller.confirmar_stock({codigo: -cantidad for codigo, cantidad in items_agrupados.items()}):
+            print("Venta cancelada: el stock cambió en otra caja.")
+            return None
+
+        # Las reservas del carrito ya se convirtieron en venta
+        if carrito is not None and self.reserva_controller is not None:
+            self.reserva_controller.liberar(carrito)
+
+        # 5. Generar ID y guardar la venta en el historial
+        self._registrar_ventas([venta])
+        print(f"Venta #{venta.id} realizada con éxito. Total: {formatear(venta.total)}")
         return venta
 
+    def realizar_ventas_lote(self, lote: List) -> List[dict]:
+        """
+        Procesa muchas ventas de una vez (cola de una caja sin conexión o una importación).
+        Cada elemento del lote puede ser una lista de tuplas (codigo, cantidad) o un
+        diccionario {'items': [...], 'descuento': %, 'fecha': 'YYYY-MM-DD HH:MM:SS'}.
+
+        Las ventas se validan en orden contra el stock que van dejando las anteriores
+        del mismo lote; las que no alcanzan se rechazan sin afectar a las demás.
+        El stock y el historial se guardan una sola vez al final.
+        Retorna un reporte por venta: {'indice', 'aceptada', 'id', 'motivo'}.
+        """
+        productos = self.producto_controller.productos
+        # 1. Normalizar y validar cada venta antes de tomar los candados:
+        #    (items agrupados, descuento, fecha, motivo del rechazo o None)
+        entradas = [self._validar_entrada_lote(entrada) for entrada in lote]
+
+        # Stock restante a medida que se aceptan ventas (solo de los productos involucrados)
+        disponible: Dict[str, float] = {}
+        # Demanda total aceptada por producto, para descontarla en una sola operación
+        demanda: Dict[str, float] = {}
+        aceptadas: List[Venta] = []
+        reporte: List[dict] = []
+
+        # Se bloquean de una vez todos los productos del lote (en orden, sin deadlocks)
+        codigos = {codigo for items_agrupados, _, _, _ in entradas for codigo in items_agrupados}
+        with self.producto_controller.bloquear_productos(codigos):
+            for indice, (items_agrupados, descuento, fecha, motivo) in enumerate(entradas):
+                # 2. Validar que los productos existan y contra el stock restante del lote
+                if motivo is None:
+                    for codigo in items_agrupados:
+                        if codigo not in productos:
+                            motivo = f"Producto {codigo} no encontrado"
+                            break
+                if motivo is None:
+                    for codigo, cantidad_total in items_agrupados.items():
+                        if codigo not in disponible:
+                            # Stock libre de reservas de carritos abiertos
+                            disponible[codigo] = self._stock_disponible(productos[codigo])
+                        restante = disponible[codigo]
+                        if restante < cantidad_total:
+                            motivo = f"Stock insuficiente para {productos[codigo].nombre}. Requerido: {cantidad_total}, Disponible: {restante}"
+                            break
+
+                if motivo is not None:
+                    reporte.append({'indice': indice, 'aceptada': False, 'id': None, 'motivo': motivo})
+                    continue
+
+                # 3. Reservar el stock dentro del lote y armar la venta
+                venta = Venta()
+                if fecha is not None:
+                    venta.fecha = fecha
+                for codigo, cantidad_total in items_agrupados.items():
+                    disponible[codigo] -= cantidad_total
+                    demanda[codigo] = demanda.get(codigo, 0) + cantidad_total
+                    venta.agregar_item(productos[codigo], cantidad_total)
+                self._aplicar_promociones(venta)
+                if descuento > 0:
+                    venta.aplicar_descuento(descuento)
+
+                aceptadas.append(venta)
+                reporte.append({'indice': indice, 'aceptada': True, 'id': None, 'motivo': None})
+
+            # 4. Descontar la demanda total (ya validada con los candados tomados)
+            if aceptadas and not self.producto_controller.descontar_en_memoria(demanda):
+                return [{'indice': r['indice'], 'aceptada': False, 'id': None,
+                         'motivo': r['motivo'] or "No se pudo descontar el stock del lote"}
+                        for r in reporte]
+
+        if not aceptadas:
+            print(f"Lote procesado: 0 ventas aceptadas, {len(reporte)} rechazadas")
+            return reporte
+
+        # 5. Una escritura de productos para todo el lote (fusionada con otras instancias)
+        if not self.producto_controller.confirmar_stock({codigo: -cantidad for codigo, cantidad in demanda.items()}):
+            return [{'indice': r['indice'], 'aceptada': False, 'id': None,
+                     'motivo': r['motivo'] or "El stock cambió en otra caja"}
+                    for r in reporte]
+
+        # 6. Asignar IDs consecutivos y una escritura del historial para todo el lote
+        self._registrar_ventas(aceptadas)
+        ids = iter(venta.id for venta in aceptadas)
+        for r in reporte:
+            if r['aceptada']:
+                r['id'] = next(ids)
+
+        print(f"Lote procesado: {len(aceptadas)} ventas aceptadas, {len(reporte) - len(aceptadas)} rechazadas")
+        return reporte
+
+    @staticmethod
+    def _validar_entrada_lote(entrada) -> tuple:
+        """
+        Normaliza una venta del lote a (items agrupados, descuento, fecha, motivo).
+        Si la venta está mal formada, motivo explica por qué y se rechaza sola,
+        sin afectar al resto del lote.
+        """
+        if isinstance(entrada, dict):
+            items, descuento, fecha = entrada.get('items', []), entrada.get('descuento', 0.0), entrada.get('fecha')
+        else:
+            items, descuento, fecha = entrada, 0.0, None
+
+        def rechazo(motivo):
+            return {}, 0.0, None, motivo
+
+        if not isinstance(items, (list, tuple)):
+            return rechazo(f"Items inválidos: {items!r}")
+        items_agrupados = {}
+        for item in items:
+            try:
+                codigo, cantidad = item
+            except (TypeError, ValueError):
+                return rechazo(f"Item inválido: {item!r} (se espera (codigo, cantidad))")
+            if not isinstance(codigo, str):
+                return rechazo(f"Código de producto inválido: {codigo!r}")
+            if isinstance(cantidad, bool) or not isinstance(cantidad, (int, float)) or cantidad <= 0:
+                return rechazo(f"Cantidad inválida ({cantidad!r}) para producto {codigo}")
+            items_agrupados[codigo] = items_agrupados.get(codigo, 0) + cantidad
+        if not items_agrupados:
+            return rechazo("Venta sin items")
+
+        if isinstance(descuento, bool) or not isinstance(descuento, (int, float)) or not 0 <= descuento <= 100:
+            return rechazo(f"Descuento inválido: {descuento!r} (se espera 0-100)")
+
+        if fecha:
+            try:
+                fecha = datetime.strptime(fecha, '%Y-%m-%d %H:%M:%S')
+            except (TypeError, ValueError):
+                return rechazo(f"Fecha inválida: {fecha!r} (se espera YYYY-MM-DD HH:MM:SS)")
+        else:
+            fecha = None
+        return items_agrupados, descuento, fecha, None
+
     def obtener_estadisticas(self) -> dict:
         """
         Genera un resumen estadístico del negocio.
@@ -128,8 +426,9 @@ class VentaController:
         """
         total_productos = len(self.producto_controller.productos)
         total_ventas = len(self.ventas)
-        ingresos_totales = sum(v['total'] for v in self.ventas)
-        valor_inventario = sum(p.precio * p.stock for p in self.producto_controller.productos.values())
+        # Los totales son montos enteros: la suma es exacta
+        ingresos_totales = sum(v.total for v in self.ventas)
+        valor_inventario = self.producto_controller.valor_inventario()
         
         return {
             'total_productos': total_productos,
@@ -4,6 +4,11 @@ Returns:
      Inicia el bucle principal de la interfaz gráfica.
 """
 
+# Momento de inicio, antes de importar el resto (para el reporte de arranque)
+import time
+_INICIO = time.perf_counter()
+
+import threading
 # Importamos la librería tkinter para la interfaz gráfica
 import tkinter as tk
 # Importamos el controlador principal que maneja la lógica de negocio
@@ -12,6 +17,11 @@ from controllers.supermercado_controller import SupermercadoController
 from views.gui import LoginWindow, SupermercadoGUI, RegistroWindow
 # Importamos el modelo de Usuario para el tipado
 from models.usuario import Usuario
+# Módulos pesados que se importan en segundo plano mientras se muestra el login
+from models.importacion import precargar
+
+# Tiempo que tomó importar los módulos de la aplicación
+_TIEMPO_IMPORTACION = time.perf_counter() - _INICIO
 
 class Application:
     """
@@ -25,15 +35,70 @@ class Application:
         # Definimos el tamaño inicial de la ventana
         self.root.geometry("400x350")
         
-        # Inicializa el controlador principal que orquesta la lógica del negocio
-        # Se le pasan las rutas de los archivos JSON donde se guardarán los datos
-        self.controller = SupermercadoController(
-            archivo_productos="data/productos.json",
-            archivo_ventas="data/ventas.json",
-            archivo_usuarios="data/usuarios.json"
-        )
+        # El controlador principal se construye (leyendo los archivos de datos) en otro hilo
+        # mientras se muestra el login; obtener_controller() espera a que esté listo
+        self.controller = None
+        self._error_carga = None
+        self._controller_listo = threading.Event()
+        # Tiempos de arranque en ms: importación, primera ventana dibujada y carga de datos
+        self.tiempos = {'importacion': _TIEMPO_IMPORTACION * 1000}
+        self._candado_tiempos = threading.Lock()
+        self._inicio = time.perf_counter()
+        threading.Thread(target=self._cargar_datos, name='carga-inicial').start()
+
+        # Al cerrar la ventana se escribe lo pendiente antes de salir
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         # Muestra la ventana de inicio de sesión al arrancar la aplicación
         self.show_login_window()
+        # after_idle se ejecuta cuando Tkinter terminó de dibujar la ventana pendiente
+        self.root.after_idle(lambda: self._registrar_tiempo('primera_ventana'))
+
+    def _cargar_datos(self):
+        """Construye el controlador principal (se ejecuta en el hilo 'carga-inicial')."""
+        try:
+            # Se le pasan las rutas de los archivos JSON donde se guardarán los datos
+            self.controller = SupermercadoController(
+                archivo_productos="data/productos.json",
+                archivo_ventas="data/ventas.json",
+                archivo_usuarios="data/usuarios.json",
+                archivo_resumen="data/resumen_diario.json",
+                archivo_snapshots="data/inventario_snapshots.jsonl",
+                archivo_deltas="data/inventario_deltas.jsonl",
+                archivo_promociones="data/promociones.json",
+                # El historial de ventas (el archivo más grande) se carga mientras se inicia sesión
+                historial_en_segundo_plano=True
+            )
+        except Exception as e:
+            print(f"Error al cargar los datos: {e}")
+            self._error_carga = e
+        finally:
+            self._controller_listo.set()
+        self._registrar_tiempo('carga_datos')
+        # Con los datos listos, adelanta la importación de lo que usa la ventana principal
+        precargar('numpy', 'PIL.Image', 'PIL.ImageTk')
+
+    def obtener_controller(self) -> SupermercadoController:
+        """Retorna el controlador principal, esperando a que termine de cargarse."""
+        self._controller_listo.wait()
+        if self._error_carga is not None:
+            raise RuntimeError(f"No se pudieron cargar los datos: {self._error_carga}")
+        return self.controller
+
+    def _registrar_tiempo(self, etapa: str):
+        """Anota cuánto tardó una etapa del arranque e informa cuando están todas."""
+        with self._candado_tiempos:
+            if etapa in self.tiempos:
+                return
+            self.tiempos[etapa] = (time.perf_counter() - self._inicio) * 1000
+            completo = len(self.tiempos) == 3
+        if completo:
+            self._informar_arranque()
+
+    def _informar_arranque(self):
+        """Imprime los tiempos de arranque (la primera ventana y la carga de datos corren a la vez)."""
+        t = self.tiempos
+        print(f"Arranque: importación {t['importacion']:.0f} ms, primera ventana {t['primera_ventana']:.0f} ms, "
+              f"carga de datos {t['carga_datos']:.0f} ms")
 
     def show_login_window(self):
         """Muestra la ventana de login."""
@@ -43,8 +108,8 @@ class Application:
         self.root.title("Inicio de Sesión - Supermercado")
         # Ajusta el tamaño de la ventana para el login
         self.root.geometry("400x350")
-        # Instancia la vista de Login, pasando el controlador y los callbacks de éxito o registro
-        self.login_view = LoginWindow(self.root, self.controller, self.on_login_success, self.show_registro_window)
+        # Instancia la vista de Login, pasando el acceso al controlador y los callbacks de éxito o registro
+        self.login_view = LoginWindow(self.root, self.obtener_controller, self.on_login_success, self.show_registro_window)
 
     def show_registro_window(self):
         """Muestra la ventana de registro de nuevos usuarios."""
@@ -54,7 +119,7 @@ class Application:
         self.root.title("Registro de Usuario - Supermercado")
         self.root.geometry("400x400")
         # Instancia la vista de Registro
-        self.registro_view = RegistroWindow(self.root, self.controller, self.show_login_window, self.show_login_window)
+        self.registro_view = RegistroWindow(self.root, self.obtener_controller, self.show_login_window, self.show_login_window)
 
     def on_login_success(self, usuario: Usuario):
         """Callback que se ejecuta cuando el login es exitoso. Carga la interfaz principal."""
@@ -64,14 +129,20 @@ class Application:
         self.root.title(f"Supermercado - {usuario.username}")
         # Maximiza o agranda la ventana para la vista principal
         self.root.geometry("1024x768")
-        # Instancia la GUI principal del supermercado
-        self.main_view = SupermercadoGUI(self.root, usuario, self.controller, self.on_logout)
+        # Instancia la GUI principal del supermercado (el login ya esperó a que cargaran los datos)
+        self.main_view = SupermercadoGUI(self.root, usuario, self.obtener_controller(), self.on_logout)
 
     def on_logout(self):
         """Callback para cerrar sesión y volver al login."""
         # Simplemente vuelve a mostrar la ventana de login
         self.show_login_window()
 
+    def on_close(self):
+        """Cierra la aplicación guardando lo pendiente (si los datos llegaron a cargarse)."""
+        if self._controller_listo.is_set() and self.controller is not None:
+            self.controller.cerrar()
+        self.root.destroy()
+
     def _clear_widgets(self):
         """Elimina todos los widgets de la ventana principal."""
         # Itera sobre todos los hijos de la ventana raíz y los destruye
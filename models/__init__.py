@@ -1,3 +1,5 @@
 from .producto import Producto
 from .usuario import Usuario
 from .venta import Venta
+from .promocion import Promocion
+from .almacen_columnar import AlmacenColumnar
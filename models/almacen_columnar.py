@@ -0,0 +1,162 @@
+"""
+Almacén columnar del catálogo: precio, stock y stock mínimo de todos los
+productos en arreglos contiguos de números (en lugar de atributos sueltos
+en cada objeto), para calcular sobre el catálogo completo de una vez.
+"""
+import operator
+import threading
+from array import array
+from typing import Dict, List, Optional
+from .dinero import redondear, redondear_arreglo, sumar
+# NumPy es opcional: si está instalado, los cálculos sobre el catálogo se vectorizan.
+# Se importa al primer cálculo, no al cargar el módulo (ver models.importacion)
+from .importacion import numpy
+
+# Índices de las columnas
+PRECIO = 0
+STOCK = 1
+STOCK_MINIMO = 2
+# Tipo de cada columna: el precio es un monto entero (int64, ver models.dinero);
+# el stock y el mínimo admiten decimales (productos por kg)
+TIPOS = ('q', 'd', 'd')
+# Tipo de NumPy de cada columna (mismo orden que TIPOS)
+_DTYPES = ('int64', 'float64', 'float64')
+
+# Los arreglos se reservan en bloques de tamaño fijo que nunca se mueven de lugar:
+# así un bloque nuevo no invalida las escrituras que otro hilo esté haciendo
+BITS_BLOQUE = 10
+TAMANO_BLOQUE = 1 << BITS_BLOQUE
+MASCARA_BLOQUE = TAMANO_BLOQUE - 1
+
+
+def _normalizar(valor: float):
+    """Los arreglos guardan float; los valores enteros se devuelven como int (como en el JSON)."""
+    return int(valor) if valor.is_integer() else valor
+
+
+class AlmacenColumnar:
+    """
+    Guarda las columnas precio, stock y stock_minimo en arreglos tipados (array 'q' y 'd'),
+    con un mapa código -> posición (slot). Cada Producto vinculado es solo una vista
+    que lee y escribe su posición.
+
+    Con NumPy, los arreglos se leen sin copiar (np.frombuffer) y la valorización o
+    la búsqueda de stock bajo son operaciones vectorizadas; sin NumPy se recorren
+    los arreglos directamente, que sigue siendo más rápido que leer atributos.
+    Las posiciones de productos eliminados se reutilizan.
+    """
+
+    def __init__(self):
+        # Bloques de cada columna: [precio, stock, stock_minimo] -> lista de array (ver TIPOS)
+        self._bloques: List[List[array]] = [[], [], []]
+        # Código de cada posición (None si está libre)
+        self._codigos: List[Optional[str]] = []
+        # Posición de cada código
+        self._slots: Dict[str, int] = {}
+        # Posiciones liberadas, disponibles para reutilizar
+        self._libres: List[int] = []
+        # Protege la asignación y liberación de posiciones
+        self._candado = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def asignar(self, codigo: str, precio: float, stock: float, stock_minimo: float) -> int:
+        """Reserva una posición para el producto, guarda sus valores y la retorna."""
+        with self._candado:
+            if self._libres:
+                slot = self._libres.pop()
+                self._codigos[slot] = codigo
+            else:
+                slot = len(self._codigos)
+                if slot >> BITS_BLOQUE == len(self._bloques[PRECIO]):
+                    for tipo, columna in zip(TIPOS, self._bloques):
+                        columna.append(array(tipo, bytes(8 * TAMANO_BLOQUE)))
+                self._codigos.append(codigo)
+            self._slots[codigo] = slot
+        self.escribir(PRECIO, slot, precio)
+        self.escribir(STOCK, slot, stock)
+        self.escribir(STOCK_MINIMO, slot, stock_minimo)
+        return slot
+
+    def liberar(self, codigo: str):
+        """Libera la posición de un producto (sus valores quedan en cero)."""
+        with self._candado:
+            slot = self._slots.pop(codigo, None)
+            if slot is None:
+                return
+            self._codigos[slot] = None
+            for columna in self._bloques:
+                columna[slot >> BITS_BLOQUE][slot & MASCARA_BLOQUE] = 0
+            self._libres.append(slot)
+
+    def leer(self, columna: int, slot: int):
+        """Valor de una columna en una posición."""
+        valor = self._bloques[columna][slot >> BITS_BLOQUE][slot & MASCARA_BLOQUE]
+        # El precio ya es entero
+        return valor if columna == PRECIO else _normalizar(valor)
+
+    def escribir(self, columna: int, slot: int, valor: float):
+        """Guarda el valor de una columna en una posición."""
+        self._bloques[columna][slot >> BITS_BLOQUE][slot & MASCARA_BLOQUE] = valor
+
+    def _columnas(self, *columnas):
+        """Recorre los bloques en uso entregando, por bloque, (inicio, arreglos de las columnas pedidas)."""
+        total = len(self._codigos)
+        np = numpy()
+        for i in range(len(self._bloques[PRECIO])):
+            inicio = i << BITS_BLOQUE
+            if inicio >= total:
+                break
+            largo = min(TAMANO_BLOQUE, total - inicio)
+            if np is not None:
+                # Vista sin copia sobre el mismo buffer del array
+                yield inicio, [np.frombuffer(self._bloques[c][i], dtype=_DTYPES[c], count=largo) for c in columnas]
+            else:
+                yield inicio, [self._bloques[c][i][:largo] for c in columnas]
+
+    def valor_total(self) -> int:
+        """
+        Suma de precio * stock de todo el catálogo (las posiciones libres valen cero).
+        El valor de cada producto se redondea a un monto entero y se suma sin error.
+        """
+        if numpy() is not None:
+            return sum(sumar(redondear_arreglo(precios * stocks)) for _, (precios, stocks) in self._columnas(PRECIO, STOCK))
+        return sum(sum(map(redondear, map(operator.mul, precios, stocks)))
+                   for _, (precios, stocks) in self._columnas(PRECIO, STOCK))
+
+    def _codigos_donde(self, condicion_np, condicion) -> List[str]:
+        """Códigos de las posiciones en uso donde se cumple la condición sobre (stock, stock_minimo)."""
+        codigos = self._codigos
+        resultado = []
+        np = numpy()
+        for inicio, (stocks, minimos) in self._columnas(STOCK, STOCK_MINIMO):
+            if np is not None:
+                indices = np.flatnonzero(condicion_np(stocks, minimos)).tolist()
+            else:
+                indices = [i for i, (s, m) in enumerate(zip(stocks, minimos)) if condicion(s, m)]
+            for i in indices:
+                codigo = codigos[inicio + i]
+                # Las posiciones libres también valen cero: se descartan
+                if codigo is not None:
+                    resultado.append(codigo)
+        return resultado
+
+    def codigos_stock_bajo(self) -> List[str]:
+        """Códigos de los productos con stock bajo el mínimo o agotados."""
+        return self._codigos_donde(lambda s, m: (s <= m) | (s == 0), lambda s, m: s <= m or s == 0)
+
+    def codigos_con_stock(self) -> List[str]:
+        """Códigos de los productos con stock mayor a cero."""
+        return self._codigos_donde(lambda s, m: s > 0, lambda s, m: s > 0)
+
+    def estado(self) -> Dict[str, list]:
+        """Retorna {codigo: [stock, precio]} de todo el catálogo (para snapshots)."""
+        codigos = self._codigos
+        resultado = {}
+        for inicio, (stocks, precios) in self._columnas(STOCK, PRECIO):
+            for i, (stock, precio) in enumerate(zip(stocks.tolist(), precios.tolist())):
+                codigo = codigos[inicio + i]
+                if codigo is not None:
+                    resultado[codigo] = [_normalizar(stock), precio]
+        return resultado
@@ -2,6 +2,7 @@
 Modelo que representa una categoría de productos.
 Permite agrupar productos bajo una clasificación común.
 """
+from typing import Dict
 
 class Categoria:
     """
@@ -9,7 +10,14 @@ class Categoria:
     Atributos:
         nombre (str): El nombre de la categoría (ej. "Lácteos").
         descripcion (str): Una breve descripción de la categoría.
+
+    Las categorías se comparten (flyweight): 'obtener' retorna siempre la misma
+    instancia para un nombre, así miles de productos apuntan a un solo objeto.
     """
+    __slots__ = ('nombre', 'descripcion')
+    # Registro de instancias compartidas por nombre
+    _registro: Dict[str, 'Categoria'] = {}
+
     def __init__(self, nombre: str, descripcion: str = ""):
         # Nombre identificador de la categoría
         self.nombre = nombre
@@ -23,6 +31,17 @@ class Categoria:
             "descripcion": self.descripcion
         }
 
+    @staticmethod
+    def obtener(nombre: str, descripcion: str = ""):
+        """Retorna la instancia compartida de la categoría (la crea si no existe)."""
+        categoria = Categoria._registro.get(nombre)
+        if categoria is None:
+            # setdefault es atómico: dos hilos no pueden registrar instancias distintas
+            categoria = Categoria._registro.setdefault(nombre, Categoria(nombre, descripcion))
+        elif descripcion and not categoria.descripcion:
+            categoria.descripcion = descripcion
+        return categoria
+
     @staticmethod
     def from_dict(data: dict):
         """
@@ -31,9 +50,9 @@ class Categoria:
         """
         # Soporte para cuando la categoría era solo un string en versiones anteriores
         if isinstance(data, str):
-            return Categoria(data)
+            return Categoria.obtener(data)
         # Creación estándar desde diccionario
-        return Categoria(data['nombre'], data.get('descripcion', ''))
+        return Categoria.obtener(data['nombre'], data.get('descripcion', ''))
 
     def __str__(self):
         # Retorna el nombre de la categoría como representación en string
@@ -0,0 +1,89 @@
+"""
+Hash de contraseñas con una función de derivación de claves (KDF) con sal.
+Se usa scrypt (costosa en CPU y memoria, para frenar ataques de fuerza bruta)
+y, si la versión de OpenSSL de Python no la incluye, PBKDF2-HMAC-SHA256.
+El texto guardado incluye el algoritmo y sus parámetros, así una contraseña
+se sigue verificando aunque después cambie el costo configurado.
+
+Formatos:
+    scrypt$<costo>$<r>$<p>$<sal>$<hash>
+    pbkdf2_sha256$<iteraciones>$<sal>$<hash>
+(sal y hash en base64). Un texto sin estos prefijos es una contraseña en
+texto plano de los archivos antiguos.
+"""
+import base64
+import hashlib
+import hmac
+import os
+
+# Costo por defecto: log2 del factor de trabajo de scrypt (15 -> N = 32768, 32 MiB, ~150 ms)
+COSTO = 15
+# Parámetros fijos de scrypt (tamaño de bloque y paralelismo)
+BLOQUE_SCRYPT = 8
+PARALELISMO_SCRYPT = 1
+# Iteraciones de PBKDF2 por cada unidad de 2**costo (15 -> ~655.000 iteraciones)
+ITERACIONES_POR_N = 20
+# Largos en bytes de la sal y del hash derivado
+LARGO_SAL = 16
+LARGO_HASH = 32
+
+ALGORITMO = 'scrypt' if hasattr(hashlib, 'scrypt') else 'pbkdf2_sha256'
+
+
+def _b64(datos: bytes) -> str:
+    return base64.b64encode(datos).decode('ascii')
+
+
+def _scrypt(password: str, sal: bytes, costo: int, r: int, p: int) -> bytes:
+    n = 1 << costo
+    # scrypt usa 128 * r * N bytes; el límite por defecto de OpenSSL (32 MiB) no alcanza desde costo 15
+    return hashlib.scrypt(password.encode('utf-8'), salt=sal, n=n, r=r, p=p,
+                          maxmem=256 * r * n + (1 << 20), dklen=LARGO_HASH)
+
+
+def _pbkdf2(password: str, sal: bytes, iteraciones: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), sal, iteraciones, LARGO_HASH)
+
+
+def es_hash(almacenado: str) -> bool:
+    """Indica si el valor guardado es un hash (y no una contraseña en texto plano)."""
+    return almacenado.startswith(('scrypt$', 'pbkdf2_sha256$'))
+
+
+def generar(password: str, costo: int = COSTO) -> str:
+    """Calcula el hash de una contraseña con una sal aleatoria nueva."""
+    sal = os.urandom(LARGO_SAL)
+    if ALGORITMO == 'scrypt':
+        derivado = _scrypt(password, sal, costo, BLOQUE_SCRYPT, PARALELISMO_SCRYPT)
+        return f"scrypt${costo}${BLOQUE_SCRYPT}${PARALELISMO_SCRYPT}${_b64(sal)}${_b64(derivado)}"
+    iteraciones = (1 << costo) * ITERACIONES_POR_N
+    return f"pbkdf2_sha256${iteraciones}${_b64(sal)}${_b64(_pbkdf2(password, sal, iteraciones))}"
+
+
+def verificar(password: str, almacenado: str) -> bool:
+    """
+    Compara una contraseña con el valor guardado (hash o texto plano antiguo).
+    La comparación final es de tiempo constante.
+    """
+    try:
+        if almacenado.startswith('scrypt$'):
+            _, costo, r, p, sal, esperado = almacenado.split('$')
+            derivado = _scrypt(password, base64.b64decode(sal), int(costo), int(r), int(p))
+        elif almacenado.startswith('pbkdf2_sha256$'):
+            _, iteraciones, sal, esperado = almacenado.split('$')
+            derivado = _pbkdf2(password, base64.b64decode(sal), int(iteraciones))
+        else:
+            return hmac.compare_digest(password.encode('utf-8'), almacenado.encode('utf-8'))
+        return hmac.compare_digest(derivado, base64.b64decode(esperado))
+    except (ValueError, TypeError):
+        # Registro dañado: no coincide con ninguna contraseña
+        return False
+
+
+def requiere_actualizar(almacenado: str, costo: int = COSTO) -> bool:
+    """Indica si conviene volver a calcular el hash (texto plano, otro algoritmo u otro costo)."""
+    if not es_hash(almacenado):
+        return True
+    if ALGORITMO == 'scrypt':
+        return not almacenado.startswith(f"scrypt${costo}${BLOQUE_SCRYPT}${PARALELISMO_SCRYPT}$")
+    return not almacenado.startswith(f"pbkdf2_sha256${(1 << costo) * ITERACIONES_POR_N}$")
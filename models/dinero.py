@@ -0,0 +1,88 @@
+"""
+Montos de dinero como enteros en la unidad mínima de la moneda.
+El peso chileno (CLP) no tiene subunidad, así que la unidad mínima es el peso:
+un precio de $1.200 es el entero 1200. Con enteros las sumas de ingresos son
+exactas y cuadran con los totales de cada venta (los float acumulan error).
+Los cálculos con cantidades en kg o con porcentajes se redondean a la unidad
+mínima en un solo lugar (redondear), la mitad siempre hacia arriba.
+"""
+import math
+import sys
+from typing import Iterable, List
+from .importacion import numpy
+
+# Decimales de la moneda (CLP: 0). Un monto entero equivale a monto / 10**DECIMALES pesos
+DECIMALES = 0
+ESCALA = 10 ** DECIMALES
+
+
+def redondear(valor: float) -> int:
+    """Redondea un valor (ya en unidades mínimas) al entero más cercano; la mitad hacia arriba."""
+    return math.floor(valor + 0.5)
+
+
+def desde_texto(texto: str) -> int:
+    """Convierte un monto escrito por el usuario (ej. '1200') a unidades mínimas."""
+    return redondear(float(texto) * ESCALA)
+
+
+def a_texto(monto: int) -> str:
+    """Monto como texto editable, sin símbolo ni separadores (inverso de desde_texto)."""
+    return f"{monto / ESCALA:.{DECIMALES}f}"
+
+
+def formatear(monto: int) -> str:
+    """Texto de un monto para mostrar en pantalla (ej. '$1,200')."""
+    return f"${monto / ESCALA:,.{DECIMALES}f}"
+
+
+def multiplicar(precio: int, cantidad: float) -> int:
+    """Monto de 'cantidad' unidades (o kg) a 'precio' cada una."""
+    if type(cantidad) is int:
+        return precio * cantidad
+    return redondear(precio * cantidad)
+
+
+def porcentaje(monto: int, porcentaje: float) -> int:
+    """Porcentaje (0-100) de un monto."""
+    return redondear(monto * porcentaje / 100)
+
+
+def repartir(total: int, partes: List[int]) -> List[int]:
+    """
+    Reparte 'total' en proporción a 'partes' con enteros que suman exactamente 'total'
+    (método del mayor resto). Se usa para distribuir el descuento de una venta entre
+    sus items sin que la suma de los items se aleje del total por redondeo.
+    """
+    base = sum(partes)
+    if total == base:
+        return list(partes)
+    if base <= 0:
+        return [total] + [0] * (len(partes) - 1) if partes else []
+    # Aritmética entera: cada parte recibe su cuota truncada y el sobrante va a los mayores restos
+    cuotas = [total * parte // base for parte in partes]
+    sobrante = total - sum(cuotas)
+    if sobrante:
+        restos = sorted(range(len(partes)), key=lambda i: (total * partes[i]) % base, reverse=True)
+        for i in restos[:sobrante]:
+            cuotas[i] += 1
+    return cuotas
+
+
+def sumar(montos: Iterable[int]) -> int:
+    """
+    Suma exacta de montos. Un arreglo de NumPy se suma vectorizado en int64; cualquier
+    otro iterable, con los enteros de Python (también exactos, y más rápidos que
+    convertir el iterable a arreglo solo para sumarlo).
+    """
+    # Si NumPy no se ha importado, montos no puede ser un arreglo (y no se importa para saberlo)
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(montos, np.ndarray):
+        return int(montos.sum(dtype=np.int64))
+    return sum(montos)
+
+
+def redondear_arreglo(valores):
+    """redondear() vectorizado: arreglo float de NumPy -> arreglo int64."""
+    np = numpy()
+    return np.floor(valores + 0.5).astype(np.int64)
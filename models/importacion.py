@@ -0,0 +1,40 @@
+"""
+Importación diferida de módulos pesados (NumPy, Pillow).
+Importarlos al cargar la aplicación suma decenas de milisegundos antes de que
+aparezca la primera ventana. Con importar() cada módulo se importa la primera
+vez que se usa, y precargar() lo importa antes, en segundo plano (ej. mientras
+el usuario escribe su contraseña), para que ese primer uso tampoco espere.
+"""
+import importlib
+import threading
+
+# Módulos ya importados por nombre (None si no está instalado)
+_modulos = {}
+
+
+def importar(nombre: str):
+    """Retorna el módulo, importándolo la primera vez. None si no está instalado."""
+    try:
+        return _modulos[nombre]
+    except KeyError:
+        pass
+    # El sistema de importación de Python ya es seguro entre hilos
+    try:
+        modulo = importlib.import_module(nombre)
+    except ImportError:
+        modulo = None
+    _modulos[nombre] = modulo
+    return modulo
+
+
+def numpy():
+    """NumPy es opcional: None si no está instalado (los cálculos usan Python puro)."""
+    return importar('numpy')
+
+
+def precargar(*nombres: str):
+    """Importa los módulos en un hilo aparte, sin esperar a que termine."""
+    def trabajar():
+        for nombre in nombres:
+            importar(nombre)
+    threading.Thread(target=trabajar, daemon=True, name='precarga-modulos').start()
@@ -6,19 +6,62 @@ Returns:
 # Importamos las clases relacionadas para composición
 from .categoria import Categoria
 from .unidad import Unidad
+from .almacen_columnar import AlmacenColumnar, PRECIO, STOCK, STOCK_MINIMO
+from .dinero import redondear
+
+
+class _CampoColumnar:
+    """
+    Atributo numérico de Producto (precio, stock, stock_minimo).
+    Si el producto está vinculado a un AlmacenColumnar, el valor vive en la
+    columna del almacén; si no, en un atributo propio ('_precio', etc.).
+    """
+    def __init__(self, columna: int):
+        self.columna = columna
+
+    def __set_name__(self, owner, nombre):
+        self.local = '_' + nombre
+
+    def __get__(self, producto, tipo=None):
+        if producto is None:
+            return self
+        if producto._almacen is None:
+            return getattr(producto, self.local)
+        return producto._almacen.leer(self.columna, producto._slot)
+
+    def __set__(self, producto, valor):
+        if producto._almacen is None:
+            setattr(producto, self.local, valor)
+        else:
+            producto._almacen.escribir(self.columna, producto._slot, valor)
+
 
 class Producto:
     """
     Clase que representa un producto individual en el inventario.
-    Utiliza composición con las clases Categoria y Unidad.
+    Utiliza composición con las clases Categoria y Unidad (instancias compartidas).
+    Precio, stock y stock mínimo pueden vivir en un AlmacenColumnar (ver vincular).
     """
-    def __init__(self, codigo: str, nombre: str, precio: float, stock: float, 
-                 categoria: Categoria, unidad: Unidad, stock_minimo: float = 5, imagen_path: str = None):
+    # Sin diccionario por objeto: el catálogo completo vive en memoria
+    __slots__ = ('codigo', 'nombre', '_precio', '_stock', 'categoria', 'unidad', '_stock_minimo',
+                 'imagen_path', 'version', '_almacen', '_slot')
+
+    # Atributos numéricos: propios o en las columnas del almacén
+    precio = _CampoColumnar(PRECIO)
+    stock = _CampoColumnar(STOCK)
+    stock_minimo = _CampoColumnar(STOCK_MINIMO)
+
+    def __init__(self, codigo: str, nombre: str, precio: int, stock: float, 
+                 categoria: Categoria, unidad: Unidad, stock_minimo: float = 5, imagen_path: str = None,
+                 version: int = 0):
+        # Almacén columnar al que está vinculado (None: los valores se guardan en el objeto)
+        self._almacen = None
+        self._slot = -1
         # Identificador único del producto
         self.codigo = codigo
         # Nombre descriptivo del producto
         self.nombre = nombre
-        # Precio unitario de venta
+        # Precio unitario de venta (monto entero en la unidad mínima, ver models.dinero)
         self.precio = precio
         # Cantidad actual disponible en inventario
         self.stock = stock
@@ -30,7 +73,25 @@ class Producto:
         self.stock_minimo = stock_minimo
         # Ruta de la imagen del producto
         self.imagen_path = imagen_path
+        # Contador de versiones del registro (aumenta con cada cambio guardado)
+        # Permite detectar cuando otra instancia del POS modificó el mismo producto
+        self.version = version
     
+    def vincular(self, almacen: AlmacenColumnar):
+        """Mueve precio, stock y stock mínimo a una posición del almacén columnar."""
+        valores = (self.precio, self.stock, self.stock_minimo)
+        self._slot = almacen.asignar(self.codigo, *valores)
+        self._almacen = almacen
+
+    def desvincular(self):
+        """Libera la posición en el almacén y vuelve a guardar los valores en el objeto."""
+        if self._almacen is None:
+            return
+        almacen = self._almacen
+        self._precio, self._stock, self._stock_minimo = self.precio, self.stock, self.stock_minimo
+        self._almacen = None
+        almacen.liberar(self.codigo)
+
     def to_dict(self) -> dict:
         """Convierte el objeto producto a un diccionario serializable para JSON."""
         return {
@@ -43,7 +104,8 @@ class Producto:
             'categoria': self.categoria.nombre if isinstance(self.categoria, Categoria) else self.categoria,
             'unidad': self.unidad.nombre if isinstance(self.unidad, Unidad) else self.unidad,
             'stock_minimo': self.stock_minimo,
-            'imagen_path': self.imagen_path
+            'imagen_path': self.imagen_path,
+            'version': self.version
         }
     
     @staticmethod
@@ -70,18 +132,29 @@ class Producto:
             if isinstance(stock_minimo, float) and not stock_minimo.is_integer():
                 stock_minimo = round(stock_minimo)
 
-        # Retornamos una nueva instancia de Producto
+        # Retornamos una nueva instancia de Producto (los precios antiguos podían ser float)
         return Producto(
             data['codigo'],
             data['nombre'],
-            data['precio'],
+            redondear(data['precio']),
             stock,
             categoria_obj,
             unidad_obj,
             stock_minimo,
-            data.get('imagen_path')
+            data.get('imagen_path'),
+            data.get('version', 0)
         )
     
+    @staticmethod
+    def desde_registro(data: dict):
+        """
+        Crea un Producto desde un registro en el formato actual (ya normalizado por la
+        migración de esquema): sin conversiones de formatos antiguos ni correcciones.
+        """
+        return Producto(data['codigo'], data['nombre'], data['precio'], data['stock'],
+                        Categoria.obtener(data['categoria']), Unidad.obtener(data['unidad']),
+                        data['stock_minimo'], data['imagen_path'], data['version'])
+
     def tiene_stock_bajo(self) -> bool:
         """Determina si el stock actual está por debajo del mínimo permitido."""
         # Retorna True si el stock es menor o igual al umbral definido
@@ -0,0 +1,115 @@
+"""
+Modelo que representa una promoción de precios.
+Define a qué productos aplica y cuánto se ahorra en una línea del carrito.
+"""
+from datetime import datetime
+from .dinero import multiplicar, porcentaje
+
+class Promocion:
+    """
+    Clase que define una regla de promoción.
+    Atributos:
+        id (str): Identificador único de la promoción.
+        nombre (str): Texto que se muestra en el carrito y la boleta (ej. "2x1 Leche").
+        tipo (str): '2x1', 'n_unidad' (la N-ésima unidad con descuento),
+                    'porcentaje' (descuento directo, ej. toda una categoría) u
+                    'horario' (descuento solo dentro de una franja horaria).
+        codigo (str): Producto al que aplica (None si aplica a una categoría).
+        categoria (str): Categoría a la que aplica (None si aplica a un producto).
+        n (int): Para 'n_unidad', cada cuántas unidades se aplica el descuento.
+        porcentaje (float): Descuento (0-100) sobre las unidades que corresponda.
+        hora_inicio, hora_fin (str): Franja 'HH:MM' para el tipo 'horario'.
+        activa (bool): Permite desactivar la promoción sin borrarla.
+    """
+    TIPOS = ('2x1', 'n_unidad', 'porcentaje', 'horario')
+
+    def __init__(self, id_promocion: str, nombre: str, tipo: str, codigo: str = None, categoria: str = None,
+                 n: int = 2, porcentaje: float = 100.0, hora_inicio: str = None, hora_fin: str = None,
+                 activa: bool = True):
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Tipo de promoción inválido: {tipo}")
+        if (codigo is None) == (categoria is None):
+            raise ValueError("La promoción debe aplicar a un producto o a una categoría.")
+        # Parámetros del descuento (el 2x1 es la 2ª unidad al 100%)
+        n = 2 if tipo == '2x1' else int(n)
+        porcentaje = 100.0 if tipo == '2x1' else float(porcentaje)
+        # n = 0 dividiría por cero al cobrar; más de 100% dejaría la línea en negativo
+        if n < 1:
+            raise ValueError(f"La promoción debe aplicarse cada 1 o más unidades (recibido: {n}).")
+        if not 0 <= porcentaje <= 100:
+            raise ValueError(f"El porcentaje de la promoción debe estar entre 0 y 100 (recibido: {porcentaje}).")
+        # Franja horaria (solo para el tipo 'horario'), normalizada a 'HH:MM' con ceros:
+        # vigente() compara las horas como texto ('9:00' quedaría después de '10:00')
+        if tipo == 'horario':
+            hora_inicio = self._normalizar_hora(hora_inicio)
+            hora_fin = self._normalizar_hora(hora_fin)
+        # Identificación y texto visible
+        self.id = id_promocion
+        self.nombre = nombre
+        self.tipo = tipo
+        # Alcance: un producto o una categoría completa
+        self.codigo = codigo
+        self.categoria = categoria
+        self.n = n
+        self.porcentaje = porcentaje
+        self.hora_inicio = hora_inicio
+        self.hora_fin = hora_fin
+        self.activa = activa
+
+    @staticmethod
+    def _normalizar_hora(hora: str) -> str:
+        """Hora 'H:MM' o 'HH:MM' como 'HH:MM'; ValueError si falta o no es válida."""
+        try:
+            return datetime.strptime(hora, '%H:%M').strftime('%H:%M')
+        except (TypeError, ValueError):
+            raise ValueError(f"La promoción por horario requiere hora_inicio y hora_fin 'HH:MM' (recibido: {hora!r}).")
+
+    def vigente(self, momento: datetime) -> bool:
+        """Indica si la promoción aplica en el momento dado (solo importa para 'horario')."""
+        if self.tipo != 'horario':
+            return True
+        hora = momento.strftime('%H:%M')
+        # Franja que cruza la medianoche (ej. 22:00 a 02:00)
+        if self.hora_inicio > self.hora_fin:
+            return hora >= self.hora_inicio or hora < self.hora_fin
+        return self.hora_inicio <= hora < self.hora_fin
+
+    def ahorro(self, cantidad: float, precio: int, momento: datetime) -> int:
+        """Monto (entero) que se descuenta a una línea de 'cantidad' unidades a 'precio' cada una."""
+        if not self.vigente(momento):
+            return 0
+        if self.tipo in ('2x1', 'n_unidad'):
+            # Solo cuentan las unidades completas (no aplica a fracciones de kg)
+            return porcentaje(int(cantidad // self.n) * precio, self.porcentaje)
+        return porcentaje(multiplicar(precio, cantidad), self.porcentaje)
+
+    def to_dict(self) -> dict:
+        """Convierte la promoción a diccionario para serialización JSON."""
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'tipo': self.tipo,
+            'codigo': self.codigo,
+            'categoria': self.categoria,
+            'n': self.n,
+            'porcentaje': self.porcentaje,
+            'hora_inicio': self.hora_inicio,
+            'hora_fin': self.hora_fin,
+            'activa': self.activa
+        }
+
+    @staticmethod
+    def from_dict(data: dict):
+        """Reconstruye una Promocion desde un diccionario."""
+        return Promocion(
+            data['id'],
+            data['nombre'],
+            data['tipo'],
+            codigo=data.get('codigo'),
+            categoria=data.get('categoria'),
+            n=data.get('n', 2),
+            porcentaje=data.get('porcentaje', 100.0),
+            hora_inicio=data.get('hora_inicio'),
+            hora_fin=data.get('hora_fin'),
+            activa=data.get('activa', True)
+        )
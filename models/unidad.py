@@ -2,6 +2,7 @@
 Modelo que representa una unidad de medida.
 Define cómo se cuantifica un producto (kg, litros, unidades, etc.).
 """
+from typing import Dict
 
 class Unidad:
     """
@@ -9,7 +10,14 @@ class Unidad:
     Atributos:
         nombre (str): Nombre completo de la unidad (ej. "Kilogramo").
         abreviatura (str): Abreviatura común (ej. "kg").
+
+    Las unidades se comparten (flyweight): 'obtener' retorna siempre la misma
+    instancia para un nombre.
     """
+    __slots__ = ('nombre', 'abreviatura')
+    # Registro de instancias compartidas por nombre
+    _registro: Dict[str, 'Unidad'] = {}
+
     def __init__(self, nombre: str, abreviatura: str = ""):
         # Nombre descriptivo de la unidad
         self.nombre = nombre
@@ -23,6 +31,17 @@ class Unidad:
             "abreviatura": self.abreviatura
         }
 
+    @staticmethod
+    def obtener(nombre: str, abreviatura: str = ""):
+        """Retorna la instancia compartida de la unidad (la crea si no existe)."""
+        unidad = Unidad._registro.get(nombre)
+        if unidad is None:
+            # setdefault es atómico: dos hilos no pueden registrar instancias distintas
+            unidad = Unidad._registro.setdefault(nombre, Unidad(nombre, abreviatura))
+        elif abreviatura and not unidad.abreviatura:
+            unidad.abreviatura = abreviatura
+        return unidad
+
     @staticmethod
     def from_dict(data: dict):
         """
@@ -31,9 +50,20 @@ class Unidad:
         """
         # Soporte para cuando la unidad era solo un string (migración de datos antiguos)
         if isinstance(data, str):
-            return Unidad(data)
+            return Unidad.obtener(data)
         # Creación estándar desde diccionario
-        return Unidad(data['nombre'], data.get('abreviatura', ''))
+        return Unidad.obtener(data['nombre'], data.get('abreviatura', ''))
+
+    def __eq__(self, otro):
+        # Permite comparar directamente con el nombre (ej. producto.unidad == 'kg')
+        if isinstance(otro, Unidad):
+            return self.nombre == otro.nombre
+        if isinstance(otro, str):
+            return self.nombre == otro
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.nombre)
 
     def __str__(self):
         # Retorna el nombre de la unidad como representación en string
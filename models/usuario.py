@@ -11,24 +11,27 @@ class Usuario:
 
     Atributos:
         username (str): Nombre de usuario único que se utiliza para iniciar sesión.
-        password (str): Contraseña asociada al usuario para autenticación.
+        password (str): Hash de la contraseña (ver models.credencial); en los archivos
+                        antiguos, la contraseña en texto plano hasta el primer inicio de sesión.
         role (str): Rol asignado al usuario, el cual determina sus permisos
                     dentro del sistema. Puede ser 'admin' o 'comprador'.
     """
 
+    __slots__ = ('username', 'password', 'role')
+
     def __init__(self, username: str, password: str, role: str = 'comprador'):
         """
         Inicializa una nueva instancia de Usuario.
 
         Args:
             username (str): Identificador único del usuario.
-            password (str): Clave secreta utilizada para validar su acceso.
+            password (str): Hash de la clave utilizada para validar su acceso.
             role (str, opcional): Tipo de usuario según sus privilegios.
                                   Por defecto se asigna 'comprador'.
         """
         # Asigna el nombre de usuario
         self.username = username
-        # Asigna la contraseña (en un sistema real debería estar hasheada)
+        # Asigna la contraseña ya hasheada (el controlador calcula el hash)
         self.password = password
         # Asigna el rol que define los permisos ('admin' o 'comprador')
         self.role = role
@@ -1,19 +1,84 @@
 """
 Modelo que representa una venta realizada.
 Contiene la información de la transacción, incluyendo items, fecha y total.
+Los montos (precios, subtotales, ahorros y total) son enteros (ver models.dinero).
 """
+import sys
 from datetime import datetime
+from typing import List
 from .producto import Producto
+from .dinero import multiplicar, porcentaje, redondear, repartir
+
+class ItemVenta:
+    """
+    Línea de una venta, en formato compacto para mantener todo el historial en memoria.
+    Usa __slots__ (sin diccionario por objeto) y los textos que se repiten en miles de
+    líneas (código, nombre, unidad, promoción) se internan: cada valor distinto existe
+    una sola vez en memoria. El diccionario solo se arma al serializar (to_dict).
+    """
+    __slots__ = ('codigo', 'nombre', 'cantidad', 'precio_unitario', 'subtotal', 'unidad', 'promocion', 'ahorro')
+
+    def __init__(self, codigo: str, nombre: str, cantidad: float, precio_unitario: int, subtotal: int,
+                 unidad: str, promocion: str = None, ahorro: int = 0):
+        # Datos del producto al momento de la venta (se conservan aunque luego cambie)
+        self.codigo = sys.intern(codigo)
+        self.nombre = sys.intern(nombre)
+        self.unidad = sys.intern(unidad) if unidad else unidad
+        # Cantidad vendida, precio unitario y subtotal (neto de la promoción, si hubo)
+        self.cantidad = cantidad
+        self.precio_unitario = precio_unitario
+        self.subtotal = subtotal
+        # Promoción aplicada a la línea y monto ahorrado
+        self.promocion = sys.intern(promocion) if promocion else None
+        self.ahorro = ahorro
+
+    def to_dict(self) -> dict:
+        """Convierte la línea a diccionario para serialización JSON."""
+        datos = {
+            'codigo': self.codigo,
+            'nombre': self.nombre,
+            'cantidad': self.cantidad,
+            'precio_unitario': self.precio_unitario,
+            'subtotal': self.subtotal,
+            'unidad': self.unidad
+        }
+        # Las claves de promoción solo se guardan cuando se aplicó una
+        if self.promocion:
+            datos['promocion'] = self.promocion
+            datos['ahorro'] = self.ahorro
+        return datos
+
+    @staticmethod
+    def from_dict(data: dict):
+        """Reconstruye una línea desde un diccionario."""
+        # Los archivos antiguos guardaban los montos como float
+        return ItemVenta(data['codigo'], data['nombre'], data['cantidad'], redondear(data['precio_unitario']),
+                         redondear(data['subtotal']), data.get('unidad'), data.get('promocion'),
+                         redondear(data.get('ahorro', 0)))
+
+    @staticmethod
+    def desde_registro(data: dict):
+        """Crea la línea desde un registro en el formato actual (unidad siempre presente)."""
+        if 'promocion' in data:
+            return ItemVenta(data['codigo'], data['nombre'], data['cantidad'], data['precio_unitario'],
+                             data['subtotal'], data['unidad'], data['promocion'], data['ahorro'])
+        return ItemVenta(data['codigo'], data['nombre'], data['cantidad'], data['precio_unitario'],
+                         data['subtotal'], data['unidad'])
+
 
 class Venta:
     """
     Clase que define una transacción de venta.
     Atributos:
         id (int): Identificador único de la venta.
-        items (list): Lista de diccionarios con los detalles de los productos vendidos.
+        items (list): Lista de ItemVenta con los detalles de los productos vendidos.
         fecha (datetime): Fecha y hora de la transacción.
-        total (float): Monto total de la venta.
+        total (int): Monto total de la venta.
+        descuento (float): Porcentaje de descuento aplicado al total.
     """
+    # Todo el historial se mantiene en memoria: sin diccionario por objeto
+    __slots__ = ('id', 'items', 'fecha', 'total', 'descuento')
+
     def __init__(self, id_venta: int = None):
         # ID único de la venta (asignado por el controlador)
         self.id = id_venta
@@ -22,7 +87,7 @@ class Venta:
         # Fecha y hora actual de creación de la venta
         self.fecha = datetime.now()
         # Acumulador del monto total de la venta
-        self.total = 0.0
+        self.total = 0
         # Descuento aplicado (porcentaje o monto fijo, aquí asumiremos porcentaje por simplicidad en la vista)
         self.descuento = 0.0
     
@@ -31,31 +96,61 @@ class Venta:
         Agrega un producto a la venta y actualiza el total.
         Calcula el subtotal basado en el precio actual del producto.
         """
-        # Calcula el costo total para este item (precio * cantidad)
-        subtotal = producto.precio * cantidad
+        # Calcula el costo total para este item (precio * cantidad, redondeado si es por kg)
+        subtotal = multiplicar(producto.precio, cantidad)
         
         # Agrega el detalle del item a la lista
         # Guardamos una copia de los datos relevantes para mantener el histórico
         # incluso si el producto cambia de precio o nombre en el futuro
-        self.items.append({
-            'codigo': producto.codigo,
-            'nombre': producto.nombre,
-            'cantidad': cantidad,
-            'precio_unitario': producto.precio,
-            'subtotal': subtotal,
+        self.items.append(ItemVenta(
+            producto.codigo,
+            producto.nombre,
+            cantidad,
+            producto.precio,
+            subtotal,
             # Guardamos la unidad para saber si fue kg, unidades, etc.
-            'unidad': producto.unidad.nombre if hasattr(producto.unidad, 'nombre') else producto.unidad
-        })
+            producto.unidad.nombre if hasattr(producto.unidad, 'nombre') else producto.unidad
+        ))
         # Actualiza el total general de la venta
         self.total += subtotal
+
+    def aplicar_promocion(self, indice: int, nombre: str, ahorro: int):
+        """
+        Descuenta el ahorro de una promoción a un item ya agregado.
+        El subtotal del item queda neto del ahorro, así los reportes de ingresos
+        no necesitan conocer las promociones.
+        """
+        item = self.items[indice]
+        item.promocion = sys.intern(nombre)
+        item.ahorro = ahorro
+        item.subtotal -= ahorro
+        self.total -= ahorro
+
+    def aplicar_descuento(self, descuento: float):
+        """Aplica un descuento porcentual (0-100) al total ya rebajado por las promociones."""
+        self.descuento = descuento
+        self.total -= porcentaje(self.total, descuento)
+
+    def netos(self) -> List[int]:
+        """
+        Ingreso neto de cada item: su subtotal menos la parte del descuento de la venta
+        que le corresponde. Los netos suman exactamente el total de la venta, así los
+        reportes por producto o categoría cuadran con los ingresos totales.
+        """
+        return repartir(self.total, [item.subtotal for item in self.items])
+
+    @property
+    def fecha_texto(self) -> str:
+        """Fecha en el formato con que se guarda y se muestra ('YYYY-MM-DD HH:MM:SS')."""
+        return self.fecha.strftime('%Y-%m-%d %H:%M:%S')
     
     def to_dict(self) -> dict:
         """Convierte la venta a diccionario para serialización JSON."""
         return {
             'id': self.id,
             # Convertimos la fecha a string para poder guardarla en JSON
-            'fecha': self.fecha.strftime('%Y-%m-%d %H:%M:%S'),
-            'items': self.items,
+            'fecha': self.fecha_texto,
+            'items': [item.to_dict() for item in self.items],
             'total': self.total,
             'descuento': self.descuento
         }
@@ -65,10 +160,21 @@ class Venta:
         """Reconstruye un objeto Venta desde un diccionario."""
         # Crea una nueva instancia de Venta
         venta = Venta(data['id'])
-        # Parsea la fecha desde el string guardado
-        venta.fecha = datetime.strptime(data['fecha'], '%Y-%m-%d %H:%M:%S')
+        # Parsea la fecha desde el string guardado (fromisoformat es mucho más rápido que strptime)
+        venta.fecha = datetime.fromisoformat(data['fecha'])
         # Restaura los items y el total
-        venta.items = data['items']
-        venta.total = data['total']
+        venta.items = [ItemVenta.from_dict(item) for item in data['items']]
+        venta.total = redondear(data['total'])
         venta.descuento = data.get('descuento', 0.0)
         return venta
+
+    @staticmethod
+    def desde_registro(data: dict):
+        """Crea la venta desde un registro en el formato actual (sin valores por defecto)."""
+        venta = Venta(data['id'])
+        venta.fecha = datetime.fromisoformat(data['fecha'])
+        venta.items = [ItemVenta.desde_registro(item) for item in data['items']]
+        venta.total = data['total']
+        venta.descuento = data['descuento']
+        return venta
+
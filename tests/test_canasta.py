@@ -0,0 +1,72 @@
+"""Pruebas de la regeneración en segundo plano de las reglas de canasta."""
+
+import io
+import threading
+from contextlib import redirect_stdout
+
+import pytest
+
+from controllers.canasta_controller import CanastaController
+from controllers.producto_controller import ProductoController
+from controllers.venta_controller import VentaController
+
+
+@pytest.fixture
+def controladores(tmp_path):
+    with redirect_stdout(io.StringIO()):
+        productos = ProductoController(str(tmp_path / 'productos.json'))
+        for producto in productos.productos.values():
+            producto.stock = 1000
+        productos.guardar_productos()
+        ventas = VentaController(productos, str(tmp_path / 'ventas.json'))
+    codigos = sorted(productos.productos)
+    canasta = CanastaController(ventas, soporte_minimo=0.1, confianza_minima=0.2)
+    return ventas, canasta, codigos
+
+
+def vender(ventas, items):
+    with redirect_stdout(io.StringIO()):
+        ventas.realizar_venta(items)
+
+
+def test_las_consultas_no_esperan_a_la_regeneracion(controladores):
+    ventas, canasta, (a, b, c, *_) = controladores
+    for _ in range(5):
+        vender(ventas, [(a, 1), (b, 1)])
+    assert canasta.esperar_reglas(5)
+    anteriores = canasta.obtener_sugerencias([a])
+    assert anteriores == [b]
+
+    # Se frena la regeneración para ver qué responden las consultas mientras tanto
+    liberar = threading.Event()
+    generar = canasta._generar_reglas
+
+    def generar_lento(*args):
+        liberar.wait(5)
+        return generar(*args)
+
+    canasta._generar_reglas = generar_lento
+    for _ in range(20):
+        vender(ventas, [(a, 1), (c, 1)])
+    # La consulta responde al instante con las reglas anteriores
+    assert canasta.obtener_sugerencias([a]) == anteriores
+    assert not canasta.esperar_reglas(0.05)
+
+    liberar.set()
+    assert canasta.esperar_reglas(5)
+    assert canasta.obtener_sugerencias([a])[0] == c
+
+
+def test_las_reglas_en_segundo_plano_coinciden_con_un_analisis_completo(controladores):
+    ventas, canasta, (a, b, c, d, *_) = controladores
+    canastas = [[(a, 1), (b, 2)], [(a, 1), (c, 1)], [(b, 1), (c, 1), (d, 1)], [(a, 1), (b, 1), (d, 1)]]
+    hilos = [threading.Thread(target=vender, args=(ventas, canastas[i % len(canastas)])) for i in range(40)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert canasta.esperar_reglas(5)
+    incrementales = canasta.reglas
+
+    canasta.analizar()
+    assert canasta.reglas == incrementales
@@ -0,0 +1,78 @@
+"""Pruebas de la caché de la clasificación ABC."""
+
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from controllers.clasificacion_abc_controller import ClasificacionABCController
+from controllers.producto_controller import ProductoController
+from controllers.resumen_controller import ResumenDiarioController
+from controllers.venta_controller import VentaController
+from models.producto import Producto
+
+
+@pytest.fixture
+def controladores(tmp_path):
+    with redirect_stdout(io.StringIO()):
+        productos = ProductoController(str(tmp_path / 'productos.json'))
+        for producto in productos.productos.values():
+            producto.stock = 1000
+        productos.guardar_productos()
+        ventas = VentaController(productos, str(tmp_path / 'ventas.json'))
+        resumen = ResumenDiarioController(ventas, str(tmp_path / 'resumen_diario.json'), 60)
+    abc = ClasificacionABCController(resumen, productos)
+    yield productos, ventas, abc
+    resumen.guardar_pendiente()
+
+
+def editar(productos, codigo, **cambios):
+    # Como la interfaz: se edita una copia y se guarda con actualizar_producto
+    producto = Producto.from_dict({**productos.productos[codigo].to_dict(), **cambios})
+    with redirect_stdout(io.StringIO()):
+        assert productos.actualizar_producto(producto)
+
+
+def test_un_cambio_de_precio_invalida_la_clasificacion(controladores):
+    productos, ventas, abc = controladores
+    a, b = sorted(productos.productos)[:2]
+    editar(productos, a, precio=1000)
+    editar(productos, b, precio=1000)
+    with redirect_stdout(io.StringIO()):
+        ventas.realizar_venta([(a, 10), (b, 1)])
+    assert abc.obtener_clase(a) == 'A'
+    assert abc.obtener_clase(b) != 'A'
+
+    # Sin ventas nuevas, el precio de b pasa a dominar los ingresos
+    editar(productos, b, precio=1000000)
+    assert abc.obtener_clase(b) == 'A'
+    assert abc.obtener_clase(a) != 'A'
+
+
+def test_productos_agregados_y_eliminados_invalidan_la_clasificacion(controladores):
+    productos, ventas, abc = controladores
+    codigo = sorted(productos.productos)[0]
+    with redirect_stdout(io.StringIO()):
+        ventas.realizar_venta([(codigo, 1)])
+    abc.obtener_clasificacion()
+
+    nuevo = Producto.from_dict({**productos.productos[codigo].to_dict(), 'codigo': 'nuevo-1', 'nombre': 'Nuevo'})
+    with redirect_stdout(io.StringIO()):
+        assert productos.agregar_producto(nuevo)
+    assert 'nuevo-1' in abc.obtener_clasificacion()
+
+    with redirect_stdout(io.StringIO()):
+        assert productos.eliminar_producto('nuevo-1')
+    assert 'nuevo-1' not in abc.obtener_clasificacion()
+
+
+def test_las_ventas_de_stock_no_invalidan_por_si_solas(controladores):
+    productos, ventas, abc = controladores
+    codigo = sorted(productos.productos)[0]
+    with redirect_stdout(io.StringIO()):
+        ventas.realizar_venta([(codigo, 100)])
+    abc.obtener_clasificacion()
+    # Una venta pequeña (bajo la tolerancia) solo notifica stock_actualizado: la caché sigue vigente
+    with redirect_stdout(io.StringIO()):
+        ventas.realizar_venta([(codigo, 1)])
+    assert abc._vigente
@@ -0,0 +1,91 @@
+"""Prueba de estrés de las ventas concurrentes (varias cajas sobre el mismo controlador)."""
+
+import io
+import random
+import threading
+import time
+from contextlib import redirect_stdout
+
+import pytest
+
+from controllers.producto_controller import ProductoController
+from controllers.venta_controller import VentaController
+
+STOCK_INICIAL = 400
+
+
+@pytest.fixture
+def controladores(tmp_path):
+    # Los mensajes de cada venta se descartan (miles de líneas)
+    with redirect_stdout(io.StringIO()):
+        productos = ProductoController(str(tmp_path / 'productos.json'))
+        for producto in productos.productos.values():
+            producto.stock = STOCK_INICIAL
+        productos.guardar_productos()
+        ventas = VentaController(productos, str(tmp_path / 'ventas.json'))
+    return productos, ventas, str(tmp_path / 'productos.json')
+
+
+@pytest.mark.lento
+@pytest.mark.parametrize('semilla', [0, 1])
+def test_cajas_concurrentes_no_sobrevenden(controladores, semilla, hilos=8, operaciones=150):
+    """
+    Lanza 'hilos' cajas que venden al mismo tiempo (realizar_venta y, una de cada
+    cinco veces, realizar_ventas_lote) sobre pocos productos con stock limitado, para
+    que compitan por las mismas unidades hasta agotarlas. Verifica que:
+    - ningún stock quede negativo (tampoco durante la prueba),
+    - stock_final + vendido == stock_inicial para cada producto,
+    - los IDs de las ventas sean únicos y el archivo guardado coincida con la memoria.
+    """
+    productos, ventas, archivo_productos = controladores
+    codigos = sorted(productos.productos)
+    negativos = []
+    terminado = threading.Event()
+
+    def caja(numero):
+        azar = random.Random(semilla * 1000 + numero)
+        for _ in range(operaciones):
+            items = [(azar.choice(codigos), azar.randint(1, 3)) for _ in range(azar.randint(1, 4))]
+            if azar.random() < 0.2:
+                ventas.realizar_ventas_lote([items, [(azar.choice(codigos), 1)]])
+            else:
+                ventas.realizar_venta(items)
+
+    def vigilar():
+        # Revisa el stock mientras las cajas venden
+        while not terminado.is_set():
+            for codigo in codigos:
+                if productos.productos[codigo].stock < 0:
+                    negativos.append((codigo, productos.productos[codigo].stock))
+            time.sleep(0.001)
+
+    cajas = [threading.Thread(target=caja, args=(i,), name=f'caja-{i}') for i in range(hilos)]
+    vigilante = threading.Thread(target=vigilar, name='vigilante')
+    with redirect_stdout(io.StringIO()):
+        vigilante.start()
+        for hilo in cajas:
+            hilo.start()
+        for hilo in cajas:
+            hilo.join()
+        terminado.set()
+        vigilante.join()
+
+    vendido = {codigo: 0 for codigo in codigos}
+    for venta in ventas.ventas:
+        for item in venta.items:
+            vendido[item.codigo] += item.cantidad
+    ids = [venta.id for venta in ventas.ventas]
+
+    assert not negativos, f"Stock negativo durante la prueba: {negativos[:5]}"
+    for codigo in codigos:
+        stock = productos.productos[codigo].stock
+        assert stock >= 0
+        assert stock + vendido[codigo] == STOCK_INICIAL
+    assert len(ids) == len(set(ids)), "IDs de venta repetidos"
+    # Las cajas compitieron de verdad: algún producto se agotó
+    assert any(productos.productos[codigo].stock == 0 for codigo in codigos)
+
+    with redirect_stdout(io.StringIO()):
+        en_disco = ProductoController(archivo_productos)
+    for codigo in codigos:
+        assert en_disco.productos[codigo].stock == productos.productos[codigo].stock
@@ -0,0 +1,100 @@
+"""Pruebas del historial del inventario (snapshots en .jsonl y deltas por offset)."""
+
+import io
+import json
+import os
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import pytest
+
+from controllers.inventario_historico_controller import InventarioHistoricoController
+from controllers.producto_controller import ProductoController
+
+
+@pytest.fixture
+def rutas(tmp_path):
+    return {
+        'productos': str(tmp_path / 'productos.json'),
+        'snapshots': str(tmp_path / 'inventario_snapshots.jsonl'),
+        'deltas': str(tmp_path / 'inventario_deltas.jsonl'),
+    }
+
+
+def crear(rutas, intervalo=500):
+    with redirect_stdout(io.StringIO()):
+        productos = ProductoController(rutas['productos'])
+        historico = InventarioHistoricoController(productos, rutas['snapshots'], rutas['deltas'], intervalo)
+    return productos, historico
+
+
+def cambiar_stock(productos, codigo, stock):
+    with redirect_stdout(io.StringIO()):
+        productos.productos[codigo].stock = stock
+        productos._notificar('stock_actualizado', productos.productos[codigo])
+
+
+def lineas(ruta):
+    with open(ruta, 'rb') as f:
+        return f.read().splitlines()
+
+
+def test_cada_snapshot_se_agrega_como_una_linea(rutas):
+    productos, historico = crear(rutas, intervalo=3)
+    codigo = sorted(productos.productos)[0]
+    assert len(lineas(rutas['snapshots'])) == 1
+
+    for stock in range(7):
+        cambiar_stock(productos, codigo, stock)
+        # Se espera cada pedido: los que llegan mientras se toma un snapshot se juntan
+        assert historico.esperar_snapshots(5)
+
+    snapshots = [json.loads(linea) for linea in lineas(rutas['snapshots'])]
+    assert len(snapshots) == 3
+    # Cada snapshot apunta al final del archivo de deltas en el momento en que se tomó
+    tamano_deltas = len(b''.join(linea + b'\n' for linea in lineas(rutas['deltas'])))
+    assert all(0 <= s['offset_delta'] <= tamano_deltas for s in snapshots)
+    assert snapshots[-1]['offset_delta'] > snapshots[0]['offset_delta']
+
+
+def test_el_inventario_en_fecha_reaplica_los_deltas_desde_el_offset(rutas):
+    productos, historico = crear(rutas, intervalo=4)
+    codigo = sorted(productos.productos)[0]
+    for stock in (40, 30, 20, 10, 5):
+        cambiar_stock(productos, codigo, stock)
+    assert historico.esperar_snapshots(5)
+
+    estado = historico.inventario_en_fecha(datetime.now())
+    assert estado == {c: [p.stock, p.precio] for c, p in productos.productos.items()}
+    assert historico.valor_en_fecha(datetime.now()) == productos.valor_inventario()
+    assert historico.inventario_en_fecha(datetime(2000, 1, 1)) is None
+
+
+def test_otra_instancia_ve_los_snapshots_y_deltas_agregados(rutas):
+    productos, historico = crear(rutas, intervalo=2)
+    _, otro = crear(rutas, intervalo=2)
+    codigo = sorted(productos.productos)[0]
+    for stock in (12, 11, 10):
+        cambiar_stock(productos, codigo, stock)
+    assert historico.esperar_snapshots(5)
+
+    # La segunda instancia indexa lo agregado al archivo al consultar
+    assert otro.inventario_en_fecha(datetime.now())[codigo][0] == 10
+
+
+def test_los_snapshots_del_formato_anterior_se_migran(rutas):
+    productos, _ = crear(rutas)
+    codigo = sorted(productos.productos)[0]
+    estado = productos.estado_inventario()
+    anterior = rutas['snapshots'][:-1]
+    with open(anterior, 'w', encoding='utf-8') as f:
+        json.dump([{'fecha': '2020-01-01 00:00:00', 'indice_delta': 1, 'productos': estado}], f)
+    with open(rutas['deltas'], 'w', encoding='utf-8') as f:
+        f.write(json.dumps(['2020-01-01 00:00:01', codigo, 1, 100]) + '\n')
+        f.write(json.dumps(['2020-01-01 00:00:02', codigo, 2, 100]) + '\n')
+    os.remove(rutas['snapshots'])
+
+    _, historico = crear(rutas)
+    # El delta 0 es anterior al snapshot; solo se reaplica el 1
+    assert historico.inventario_en_fecha(datetime(2020, 1, 1, 0, 0, 1))[codigo] == estado[codigo]
+    assert historico.inventario_en_fecha(datetime(2020, 1, 1, 0, 0, 2))[codigo] == [2, 100]
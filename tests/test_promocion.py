@@ -0,0 +1,50 @@
+"""Pruebas de la validación y la vigencia de las promociones."""
+
+from datetime import datetime
+
+import pytest
+
+from models.promocion import Promocion
+
+
+def test_horario_sin_ceros_se_normaliza_y_respeta_la_franja():
+    promocion = Promocion('p1', 'Mañana', 'horario', codigo='001', porcentaje=10,
+                          hora_inicio='9:00', hora_fin='11:00')
+    assert (promocion.hora_inicio, promocion.hora_fin) == ('09:00', '11:00')
+    # Sin normalizar, '9:00' > '11:00' como texto y la franja se tomaba como si cruzara la medianoche
+    assert not promocion.vigente(datetime(2024, 5, 1, 8, 0))
+    assert promocion.vigente(datetime(2024, 5, 1, 9, 30))
+    assert not promocion.vigente(datetime(2024, 5, 1, 11, 0))
+
+
+def test_horario_que_cruza_la_medianoche():
+    promocion = Promocion('p2', 'Noche', 'horario', codigo='001', hora_inicio='22:00', hora_fin='2:00')
+    assert promocion.vigente(datetime(2024, 5, 1, 23, 0))
+    assert promocion.vigente(datetime(2024, 5, 1, 1, 59))
+    assert not promocion.vigente(datetime(2024, 5, 1, 12, 0))
+
+
+@pytest.mark.parametrize('inicio, fin', [(None, '11:00'), ('9:00', None), ('25:00', '26:00'), ('nueve', '11:00')])
+def test_horario_sin_franja_valida_se_rechaza(inicio, fin):
+    with pytest.raises(ValueError):
+        Promocion('p3', 'Mal', 'horario', codigo='001', hora_inicio=inicio, hora_fin=fin)
+
+
+@pytest.mark.parametrize('n', [0, -1])
+def test_n_unidad_menor_a_uno_se_rechaza(n):
+    with pytest.raises(ValueError):
+        Promocion('p4', 'N-ésima', 'n_unidad', codigo='001', n=n, porcentaje=50)
+
+
+@pytest.mark.parametrize('porcentaje', [-5, 100.01, 150])
+def test_porcentaje_fuera_de_rango_se_rechaza(porcentaje):
+    with pytest.raises(ValueError):
+        Promocion('p5', 'Descuento', 'porcentaje', categoria='Lácteos', porcentaje=porcentaje)
+
+
+def test_limites_validos_se_aceptan():
+    assert Promocion('p6', 'Cada una', 'n_unidad', codigo='001', n=1, porcentaje=0).ahorro(3, 1000, datetime.now()) == 0
+    assert Promocion('p7', 'Gratis', 'porcentaje', codigo='001', porcentaje=100).ahorro(2, 1000, datetime.now()) == 2000
+    # El 2x1 fija sus parámetros aunque se pasen otros
+    dos_por_uno = Promocion('p8', '2x1', '2x1', codigo='001', n=0, porcentaje=150)
+    assert (dos_por_uno.n, dos_por_uno.porcentaje) == (2, 100.0)
@@ -0,0 +1,55 @@
+"""Pruebas de los reportes sobre todo el historial (secuencial y en paralelo)."""
+
+import random
+from types import SimpleNamespace
+
+from controllers.reporte_controller import ReporteController
+from models.venta import Venta
+
+
+def historial(cantidad, semilla=0):
+    azar = random.Random(semilla)
+    ventas = []
+    for i in range(cantidad):
+        items = [{'codigo': str(azar.randint(0, 19)), 'nombre': 'Producto', 'cantidad': 1,
+                  'precio_unitario': 0, 'subtotal': azar.randint(500, 9000), 'unidad': 'unidades'}
+                 for _ in range(azar.randint(1, 4))]
+        ventas.append(Venta.from_dict({
+            'id': i + 1,
+            'fecha': f"{azar.randint(2023, 2024)}-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d} 10:00:00",
+            'items': items,
+            'total': sum(item['subtotal'] for item in items) * 9 // 10,
+            'descuento': 10.0,
+        }))
+    return ventas
+
+
+def controlador(ventas, **opciones):
+    productos = {str(i): SimpleNamespace(categoria=SimpleNamespace(nombre=f"Categoria {i % 3}")) for i in range(20)}
+    return ReporteController(SimpleNamespace(ventas=ventas), SimpleNamespace(productos=productos), **opciones)
+
+
+def test_por_defecto_calcula_en_secuencia():
+    reportes = controlador(historial(50))
+    assert reportes.procesos == 1
+    meses = reportes.ingresos_mensuales_por_categoria()
+    # Los ingresos por categoría cuadran exactamente con los totales de las ventas
+    assert sum(sum(m.values()) for m in meses.values()) == sum(v.total for v in reportes.venta_controller.ventas)
+
+
+def test_el_calculo_en_paralelo_coincide_con_el_secuencial():
+    reportes = controlador(historial(400), procesos=2)
+    avance = []
+    serial = reportes.ingresos_mensuales_por_categoria(paralelo=False)
+    paralelo = reportes.ingresos_mensuales_por_categoria(progreso=lambda i, total: avance.append((i, total)),
+                                                          paralelo=True)
+    assert paralelo == serial
+    assert avance[-1][0] == avance[-1][1]
+
+
+def test_las_ventas_nuevas_se_agregan_a_las_columnas():
+    ventas = historial(30)
+    reportes = controlador(ventas)
+    reportes.comparacion_interanual()
+    ventas.extend(historial(10, semilla=1))
+    assert reportes.ingresos_mensuales_por_categoria() == controlador(list(ventas)).ingresos_mensuales_por_categoria()
@@ -0,0 +1,116 @@
+"""Pruebas del resumen diario: escritura diferida del archivo e ingresos por día."""
+
+import io
+import json
+import time
+from contextlib import redirect_stdout
+from datetime import date
+
+import pytest
+
+from controllers.producto_controller import ProductoController
+from controllers.resumen_controller import ResumenDiarioController
+from controllers.supermercado_controller import SupermercadoController
+from controllers.venta_controller import VentaController
+
+
+@pytest.fixture
+def crear(tmp_path):
+    def crear(intervalo_guardado):
+        with redirect_stdout(io.StringIO()):
+            productos = ProductoController(str(tmp_path / 'productos.json'))
+            ventas = VentaController(productos, str(tmp_path / 'ventas.json'))
+            resumen = ResumenDiarioController(ventas, str(tmp_path / 'resumen_diario.json'), intervalo_guardado)
+        # Cuenta las escrituras del archivo
+        escrituras = []
+        guardar = resumen.guardar_resumen
+
+        def guardar_contando():
+            escrituras.append(time.perf_counter())
+            guardar()
+
+        resumen.guardar_resumen = guardar_contando
+        return productos, ventas, resumen, escrituras
+    return crear
+
+
+def vender(ventas, items, veces=1):
+    with redirect_stdout(io.StringIO()):
+        for _ in range(veces):
+            ventas.realizar_venta(items)
+
+
+def en_disco(resumen):
+    with open(resumen.archivo_resumen, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_las_ventas_no_escriben_el_archivo(crear):
+    productos, ventas, resumen, escrituras = crear(intervalo_guardado=60)
+    codigo = next(iter(productos.productos))
+    vender(ventas, [(codigo, 1)], veces=5)
+
+    assert escrituras == []
+    assert en_disco(resumen)['ultimo_id'] == 0
+    assert resumen.ultimo_id == 5
+    resumen.guardar_pendiente()
+
+
+def test_el_temporizador_escribe_una_vez_por_intervalo(crear):
+    productos, ventas, resumen, escrituras = crear(intervalo_guardado=0.2)
+    codigo = next(iter(productos.productos))
+    vender(ventas, [(codigo, 1)], veces=5)
+
+    limite = time.monotonic() + 5
+    while not escrituras and time.monotonic() < limite:
+        time.sleep(0.01)
+    time.sleep(0.3)
+    # Las cinco ventas se escriben juntas en una sola escritura
+    assert len(escrituras) == 1
+    assert en_disco(resumen)['ultimo_id'] == 5
+    assert resumen._temporizador is None
+
+
+def test_guardar_pendiente_escribe_al_cerrar(crear):
+    productos, ventas, resumen, escrituras = crear(intervalo_guardado=60)
+    codigo = next(iter(productos.productos))
+    vender(ventas, [(codigo, 2)], veces=3)
+
+    resumen.guardar_pendiente()
+    assert len(escrituras) == 1
+    assert en_disco(resumen)['ultimo_id'] == 3
+    # El temporizador programado se canceló y sin ventas nuevas no se vuelve a escribir
+    assert resumen._temporizador is None
+    resumen.guardar_pendiente()
+    assert len(escrituras) == 1
+
+
+def test_supermercado_cerrar_guarda_el_resumen(tmp_path):
+    archivos = {nombre: str(tmp_path / archivo) for nombre, archivo in (
+        ('archivo_productos', 'productos.json'), ('archivo_ventas', 'ventas.json'),
+        ('archivo_usuarios', 'usuarios.json'), ('archivo_resumen', 'resumen_diario.json'),
+        ('archivo_snapshots', 'inventario_snapshots.jsonl'), ('archivo_deltas', 'inventario_deltas.jsonl'),
+        ('archivo_promociones', 'promociones.json'))}
+    with redirect_stdout(io.StringIO()):
+        supermercado = SupermercadoController(**archivos)
+        codigo = next(iter(supermercado.producto_controller.productos))
+        supermercado.venta_controller.realizar_venta([(codigo, 1)])
+        supermercado.cerrar()
+    assert en_disco(supermercado.resumen_controller)['ultimo_id'] == 1
+
+
+def test_un_lote_con_fechas_pasadas_no_cambia_los_ingresos_de_hoy(crear):
+    productos, ventas, resumen, _ = crear(intervalo_guardado=60)
+    codigo = next(iter(productos.productos))
+    vender(ventas, [(codigo, 1)])
+    vender(ventas, [(codigo, 2)])
+    hoy = resumen.ingresos_ultimos_dias(1)
+    # La venta importada queda al final del historial aunque su fecha sea anterior
+    with redirect_stdout(io.StringIO()):
+        ventas.realizar_ventas_lote([{'items': [(codigo, 1)], 'fecha': '2020-01-01 10:00:00'}])
+
+    esperado = sum(v.total for v in ventas.ventas if v.fecha.date() == date.today())
+    assert hoy == esperado > 0
+    assert resumen.ingresos_ultimos_dias(1) == esperado
+    assert resumen.ingresos_rango(date(2020, 1, 1), date(2020, 1, 1)) == ventas.ventas[-1].total
+    resumen.guardar_pendiente()
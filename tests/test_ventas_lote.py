@@ -0,0 +1,67 @@
+"""Pruebas de la validación de las ventas en lote."""
+
+import io
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import pytest
+
+from controllers.producto_controller import ProductoController
+from controllers.venta_controller import VentaController
+
+
+@pytest.fixture
+def controladores(tmp_path):
+    with redirect_stdout(io.StringIO()):
+        productos = ProductoController(str(tmp_path / 'productos.json'))
+        for producto in productos.productos.values():
+            producto.stock = 10
+        productos.guardar_productos()
+        ventas = VentaController(productos, str(tmp_path / 'ventas.json'))
+    return productos, ventas
+
+
+def procesar(ventas, lote):
+    with redirect_stdout(io.StringIO()):
+        return ventas.realizar_ventas_lote(lote)
+
+
+def test_fecha_invalida_se_rechaza_sin_afectar_al_resto_del_lote(controladores):
+    productos, ventas = controladores
+    a, b = sorted(productos.productos)[:2]
+    reporte = procesar(ventas, [
+        {'items': [(a, 1)], 'fecha': '2024-05-01 10:00:00'},
+        {'items': [(a, 2)], 'fecha': '01/05/2024'},
+        [(b, 3)],
+    ])
+
+    assert [r['aceptada'] for r in reporte] == [True, False, True]
+    assert 'Fecha inválida' in reporte[1]['motivo']
+    assert [v.fecha for v in ventas.ventas][0] == datetime(2024, 5, 1, 10, 0)
+    # Solo se descontó el stock de las ventas aceptadas
+    assert productos.productos[a].stock == 9
+    assert productos.productos[b].stock == 7
+    # Los candados de los productos quedaron libres: se puede seguir vendiendo
+    with redirect_stdout(io.StringIO()):
+        assert ventas.realizar_venta([(a, 1)]) is not None
+
+
+@pytest.mark.parametrize('entrada, motivo', [
+    ([('001',)], 'Item inválido'),
+    ([None], 'Item inválido'),
+    ([(['001'], 1)], 'Código de producto inválido'),
+    ([('001', 'dos')], 'Cantidad inválida'),
+    ([('001', 0)], 'Cantidad inválida'),
+    ({'items': [('001', 1)], 'descuento': 150}, 'Descuento inválido'),
+    ({'items': [('001', 1)], 'fecha': 20240501}, 'Fecha inválida'),
+    ([], 'Venta sin items'),
+    ([('999', 1)], 'no encontrado'),
+])
+def test_ventas_mal_formadas_se_rechazan_con_motivo(controladores, entrada, motivo):
+    productos, ventas = controladores
+    codigo = sorted(productos.productos)[0]
+    reporte = procesar(ventas, [entrada, [(codigo, 1)]])
+
+    assert reporte[0]['aceptada'] is False
+    assert motivo in reporte[0]['motivo']
+    assert reporte[1]['aceptada'] is True
@@ -0,0 +1,125 @@
+"""Ejecución en segundo plano de las operaciones que leen o escriben archivos.
+
+Returns:
+    class: Clase EjecutorES
+"""
+
+import queue
+import threading
+from typing import Callable, Optional
+
+
+class EjecutorES:
+    """
+    Ejecuta fuera del hilo de Tkinter las operaciones de los controladores que
+    guardan o leen los archivos JSON, para que un disco lento no congele la ventana.
+
+    Las tareas se ejecutan de a una y en el orden en que se enviaron (un solo hilo
+    trabajador), así que el estado de los controladores y los archivos evolucionan
+    igual que si se hubieran ejecutado en la ventana. El resultado de cada tarea se
+    entrega en el hilo de Tkinter: el trabajador lo deja en una cola que la ventana
+    revisa con after().
+
+    al_cambiar_estado(pendientes, texto, fraccion) se llama en el hilo de Tkinter
+    cada vez que empieza o termina una tarea o esta informa su avance con progreso();
+    fraccion es None mientras la tarea no informe avance. Con pendientes == 0 no
+    queda trabajo en curso.
+    """
+
+    def __init__(self, widget, al_cambiar_estado: Optional[Callable[[int, str, Optional[float]], None]] = None):
+        self.widget = widget
+        self.al_cambiar_estado = al_cambiar_estado
+        # Tareas por ejecutar: (texto, trabajo, al_terminar, al_fallar)
+        self._tareas = queue.Queue()
+        # Mensajes del trabajador para la ventana: ('inicio' | 'progreso' | 'fin', ...)
+        self._mensajes = queue.Queue()
+        # Protege la creación y el fin del hilo trabajador
+        self._candado = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        # Tareas enviadas cuyo resultado aún no se entrega (solo se usa en el hilo de Tkinter)
+        self.pendientes = 0
+        self._revisando = False
+        # Tras cerrar() las tareas en curso terminan, pero sus resultados se descartan
+        self._activo = True
+
+    def enviar(self, texto: str, trabajo: Callable[[], object],
+               al_terminar: Optional[Callable[[object], None]] = None,
+               al_fallar: Optional[Callable[[Exception], None]] = None):
+        """
+        Encola trabajo() (se ejecuta en el hilo trabajador) y luego al_terminar(resultado)
+        o al_fallar(excepcion) en el hilo de Tkinter. texto describe la tarea en pantalla.
+        """
+        self.pendientes += 1
+        with self._candado:
+            self._tareas.put((texto, trabajo, al_terminar, al_fallar))
+            if self._hilo is None:
+                # El hilo no es daemon: al salir de la aplicación se completan los guardados en curso
+                self._hilo = threading.Thread(target=self._trabajar, name='ejecutor-es')
+                self._hilo.start()
+        self._cambiar_estado(texto, None)
+        if not self._revisando:
+            self._revisando = True
+            self.widget.after(20, self._revisar)
+
+    def progreso(self, fraccion: float, texto: Optional[str] = None):
+        """Informa el avance (0 a 1) de la tarea en curso. Se llama desde el trabajo."""
+        self._mensajes.put(('progreso', fraccion, texto))
+
+    def cerrar(self):
+        """Deja de entregar resultados (ej. al cerrar sesión); las tareas encoladas igual se completan."""
+        self._activo = False
+
+    def _trabajar(self):
+        """Hilo trabajador: ejecuta las tareas en orden y termina cuando no quedan."""
+        while True:
+            with self._candado:
+                try:
+                    texto, trabajo, al_terminar, al_fallar = self._tareas.get_nowait()
+                except queue.Empty:
+                    self._hilo = None
+                    return
+            self._mensajes.put(('inicio', None, texto))
+            try:
+                resultado = (True, trabajo())
+            except Exception as e:
+                resultado = (False, e)
+            self._mensajes.put(('fin', resultado, (al_terminar, al_fallar)))
+
+    def _revisar(self):
+        """Entrega en el hilo de Tkinter los mensajes del trabajador; se repite mientras haya tareas."""
+        if not self._activo or not self.widget.winfo_exists():
+            return
+        while True:
+            try:
+                tipo, valor, extra = self._mensajes.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == 'inicio':
+                self._cambiar_estado(extra, None)
+            elif tipo == 'progreso':
+                self._cambiar_estado(extra, valor)
+            else:
+                self.pendientes -= 1
+                exito, resultado = valor
+                al_terminar, al_fallar = extra
+                try:
+                    if exito:
+                        if al_terminar:
+                            al_terminar(resultado)
+                    elif al_fallar:
+                        al_fallar(resultado)
+                    else:
+                        print(f"Error en tarea de segundo plano: {resultado}")
+                except Exception as e:
+                    print(f"Error al entregar el resultado de una tarea: {e}")
+                if self.pendientes == 0:
+                    self._cambiar_estado('', None)
+        if self.pendientes > 0:
+            self.widget.after(20, self._revisar)
+        else:
+            self._revisando = False
+
+    def _cambiar_estado(self, texto: Optional[str], fraccion: Optional[float]):
+        """Informa el estado a la ventana (solo desde el hilo de Tkinter)."""
+        if self.al_cambiar_estado:
+            self.al_cambiar_estado(self.pendientes, texto, fraccion)
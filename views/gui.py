@@ -5,11 +5,63 @@ Returns:
 """
 
 import tkinter as tk
+import bisect
 import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
 from models import Producto, Usuario
+from models.categoria import Categoria
+from models.unidad import Unidad
+from models.dinero import a_texto, desde_texto, formatear
 from controllers.supermercado_controller import SupermercadoController
+from views.tabla_virtual import TablaVirtual
+from views.ejecutor import EjecutorES
+from views.miniaturas import CacheMiniaturas
+
+# Tamaños (ancho, alto) de las miniaturas de productos en el catálogo y en el detalle
+TAMANO_MINIATURA_FILA = (32, 32)
+TAMANO_MINIATURA_DETALLE = (300, 300)
+# Ventas por página en el historial de Reportes
+TAMANO_PAGINA_VENTAS = 50
+
+
+def ejecutar_en_segundo_plano(widget, trabajo, al_terminar, al_fallar=None):
+    """
+    Ejecuta trabajo() en un hilo aparte y luego al_terminar(resultado) en el hilo de Tkinter
+    (o al_fallar(excepcion) si falló). El hilo solo deja el resultado en una cola que el
+    widget revisa con after(), porque Tkinter no debe modificarse desde otro hilo.
+    Si el widget se destruye antes de terminar, el resultado se descarta.
+    """
+    cola = queue.Queue(maxsize=1)
+
+    def hilo():
+        try:
+            cola.put((True, trabajo()))
+        except Exception as e:
+            cola.put((False, e))
+
+    def revisar():
+        if not widget.winfo_exists():
+            return
+        try:
+            exito, valor = cola.get_nowait()
+        except queue.Empty:
+            widget.after(20, revisar)
+            return
+        if exito:
+            al_terminar(valor)
+        elif al_fallar:
+            al_fallar(valor)
+        else:
+            messagebox.showerror("Error", str(valor))
+
+    threading.Thread(target=hilo, daemon=True).start()
+    widget.after(20, revisar)
+
 
 class SupermercadoGUI:
     """
@@ -17,12 +69,28 @@ class SupermercadoGUI:
     Maneja las pestañas y la interacción del usuario con el sistema.
     """
     def __init__(self, root, usuario: Usuario, controller: SupermercadoController, on_logout):
+        # Inicio de la construcción, para medir cuánto tarda la ventana en responder
+        self._inicio = time.perf_counter()
+        self.tiempo_primera_interaccion = None
         # Referencias principales
         self.root = root
         self.usuario = usuario
         self.controller = controller
         self.on_logout = on_logout
         self.dark_mode = False # Estado del tema
+        # Identificador del carrito de esta sesión (sus reservas de stock)
+        self.id_carrito = f"{self.usuario.username}-{id(self)}"
+        # Clasificación ABC mostrada en la tabla de inventario (solo administrador)
+        self.clases_abc = {}
+        # Eventos de los controladores aún no aplicados a las tablas (pueden llegar desde otros hilos)
+        self._cola_cambios = queue.Queue()
+        # Las estadísticas de Reportes se recalculan al mostrar la pestaña si hubo cambios
+        self._estadisticas_pendientes = False
+        # Venta enviada a guardar cuyo resultado aún no llega (el carrito queda bloqueado)
+        self.venta_en_curso = False
+        # Códigos leídos por el escáner que aún no se agregan al carrito, y su revisión programada
+        self._cola_escaneos = []
+        self._id_escaneos = None
         
         # Configuración de la ventana principal
         self.root.title(f"Supermercado - {self.usuario.username} ({self.usuario.role})")
@@ -38,10 +106,26 @@ class SupermercadoGUI:
         
         # Inicialización de componentes
         self._setup_header()
+        # Guardados y recargas de archivos en segundo plano, con su avance en el encabezado
+        self.ejecutor = EjecutorES(self.root, self._mostrar_estado_es)
+        # Miniaturas de las imágenes de productos (en memoria y en disco, junto a los datos)
+        carpeta_datos = os.path.dirname(self.controller.producto_controller.archivo_productos)
+        self.miniaturas = CacheMiniaturas(self.root, os.path.join(carpeta_datos, 'miniaturas'))
+        # Las tablas se mantienen al día fila a fila con los eventos de los controladores
+        # (suscrito antes de construir las pestañas para no perder eventos entretanto)
+        self.controller.suscribir_cambios(self._al_cambiar_datos)
         self._setup_notebook()
         
-        # Evento para actualizar datos al cambiar de pestaña
+        # Evento para construir o actualizar la pestaña seleccionada
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change)
+        self._id_revision = self.root.after(100, self._revisar_cambios)
+        # Cuando el bucle de eventos queda libre la ventana ya se dibujó y responde
+        self.root.after_idle(self._informar_primera_interaccion)
+
+    def _informar_primera_interaccion(self):
+        """Registra el tiempo desde el inicio de la construcción hasta que la ventana responde."""
+        self.tiempo_primera_interaccion = time.perf_counter() - self._inicio
+        print(f"Ventana principal lista para interactuar en {self.tiempo_primera_interaccion * 1000:.0f} ms")
 
     def _crear_boton(self, parent, text, command, side=tk.RIGHT, padx=5):
         """Helper para crear botones estandarizados."""
@@ -67,6 +151,35 @@ class SupermercadoGUI:
         for texto, comando in botones:
             self._crear_boton(frame_header, texto, comando)
 
+        # Avance de los guardados en segundo plano (visible solo mientras hay alguno)
+        self.frame_estado = ttk.Frame(frame_header)
+        self.lbl_estado = ttk.Label(self.frame_estado, font=('Helvetica', 9, 'italic'))
+        self.lbl_estado.pack(side=tk.LEFT, padx=5)
+        self.barra_estado = ttk.Progressbar(self.frame_estado, length=120, mode='indeterminate')
+        self.barra_estado.pack(side=tk.LEFT)
+        self._texto_estado = ""
+
+    def _mostrar_estado_es(self, pendientes, texto, fraccion):
+        """Muestra en el encabezado la tarea de segundo plano en curso y su avance."""
+        if pendientes == 0:
+            self.barra_estado.stop()
+            self.frame_estado.pack_forget()
+            return
+        if texto:
+            self._texto_estado = texto
+        sufijo = f" ({pendientes} pendientes)" if pendientes > 1 else ""
+        self.lbl_estado.config(text=self._texto_estado + sufijo)
+        if fraccion is None:
+            # Sin avance informado: barra en movimiento continuo
+            if str(self.barra_estado['mode']) != 'indeterminate':
+                self.barra_estado.config(mode='indeterminate')
+            self.barra_estado.start(15)
+        else:
+            self.barra_estado.stop()
+            self.barra_estado.config(mode='determinate', value=fraccion * 100)
+        if not self.frame_estado.winfo_ismapped():
+            self.frame_estado.pack(side=tk.LEFT, padx=20)
+
     def toggle_theme(self):
         """Alterna entre modo claro y oscuro."""
         self.dark_mode = not self.dark_mode
@@ -92,36 +205,144 @@ class SupermercadoGUI:
 
     def cerrar_sesion(self):
         """Cierra la sesión actual."""
+        if self.ejecutor.pendientes:
+            messagebox.showwarning("Cerrar Sesión", "Hay cambios guardándose. Espere a que terminen.")
+            return
         if messagebox.askyesno("Cerrar Sesión", "¿Está seguro que desea salir?"):
+            # El stock reservado por el carrito vuelve a estar disponible
+            self.controller.liberar_reservas(self.id_carrito)
+            # Esta vista deja de escuchar los cambios antes de destruirse
+            self.controller.desuscribir_cambios(self._al_cambiar_datos)
+            self.root.after_cancel(self._id_revision)
+            if self._id_escaneos:
+                self.root.after_cancel(self._id_escaneos)
+            self.ejecutor.cerrar()
+            # Cada sesión crea su caché de miniaturas: se termina su hilo y se liberan sus imágenes
+            self.miniaturas.cerrar()
             self.on_logout()
 
     def recargar_datos(self):
-        """Recarga los datos desde los archivos JSON."""
-        self.controller.cargar_datos()
-        if self.usuario.role == 'admin':
-            self.cargar_inventario_admin()
-        self.cargar_productos_venta()
-        messagebox.showinfo("Datos", "Datos recargados correctamente.")
+        """Recarga los datos desde los archivos JSON (en segundo plano, mostrando el avance)."""
+        def terminar(_):
+            # Productos e historial recargados llegan como eventos
+            self._aplicar_cambios()
+            messagebox.showinfo("Datos", "Datos recargados correctamente.")
+
+        self.ejecutor.enviar("Recargando datos...",
+                             lambda: self.controller.cargar_datos(self.ejecutor.progreso), terminar)
 
     def on_tab_change(self, event):
-        """Actualiza los datos de la pestaña seleccionada."""
+        """
+        Construye la pestaña seleccionada la primera vez que se muestra, y al mostrar
+        Reportes recalcula las estadísticas si hubo cambios.
+        Las tablas no se recargan: ya están al día por los eventos de los controladores.
+        """
         # Evitar errores si el notebook no está listo
-        if not hasattr(self, 'notebook'): return
+        if not hasattr(self, '_pestanas_construidas'): return
         
         try:
-            tab_id = self.notebook.select()
-            tab_text = self.notebook.tab(tab_id, "text")
-            
-            if tab_text in ["Inventario", "Catálogo"]:
+            self._construir_pestana(self.notebook.select())
+            if self._estadisticas_pendientes and self._pestana_actual() == "Reportes":
+                self._actualizar_estadisticas()
+        except Exception as e:
+            print(f"Error al mostrar la pestaña: {e}")
+
+    def _pestana_actual(self):
+        """Texto de la pestaña seleccionada."""
+        return self.notebook.tab(self.notebook.select(), "text")
+
+    # --- Actualización incremental de las tablas ---
+    def _al_cambiar_datos(self, evento, datos):
+        """
+        Observador de los controladores. Solo encola el evento: puede llamarse desde
+        otro hilo y Tkinter debe modificarse únicamente desde el hilo de la ventana.
+        """
+        self._cola_cambios.put((evento, datos))
+
+    def _revisar_cambios(self):
+        """Aplica los cambios encolados y vuelve a revisar en 100 ms."""
+        try:
+            self._aplicar_cambios()
+        except Exception as e:
+            print(f"Error al actualizar las tablas: {e}")
+        self._id_revision = self.root.after(100, self._revisar_cambios)
+
+    def _aplicar_cambios(self):
+        """
+        Agrupa los eventos pendientes y aplica a cada tabla solo las filas afectadas
+        (insertar, actualizar o quitar), en lugar de vaciarla y volver a llenarla.
+        """
+        codigos = set()      # Productos agregados, editados, eliminados o con nuevo stock
+        catalogo = False     # Hubo altas, bajas o ediciones (no solo cambios de stock)
+        recargados = False   # El inventario completo se reemplazó
+        historial = False    # El historial de ventas completo se (re)cargó
+        ventas = []
+        while True:
+            try:
+                evento, datos = self._cola_cambios.get_nowait()
+            except queue.Empty:
+                break
+            if evento == 'productos_recargados':
+                recargados = True
+            elif evento == 'ventas_recargadas':
+                historial = True
+            elif evento == 'ventas_agregadas':
+                ventas.extend(datos)
+            elif evento in ('producto_agregado', 'producto_actualizado', 'stock_actualizado', 'producto_eliminado'):
+                codigos.add(datos.codigo)
+                catalogo = catalogo or evento != 'stock_actualizado'
+        if not (codigos or recargados or historial or ventas):
+            return
+        es_admin = self.usuario.role == 'admin'
+        # Las pestañas aún no construidas se cargan completas al mostrarse por primera vez
+        inventario = self._construida(self.tab_inventario)
+        venta = self._construida(self.tab_ventas)
+        alertas = es_admin and self._construida(self.tab_alertas)
+        reportes = es_admin and self._construida(self.tab_reportes)
+
+        if recargados:
+            # Un reemplazo completo no tiene diferencias que aplicar
+            if inventario:
                 self.cargar_inventario_admin()
-            elif tab_text in ["Ventas", "Comprar"]:
+            if venta:
                 self.cargar_productos_venta()
-            elif tab_text == "Reportes":
-                self.actualizar_reportes()
-            elif tab_text == "Alertas":
+            if alertas:
                 self.cargar_alertas()
-        except Exception:
-            pass
+        else:
+            # Inventario (virtualizado): con altas o bajas cambia la lista de códigos
+            # (se filtra el índice en caché y solo se dibujan las filas visibles);
+            # si cambió solo el stock, se actualizan las filas visibles afectadas
+            if inventario:
+                ventas_cambiaron = (ventas or historial) and es_admin
+                if catalogo or (ventas_cambiaron and self.combo_abc.get() != "Todas"):
+                    self.cargar_inventario_admin()
+                elif ventas_cambiaron:
+                    # Las ventas pueden mover productos entre clases ABC
+                    self.clases_abc = self.controller.obtener_clasificacion_abc()
+                    self.tree_inv.refrescar()
+                else:
+                    self.tree_inv.actualizar(codigos)
+            if venta:
+                self._actualizar_filas_venta(codigos)
+            if alertas:
+                self._actualizar_filas_alertas(codigos)
+
+        # Las líneas del carrito toman el nuevo precio o nombre (las de productos eliminados se quitan)
+        if venta and (recargados or catalogo) and not self.venta_en_curso:
+            self.carrito.recalcular(list(self.carrito.items) if recargados else codigos)
+
+        if reportes:
+            if historial:
+                # El historial se reemplazó (carga en segundo plano o recarga): primera página
+                self.actualizar_reportes()
+            elif ventas:
+                # La página se vuelve a consultar: la primera muestra las ventas nuevas
+                # y todas actualizan el total de coincidencias
+                self._cargar_pagina_ventas()
+            # Las estadísticas se recalculan solo si la pestaña está a la vista
+            self._estadisticas_pendientes = True
+            if self._pestana_actual() == "Reportes":
+                self._actualizar_estadisticas()
 
     def mostrar_cambiar_clave(self):
         """Muestra el formulario de cambio de contraseña en el contenedor principal."""
@@ -173,17 +394,26 @@ class SupermercadoGUI:
                 messagebox.showerror("Error", "Las nuevas contraseñas no coinciden")
                 return
                 
-            if self.controller.cambiar_password(self.usuario.username, old, new):
-                messagebox.showinfo("Éxito", "Contraseña actualizada correctamente.")
-                cerrar()
-            else:
-                messagebox.showerror("Error", "Contraseña actual incorrecta.")
+            def terminar(cambiada):
+                btn_guardar.config(state=tk.NORMAL)
+                if cambiada:
+                    messagebox.showinfo("Éxito", "Contraseña actualizada correctamente.")
+                    cerrar()
+                else:
+                    messagebox.showerror("Error", "Contraseña actual incorrecta.")
+
+            # Verificar y calcular el hash toma tiempo: se hace fuera del hilo de la interfaz
+            btn_guardar.config(state=tk.DISABLED)
+            ejecutar_en_segundo_plano(self.frame_clave,
+                                      lambda: self.controller.cambiar_password(self.usuario.username, old, new),
+                                      terminar)
         
         # Botones
         btn_frame = ttk.Frame(center_frame)
         btn_frame.pack(pady=30, fill=tk.X)
         
-        ttk.Button(btn_frame, text="Guardar", command=guardar).pack(side=tk.LEFT, expand=True, padx=5)
+        btn_guardar = ttk.Button(btn_frame, text="Guardar", command=guardar)
+        btn_guardar.pack(side=tk.LEFT, expand=True, padx=5)
         ttk.Button(btn_frame, text="Cancelar", command=cerrar).pack(side=tk.RIGHT, expand=True, padx=5)
 
     def _setup_notebook(self):
@@ -206,18 +436,38 @@ class SupermercadoGUI:
             self.notebook.add(self.tab_reportes, text="Reportes")
             self.notebook.add(self.tab_alertas, text="Alertas")
             
-            # Inicializa el contenido de cada pestaña
-            self.init_inventario_admin()
-            self.init_ventas()
-            self.init_reportes()
-            self.init_alertas()
+            # Función que inicializa el contenido de cada pestaña
+            self._inicializadores = {
+                str(self.tab_inventario): self.init_inventario_admin,
+                str(self.tab_ventas): self.init_ventas,
+                str(self.tab_reportes): self.init_reportes,
+                str(self.tab_alertas): self.init_alertas,
+            }
         else: # Comprador
             # Pestañas para comprador (orden diferente para priorizar la compra)
             self.notebook.add(self.tab_ventas, text="Comprar")
             self.notebook.add(self.tab_inventario, text="Catálogo")
             
-            self.init_ventas()
-            self.init_catalogo_comprador()
+            self._inicializadores = {
+                str(self.tab_ventas): self.init_ventas,
+                str(self.tab_inventario): self.init_catalogo_comprador,
+            }
+        # Cada pestaña se construye y carga sus datos la primera vez que se selecciona;
+        # al iniciar solo la primera
+        self._pestanas_construidas = set()
+        self._construir_pestana(self.notebook.select())
+
+    def _construir_pestana(self, pestana):
+        """Inicializa una pestaña (por su nombre de widget) si aún no se construyó."""
+        pestana = str(pestana)
+        if pestana in self._pestanas_construidas or pestana not in self._inicializadores:
+            return
+        self._pestanas_construidas.add(pestana)
+        self._inicializadores[pestana]()
+
+    def _construida(self, pestana):
+        """Indica si una pestaña (su frame) ya se construyó."""
+        return str(pestana) in self._pestanas_construidas
     # --- Pestaña de Inventario (Admin) ---
     def init_inventario_admin(self):
         """Inicializa la pestaña de inventario para administradores."""
@@ -244,17 +494,26 @@ class SupermercadoGUI:
         self.entry_buscar_inv.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         # Vincula el evento de soltar tecla para filtrar automáticamente
         self.entry_buscar_inv.bind('<KeyRelease>', lambda e: self.cargar_inventario_admin())
+
+        # Filtro por clasificación ABC (aporte a los ingresos)
+        ttk.Label(self.frame_controles, text="Clase:").pack(side=tk.LEFT, padx=(10, 5))
+        self.combo_abc = ttk.Combobox(self.frame_controles, state='readonly', width=7, values=["Todas", "A", "B", "C"])
+        self.combo_abc.set("Todas")
+        self.combo_abc.pack(side=tk.LEFT, padx=5)
+        self.combo_abc.bind("<<ComboboxSelected>>", lambda e: self.cargar_inventario_admin())
         
-        # Configuración de la tabla (Treeview)
-        columns = ('codigo', 'nombre', 'precio', 'stock', 'unidad', 'categoria', 'estado')
-        self.tree_inv = ttk.Treeview(self.tab_inventario, columns=columns, show='headings')
+        # Configuración de la tabla (virtualizada: solo crea las filas visibles)
+        columns = ('codigo', 'nombre', 'precio', 'stock', 'unidad', 'categoria', 'estado', 'abc')
+        self.tree_inv = TablaVirtual(self.tab_inventario, columns, self._fila_inventario)
         
         # Configura encabezados
         for col in columns:
-            self.tree_inv.heading(col, text=col.capitalize())
+            self.tree_inv.tree.heading(col, text=col.capitalize())
+        self.tree_inv.tree.heading('abc', text='ABC')
+        self.tree_inv.tree.column('abc', width=40, anchor=tk.CENTER)
         
         # Vincula doble click para ver detalles e imagen
-        self.tree_inv.bind("<Double-1>", self.mostrar_detalle_producto)
+        self.tree_inv.tree.bind("<Double-1>", self.mostrar_detalle_producto)
 
         self.tree_inv.pack(fill=tk.BOTH, expand=True)
         # Carga inicial de datos
@@ -264,10 +523,14 @@ class SupermercadoGUI:
         """Exporta el inventario a CSV."""
         filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
         if filename:
-            if self.controller.exportar_inventario_csv(filename):
-                messagebox.showinfo("Éxito", "Inventario exportado correctamente.")
-            else:
-                messagebox.showerror("Error", "No se pudo exportar el archivo.")
+            def terminar(exportado):
+                if exportado:
+                    messagebox.showinfo("Éxito", "Inventario exportado correctamente.")
+                else:
+                    messagebox.showerror("Error", "No se pudo exportar el archivo.")
+
+            self.ejecutor.enviar("Exportando inventario...",
+                                 lambda: self.controller.exportar_inventario_csv(filename), terminar)
 
     def init_catalogo_comprador(self):
         """Inicializa la pestaña de catálogo para compradores (solo lectura)."""
@@ -281,49 +544,74 @@ class SupermercadoGUI:
         self.entry_buscar_inv.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.entry_buscar_inv.bind('<KeyRelease>', lambda e: self.cargar_inventario_admin())
         
-        # Configuración de la tabla (Treeview)
+        # Configuración de la tabla (virtualizada: solo crea las filas visibles)
         columns = ('codigo', 'nombre', 'precio', 'stock', 'unidad', 'categoria', 'estado')
-        self.tree_inv = ttk.Treeview(self.tab_inventario, columns=columns, show='headings')
+        # Con la miniatura de cada producto en la primera columna
+        self.tree_inv = TablaVirtual(self.tab_inventario, columns, self._fila_inventario,
+                                     imagen=self._imagen_catalogo, alto_fila=TAMANO_MINIATURA_FILA[1] + 4)
         
         # Configura encabezados
         for col in columns:
-            self.tree_inv.heading(col, text=col.capitalize())
+            self.tree_inv.tree.heading(col, text=col.capitalize())
         
         # Vincula doble click para ver detalles e imagen
-        self.tree_inv.bind("<Double-1>", self.mostrar_detalle_producto)
+        self.tree_inv.tree.bind("<Double-1>", self.mostrar_detalle_producto)
         
         self.tree_inv.pack(fill=tk.BOTH, expand=True)
         # Carga inicial de datos
         self.cargar_inventario_admin()
 
     def cargar_inventario_admin(self):
-        """Carga y muestra los productos en la tabla de inventario."""
-        # Limpia la tabla actual
-        for item in self.tree_inv.get_children():
-            self.tree_inv.delete(item)
-        
-        # Obtiene el término de búsqueda
+        """
+        Carga los productos en la tabla de inventario.
+        Solo se calcula la lista de códigos (del índice ordenado por nombre del
+        controlador); las filas se arman a medida que se vuelven visibles.
+        """
+        # Obtiene el término de búsqueda y filtra si hay uno, sino muestra todo
         termino = self.entry_buscar_inv.get()
-        # Filtra si hay término de búsqueda, sino muestra todo
-        productos = self.controller.buscar_producto(termino) if termino else self.controller.productos.values()
-        
-        for p in sorted(productos, key=lambda x: x.nombre):
-            # Determina el estado visual del stock
-            estado = "BAJO" if p.tiene_stock_bajo() else "OK"
-            if p.stock == 0: estado = "AGOTADO"
-            
-            # Formatear stock según unidad (1 decimal para kg, enteros para otros)
-            if p.unidad == 'kg':
-                stock_display = f"{p.stock:.1f}"
-            else:
-                stock_display = f"{int(p.stock)}"
-            
-            self.tree_inv.insert('', tk.END, iid=p.codigo, values=(
-                p.codigo, p.nombre, f"${p.precio:,.0f}", stock_display, 
-                p.unidad.nombre if hasattr(p.unidad, 'nombre') else p.unidad, 
-                p.categoria.nombre if hasattr(p.categoria, 'nombre') else p.categoria, 
-                estado
-            ))
+        codigos = self.controller.codigos_ordenados(termino)
+
+        # Clasificación ABC (en caché; solo el administrador ve la columna y el filtro)
+        es_admin = self.usuario.role == 'admin'
+        self.clases_abc = self.controller.obtener_clasificacion_abc() if es_admin else {}
+        filtro_abc = self.combo_abc.get() if es_admin else "Todas"
+        if filtro_abc != "Todas":
+            codigos = [codigo for codigo in codigos if self.clases_abc.get(codigo, 'C') == filtro_abc]
+
+        self.tree_inv.cargar(codigos)
+
+    def _imagen_catalogo(self, codigo):
+        """Miniatura de un producto para la tabla del catálogo (None si no tiene o aún no está lista)."""
+        p = self.controller.productos.get(codigo)
+        if p is None or not p.imagen_path:
+            return None
+        # Si hay que decodificarla, la fila se vuelve a pintar cuando esté lista
+        return self.miniaturas.obtener(p.imagen_path, TAMANO_MINIATURA_FILA,
+                                       lambda foto: foto and self.tree_inv.actualizar([codigo]))
+
+    def _fila_inventario(self, codigo):
+        """Valores de la fila de un producto en la tabla de inventario."""
+        p = self.controller.productos.get(codigo)
+        if p is None:
+            # Eliminado (por ejemplo, en otra caja) después de armar la lista
+            return (codigo, "(eliminado)")
+        # Determina el estado visual del stock
+        estado = "BAJO" if p.tiene_stock_bajo() else "OK"
+        if p.stock == 0: estado = "AGOTADO"
+        
+        # Formatear stock según unidad (1 decimal para kg, enteros para otros)
+        if p.unidad == 'kg':
+            stock_display = f"{p.stock:.1f}"
+        else:
+            stock_display = f"{int(p.stock)}"
+        
+        return (
+            p.codigo, p.nombre, formatear(p.precio), stock_display, 
+            p.unidad.nombre if hasattr(p.unidad, 'nombre') else p.unidad, 
+            p.categoria.nombre if hasattr(p.categoria, 'nombre') else p.categoria, 
+            estado,
+            self.clases_abc.get(p.codigo, 'C') if self.usuario.role == 'admin' else ""
+        )
                 
     # --- Pestaña de Ventas ---
     def init_ventas(self):
@@ -341,8 +629,15 @@ class SupermercadoGUI:
         ttk.Label(frame_search, text="Buscar / Escanear:").pack(side=tk.LEFT)
         self.entry_buscar_venta = ttk.Entry(frame_search)
         self.entry_buscar_venta.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
-        self.entry_buscar_venta.bind('<KeyRelease>', lambda e: self.cargar_productos_venta())
+        self.entry_buscar_venta.bind('<KeyRelease>', self._al_escribir_busqueda_venta)
         self.entry_buscar_venta.bind('<Return>', self.procesar_codigo_barras) # Simulación Scanner
+        # Modo escáner: cada Enter agrega el código leído sin diálogos ni filtrar la lista
+        self.modo_escaner = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_search, text="Modo escáner", variable=self.modo_escaner,
+                        command=lambda: self.entry_buscar_venta.focus_set()).pack(side=tk.LEFT)
+        # Resultado de las últimas lecturas del escáner (reemplaza a los diálogos)
+        self.lbl_escaneo = ttk.Label(frame_prod, text="")
+        self.lbl_escaneo.pack(fill=tk.X, padx=5)
         
         cols_prod = ('nombre', 'precio', 'stock')
         self.tree_venta_prod = ttk.Treeview(frame_prod, columns=cols_prod, show='headings', height=10)
@@ -360,53 +655,162 @@ class SupermercadoGUI:
         # Panel de carrito de compras
         frame_cart = ttk.Labelframe(paned, text="Carrito")
         cols_cart = ('nombre', 'cantidad', 'subtotal')
+        # Filas con iid = código: al cambiar una línea se actualiza solo su fila
         self.tree_cart = ttk.Treeview(frame_cart, columns=cols_cart, show='headings')
         for col in cols_cart: self.tree_cart.heading(col, text=col.capitalize())
         self.tree_cart.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.lbl_total = ttk.Label(frame_cart, text="TOTAL: $0.00", font=('Helvetica', 14, 'bold'))
+        self.lbl_total = ttk.Label(frame_cart, text=f"TOTAL: {formatear(0)}", font=('Helvetica', 14, 'bold'))
         self.lbl_total.pack(pady=5)
+
+        # Sugerencias de venta cruzada ("comprados juntos frecuentemente")
+        self.lbl_sugerencias = ttk.Label(frame_cart, text="", font=('Helvetica', 10, 'italic'), wraplength=300)
+        self.lbl_sugerencias.pack(pady=(0, 5))
         
-        ttk.Button(frame_cart, text="Finalizar Venta", command=self.finalizar_venta).pack(fill=tk.X, padx=5)
+        self.btn_finalizar = ttk.Button(frame_cart, text="Finalizar Venta", command=self.finalizar_venta)
+        self.btn_finalizar.pack(fill=tk.X, padx=5)
         ttk.Button(frame_cart, text="Limpiar", command=self.limpiar_carrito).pack(fill=tk.X, padx=5, pady=5)
         
         paned.add(frame_prod, weight=1)
         paned.add(frame_cart, weight=1)
         
-        self.carrito_items = {} # Diccionario para almacenar items del carrito {codigo: cantidad}
+        # Carrito de esta caja: mantiene líneas y total, y avisa cada línea que cambia
+        self.carrito = self.controller.crear_carrito(self.id_carrito)
+        self.carrito.suscribir(self._al_cambiar_carrito)
         self.cargar_productos_venta()
 
+    def _al_escribir_busqueda_venta(self, event):
+        """Filtra la lista de productos al escribir (no en modo escáner: cada tecla del lector no filtra)."""
+        if not self.modo_escaner.get():
+            self.cargar_productos_venta()
+
     def procesar_codigo_barras(self, event):
         """Si el texto ingresado coincide exactamente con un código, agrega 1 unidad."""
         codigo = self.entry_buscar_venta.get().strip()
+        if self.modo_escaner.get():
+            # La lectura se encola y el campo queda libre para la siguiente; las lecturas
+            # que llegan juntas se agregan en una sola pasada cuando Tk queda libre
+            self.entry_buscar_venta.delete(0, tk.END)
+            if codigo:
+                self._cola_escaneos.append(codigo)
+                if self._id_escaneos is None:
+                    self._id_escaneos = self.root.after_idle(self._procesar_escaneos)
+            return 'break'
+
+        if self.venta_en_curso: return
         if codigo in self.controller.productos:
-            # Simular selección y agregar
-            self.carrito_items[codigo] = self.carrito_items.get(codigo, 0) + 1
-            self.actualizar_carrito_y_total()
+            # El carrito reserva la unidad antes de agregarla
+            if not self.carrito.agregar(codigo, 1):
+                messagebox.showerror("Scanner", f"Sin stock disponible de {self.controller.productos[codigo].nombre}.")
+                return
+            self._actualizar_filas_venta([codigo])
+            self.actualizar_sugerencias()
             self.entry_buscar_venta.delete(0, tk.END) # Limpiar para siguiente escaneo
             messagebox.showinfo("Scanner", f"Producto {codigo} agregado.")
         else:
             # Si no es código exacto, no hace nada (ya filtra por nombre)
             pass
 
+    def _procesar_escaneos(self):
+        """Agrega al carrito todas las lecturas encoladas desde la última pasada."""
+        self._id_escaneos = None
+        if self.venta_en_curso:
+            # El carrito está bloqueado mientras se guarda la venta: las lecturas esperan
+            self._id_escaneos = self.root.after(100, self._procesar_escaneos)
+            return
+        lecturas, self._cola_escaneos = self._cola_escaneos, []
 
+        # Lecturas repetidas del mismo código se reservan juntas (dict conserva el orden)
+        conteo = {}
+        for codigo in lecturas:
+            conteo[codigo] = conteo.get(codigo, 0) + 1
 
+        agregados = []
+        errores = []
+        for codigo, cantidad in conteo.items():
+            producto = self.controller.productos.get(codigo)
+            if producto is None:
+                errores.append(f"Código {codigo} no existe")
+                continue
+            # Se agregan las unidades que alcancen
+            agregada = self.carrito.agregar_hasta(codigo, cantidad)
+            if not agregada:
+                errores.append(f"Sin stock de {producto.nombre}")
+                continue
+            if agregada < cantidad:
+                errores.append(f"Solo {agregada} de {producto.nombre}")
+            agregados.append((producto.nombre, agregada))
+
+        if agregados:
+            # Las reservas no generan eventos: se actualiza el stock disponible de esas filas
+            self._actualizar_filas_venta([codigo for codigo in conteo if codigo in self.carrito.items])
+            self.actualizar_sugerencias()
+            nombre, cantidad = agregados[-1]
+            texto = f"Agregado: {nombre} x{cantidad}"
+            if len(lecturas) > 1:
+                texto += f" ({len(lecturas)} lecturas)"
+        else:
+            texto = ""
+        if errores:
+            # Aviso audible y en rojo, sin detener la siguiente lectura
+            self.root.bell()
+            texto = "  |  ".join(([texto] if texto else []) + errores)
+            self.lbl_escaneo.config(text=texto, foreground='red')
+        else:
+            self.lbl_escaneo.config(text=texto, foreground='green')
 
     def cargar_productos_venta(self):
-        """Carga los productos disponibles en la tabla de ventas."""
+        """Carga los productos disponibles en la tabla de ventas (al buscar o recargar todo)."""
         for item in self.tree_venta_prod.get_children():
             self.tree_venta_prod.delete(item)
             
+        # Con búsqueda se muestran todas las coincidencias; sin ella, los productos con stock
         termino = self.entry_buscar_venta.get()
-        productos = self.controller.buscar_producto(termino) if termino else self.controller.obtener_productos_disponibles()
-        
-        for p in sorted(productos, key=lambda x: x.nombre):
-            self.tree_venta_prod.insert('', tk.END, iid=p.codigo, values=(p.nombre, f"${p.precio:,.0f}", p.stock))
+        productos = self.controller.productos
+        codigos = self.controller.codigos_ordenados(termino)
+        if not termino:
+            codigos = [codigo for codigo in codigos if productos[codigo].stock > 0]
+
+        # Copia ordenada (nombre, codigo) de las filas, para ubicar luego inserciones con bisect
+        self._orden_venta = [(productos[codigo].nombre, codigo) for codigo in codigos]
+        for codigo in codigos:
+            self.tree_venta_prod.insert('', tk.END, iid=codigo, values=self._fila_venta(productos[codigo]))
+
+    def _fila_venta(self, p):
+        """Valores de la fila de un producto en la tabla de ventas."""
+        # Se muestra el stock libre de reservas de otros carritos
+        return (p.nombre, formatear(p.precio), self.controller.stock_disponible(p.codigo))
+
+    def _actualizar_filas_venta(self, codigos):
+        """Inserta, actualiza o quita solo las filas de los productos indicados en la tabla de ventas."""
+        termino = self.entry_buscar_venta.get()
+        for codigo in codigos:
+            p = self.controller.productos.get(codigo)
+            # Misma regla que cargar_productos_venta
+            if p is None:
+                visible = False
+            elif termino:
+                visible = self.controller.coincide_busqueda(p, termino)
+            else:
+                visible = p.stock > 0
+
+            if self.tree_venta_prod.exists(codigo):
+                nombre_actual = self.tree_venta_prod.set(codigo, 'nombre')
+                if visible and nombre_actual == p.nombre:
+                    self.tree_venta_prod.item(codigo, values=self._fila_venta(p))
+                    continue
+                # Se quita (si solo cambió el nombre, se vuelve a insertar en su nueva posición)
+                del self._orden_venta[bisect.bisect_left(self._orden_venta, (nombre_actual, codigo))]
+                self.tree_venta_prod.delete(codigo)
+            if visible:
+                posicion = bisect.bisect_left(self._orden_venta, (p.nombre, codigo))
+                self._orden_venta.insert(posicion, (p.nombre, codigo))
+                self.tree_venta_prod.insert('', posicion, iid=codigo, values=self._fila_venta(p))
 
     def agregar_al_carrito(self):
         """Agrega el producto seleccionado al carrito."""
         selected = self.tree_venta_prod.selection()
-        if not selected: return
+        if not selected or self.venta_en_curso: return
         
         codigo = selected[0]
         try:
@@ -422,119 +826,91 @@ class SupermercadoGUI:
                     raise ValueError(f"Producto se vende en {producto.unidad} enteras.")
                 cantidad = int(cantidad_val)
                 
-            if cantidad > producto.stock:
-                raise ValueError(f"Stock insuficiente. Disponible: {producto.stock}")
+            # Reserva el stock: otra caja ya no podrá venderlo mientras el carrito esté abierto
+            if not self.carrito.agregar(codigo, cantidad):
+                raise ValueError(f"Stock insuficiente. Disponible: {self.controller.stock_disponible(codigo)}")
                 
-            self.carrito_items[codigo] = self.carrito_items.get(codigo, 0) + cantidad
-            self.actualizar_carrito_y_total()
+            self._actualizar_filas_venta([codigo])
+            self.actualizar_sugerencias()
             
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
-    def actualizar_carrito_y_total(self):
-        """Refresca la vista del carrito y recalcula el total."""
-        # Limpia la tabla del carrito
-        for item in self.tree_cart.get_children():
-            self.tree_cart.delete(item)
-        
-        total = 0
-        # Recorre los items en el carrito para calcular subtotales
-        for codigo, cantidad in self.carrito_items.items():
-            producto = self.controller.productos[codigo]
-            subtotal = producto.precio * cantidad
-            total += subtotal
-            
+    def _al_cambiar_carrito(self, evento, datos):
+        """Aplica a la tabla del carrito solo la fila que cambió, y actualiza el total."""
+        if evento == 'linea_actualizada':
+            linea = datos
+            nombre = f"{linea.nombre} ({linea.promocion})" if linea.promocion else linea.nombre
             # Formato de cantidad según unidad
-            if producto.unidad == 'kg':
-                cant_display = f"{cantidad:.1f}"
+            if linea.unidad == 'kg':
+                cant_display = f"{linea.cantidad:.1f}"
             else:
-                cant_display = f"{int(cantidad)}"
-                
-            self.tree_cart.insert('', tk.END, values=(producto.nombre, cant_display, f"${subtotal:,.0f}"))
-        
-        # Aplicar descuento visual
-        try:
-            desc = float(self.entry_descuento.get())
-            if desc < 0 or desc > 100: desc = 0
-        except ValueError:
-            desc = 0
-            
-        total_final = total * (1 - (desc/100))
-        self.lbl_total.config(text=f"TOTAL: ${total_final:,.0f} (Desc: {desc}%)")
-
-    def limpiar_carrito(self):
-        """Vacía el carrito de compras."""
-        self.carrito_items.clear()
-        self.actualizar_carrito_y_total()
-
-    def finalizar_venta(self):
-        """Procesa la venta final, actualizando stock y guardando registro."""
-        if not self.carrito_items: return
-        
-        items_venta = list(self.carrito_items.items())
-        try:
-            descuento = float(self.entry_descuento.get())
-            if descuento < 0 or descuento > 100: raise ValueError
-        except ValueError:
-            descuento = 0.0
-
-        # Confirmación de usuario
-        if messagebox.askyesno("Confirmar", f"Proceder con la venta por {self.lbl_total['text']}?"):
-            # Llama al controlador para procesar la transacción
-            venta = self.controller.realizar_venta(items_venta, descuento)
-            if venta:
-                messagebox.showinfo("Éxito", f"Venta realizada! ID: {venta.id}\nTotal: ${venta.total:,.0f}\nBoleta generada en carpeta del proyecto.")
-                # Limpia y actualiza la vista
-                self.limpiar_carrito()
-                self.cargar_productos_venta()
+                cant_display = f"{int(linea.cantidad)}"
+            valores = (nombre, cant_display, formatear(linea.subtotal))
+            if self.tree_cart.exists(linea.codigo):
+                self.tree_cart.item(linea.codigo, values=valores)
             else:
-                messagebox.showerror("Error", "No se pudo procesar la venta. Verifique el stock.")
+                self.tree_cart.insert('', tk.END, iid=linea.codigo, values=valores)
+        elif evento == 'linea_eliminada':
+            if self.tree_cart.exists(datos):
+                self.tree_cart.delete(datos)
+        elif evento == 'carrito_vaciado':
+            self.tree_cart.delete(*self.tree_cart.get_children())
+        self._mostrar_total_carrito()
 
-    def actualizar_carrito_y_total(self):
-        """Refresca la vista del carrito y recalcula el total."""
-        # Limpia la tabla del carrito
-        for item in self.tree_cart.get_children():
-            self.tree_cart.delete(item)
-        
-        total = 0
-        # Recorre los items en el carrito para calcular subtotales
-        for codigo, cantidad in self.carrito_items.items():
-            producto = self.controller.productos[codigo]
-            subtotal = producto.precio * cantidad
-            total += subtotal
-            
-            # Formato de cantidad según unidad
-            if producto.unidad == 'kg':
-                cant_display = f"{cantidad:.1f}"
-            else:
-                cant_display = f"{int(cantidad)}"
-                
-            self.tree_cart.insert('', tk.END, values=(producto.nombre, cant_display, f"${subtotal:,.0f}"))
-        
-        # Actualiza la etiqueta del total
-        self.lbl_total.config(text=f"TOTAL: ${total:,.0f}")
+    def _mostrar_total_carrito(self):
+        """Actualiza la etiqueta del total con las sumas que mantiene el carrito."""
+        texto_total = f"TOTAL: {formatear(self.carrito.total)}"
+        if self.carrito.ahorro > 0:
+            texto_total += f" (Ahorro: {formatear(self.carrito.ahorro)})"
+        if self.carrito.descuento > 0:
+            texto_total += f" (Desc: {self.carrito.descuento:g}%)"
+        self.lbl_total.config(text=texto_total)
+
+    def actualizar_sugerencias(self):
+        """Muestra productos que suelen comprarse junto con los del carrito."""
+        nombres = []
+        for codigo in self.controller.obtener_sugerencias(self.carrito.items.keys()):
+            producto = self.controller.productos.get(codigo)
+            # Solo se sugieren productos que siguen existiendo y tienen stock
+            if producto and producto.stock > 0:
+                nombres.append(producto.nombre)
+        texto = f"También suelen llevar: {', '.join(nombres[:3])}" if nombres else ""
+        self.lbl_sugerencias.config(text=texto)
 
     def limpiar_carrito(self):
-        """Vacía el carrito de compras."""
-        self.carrito_items.clear()
-        self.actualizar_carrito_y_total()
+        """Vacía el carrito de compras y libera sus reservas de stock."""
+        if self.venta_en_curso: return
+        codigos = list(self.carrito.items)
+        self.carrito.vaciar()
+        # Las reservas no generan eventos: se actualiza el stock disponible de esas filas
+        self._actualizar_filas_venta(codigos)
+        self.actualizar_sugerencias()
 
     def finalizar_venta(self):
         """Procesa la venta final, actualizando stock y guardando registro."""
-        if not self.carrito_items: return
+        if not self.carrito.items or self.venta_en_curso: return
         
-        items_venta = list(self.carrito_items.items())
+        items_venta = self.carrito.lista_items()
+        descuento = self.carrito.descuento
         # Confirmación de usuario
         if messagebox.askyesno("Confirmar", f"Proceder con la venta por {self.lbl_total['text']}?"):
-            # Llama al controlador para procesar la transacción
-            venta = self.controller.realizar_venta(items_venta)
-            if venta:
-                messagebox.showinfo("Éxito", f"Venta realizada! ID: {venta.id}\nTotal: ${venta.total:,.0f}")
-                # Limpia y actualiza la vista
-                self.limpiar_carrito()
-                self.cargar_productos_venta()
-            else:
-                messagebox.showerror("Error", "No se pudo procesar la venta. Verifique el stock.")
+            def terminar(venta):
+                self.venta_en_curso = False
+                self.btn_finalizar.config(state=tk.NORMAL)
+                if venta:
+                    messagebox.showinfo("Éxito", f"Venta realizada! ID: {venta.id}\nTotal: {formatear(venta.total)}")
+                    # Limpia el carrito (las filas con nuevo stock llegan como eventos)
+                    self.limpiar_carrito()
+                else:
+                    messagebox.showerror("Error", "No se pudo procesar la venta. Verifique el stock.")
+
+            # Llama al controlador para procesar la transacción (guarda en segundo plano);
+            # hasta que termine, el carrito no se puede modificar
+            self.venta_en_curso = True
+            self.btn_finalizar.config(state=tk.DISABLED)
+            self.ejecutor.enviar("Registrando venta...",
+                                 lambda: self.controller.realizar_venta(items_venta, descuento, self.id_carrito), terminar)
 
     # --- Pestaña de Reportes ---
     def init_reportes(self):
@@ -551,9 +927,46 @@ class SupermercadoGUI:
         
         self.lbl_stats_ingresos = ttk.Label(self.frame_stats, font=('Helvetica', 12))
         self.lbl_stats_ingresos.pack(anchor=tk.W, pady=5)
-        
+
+        self.lbl_stats_semana = ttk.Label(self.frame_stats, font=('Helvetica', 12))
+        self.lbl_stats_semana.pack(anchor=tk.W, pady=5)
+        
+        # Consulta del valor del inventario en una fecha pasada
+        frame_historico = ttk.Frame(self.frame_stats)
+        frame_historico.pack(fill=tk.X, pady=5)
+        ttk.Label(frame_historico, text="Valor del inventario al (AAAA-MM-DD):").pack(side=tk.LEFT)
+        self.entry_fecha_valor = ttk.Entry(frame_historico, width=12)
+        self.entry_fecha_valor.pack(side=tk.LEFT, padx=5)
+        self._crear_boton(frame_historico, "Consultar", self.consultar_valor_historico, side=tk.LEFT)
+        self.lbl_valor_historico = ttk.Label(frame_historico, text="")
+        self.lbl_valor_historico.pack(side=tk.LEFT, padx=10)
+
+        # Reportes pesados (se calculan en segundo plano sin congelar la ventana)
+        frame_reportes = ttk.Frame(self.frame_stats)
+        frame_reportes.pack(fill=tk.X, pady=5)
+        self._crear_boton(frame_reportes, "Ingresos por Categoría", self.mostrar_reporte_categorias, side=tk.LEFT, padx=(0, 5))
+        self._crear_boton(frame_reportes, "Comparación Interanual", self.mostrar_reporte_interanual, side=tk.LEFT)
+
         ttk.Separator(self.frame_stats).pack(fill=tk.X, pady=20)
         ttk.Label(self.frame_stats, text="Últimas Ventas (Doble click para ver detalle):", font=('Helvetica', 12, 'bold')).pack(anchor=tk.W)
+
+        # Filtros del historial (vacío = sin filtro)
+        frame_filtros = ttk.Frame(self.frame_stats)
+        frame_filtros.pack(fill=tk.X, pady=(5, 0))
+        self.entries_filtro_ventas = {}
+        for clave, texto, ancho in (('desde', "Desde (AAAA-MM-DD):", 12), ('hasta', "Hasta:", 12),
+                                    ('total_minimo', "Total mínimo:", 10), ('codigo', "Código producto:", 10)):
+            ttk.Label(frame_filtros, text=texto).pack(side=tk.LEFT)
+            entry = ttk.Entry(frame_filtros, width=ancho)
+            entry.pack(side=tk.LEFT, padx=(2, 8))
+            entry.bind('<Return>', lambda e: self.filtrar_ventas())
+            self.entries_filtro_ventas[clave] = entry
+        self._crear_boton(frame_filtros, "Filtrar", self.filtrar_ventas, side=tk.LEFT)
+        self._crear_boton(frame_filtros, "Quitar filtros", self.quitar_filtros_ventas, side=tk.LEFT)
+        # Filtros aplicados y cursores de las páginas visitadas (el primero es la página más nueva)
+        self._filtros_ventas = {}
+        self._cursores_ventas = [None]
+        self._siguiente_ventas = None
         
         # Tabla de historial de ventas
         cols = ('id', 'fecha', 'total', 'items')
@@ -568,40 +981,205 @@ class SupermercadoGUI:
         self.tree_ventas.column('total', width=100)
         self.tree_ventas.column('items', width=50)
         
-        self.tree_ventas.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.tree_ventas.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
         # Vincula doble click para ver detalles de una venta específica
         self.tree_ventas.bind("<Double-1>", self.mostrar_detalle_venta)
+
+        # Navegación entre páginas del historial
+        frame_paginas = ttk.Frame(self.frame_stats)
+        frame_paginas.pack(fill=tk.X, pady=5)
+        self.btn_ventas_recientes = ttk.Button(frame_paginas, text="< Más recientes", command=self.pagina_ventas_anterior)
+        self.btn_ventas_recientes.pack(side=tk.LEFT)
+        self.btn_ventas_antiguas = ttk.Button(frame_paginas, text="Más antiguas >", command=self.pagina_ventas_siguiente)
+        self.btn_ventas_antiguas.pack(side=tk.RIGHT)
+        self.lbl_pagina_ventas = ttk.Label(frame_paginas, text="")
+        self.lbl_pagina_ventas.pack(side=tk.LEFT, expand=True)
         
         self.actualizar_reportes()
 
     def actualizar_reportes(self):
+        """Calcula las estadísticas y vuelve a la primera página del historial de ventas."""
+        self._actualizar_estadisticas()
+        self._cursores_ventas = [None]
+        self._cargar_pagina_ventas()
+
+    def _cargar_pagina_ventas(self):
+        """
+        Muestra la página actual del historial con los filtros aplicados. Solo se consultan
+        y dibujan TAMANO_PAGINA_VENTAS ventas; el total de coincidencias sale del índice.
+        """
+        resultado = self.controller.consultar_ventas(cursor=self._cursores_ventas[-1],
+                                                     limite=TAMANO_PAGINA_VENTAS, **self._filtros_ventas)
+        self.tree_ventas.delete(*self.tree_ventas.get_children())
+        for venta in resultado['ventas']:
+            valores = (venta.id if venta.id is not None else 'N/A', venta.fecha_texto,
+                       formatear(venta.total), len(venta.items))
+            if isinstance(venta.id, int):
+                self.tree_ventas.insert('', tk.END, iid=venta.id, values=valores)
+            else:
+                self.tree_ventas.insert('', tk.END, values=valores)
+        self._siguiente_ventas = resultado['siguiente']
+
+        # Posición de la página dentro de las coincidencias
+        primera = (len(self._cursores_ventas) - 1) * TAMANO_PAGINA_VENTAS
+        if resultado['ventas']:
+            texto = f"Ventas {primera + 1}-{primera + len(resultado['ventas'])} de {resultado['total']}"
+        else:
+            texto = "Sin ventas que coincidan"
+        if self._filtros_ventas:
+            texto += " (filtradas)"
+        self.lbl_pagina_ventas.config(text=texto)
+        self.btn_ventas_recientes.config(state=tk.NORMAL if len(self._cursores_ventas) > 1 else tk.DISABLED)
+        self.btn_ventas_antiguas.config(state=tk.NORMAL if self._siguiente_ventas is not None else tk.DISABLED)
+
+    def pagina_ventas_siguiente(self):
+        """Muestra la página siguiente (ventas más antiguas)."""
+        if self._siguiente_ventas is None: return
+        self._cursores_ventas.append(self._siguiente_ventas)
+        self._cargar_pagina_ventas()
+
+    def pagina_ventas_anterior(self):
+        """Vuelve a la página anterior (ventas más recientes)."""
+        if len(self._cursores_ventas) <= 1: return
+        self._cursores_ventas.pop()
+        self._cargar_pagina_ventas()
+
+    def filtrar_ventas(self):
+        """Aplica los filtros ingresados y muestra la primera página de resultados."""
+        filtros = {}
+        try:
+            for clave in ('desde', 'hasta'):
+                texto = self.entries_filtro_ventas[clave].get().strip()
+                if texto:
+                    filtros[clave] = datetime.strptime(texto, '%Y-%m-%d').date()
+            texto = self.entries_filtro_ventas['total_minimo'].get().strip()
+            if texto:
+                filtros['total_minimo'] = desde_texto(texto)
+        except ValueError:
+            messagebox.showerror("Error", "Fechas en formato AAAA-MM-DD y total mínimo numérico.")
+            return
+        codigo = self.entries_filtro_ventas['codigo'].get().strip()
+        if codigo:
+            filtros['codigo'] = codigo
+        self._filtros_ventas = filtros
+        self._cursores_ventas = [None]
+        self._cargar_pagina_ventas()
+
+    def quitar_filtros_ventas(self):
+        """Borra los filtros y vuelve al historial completo."""
+        for entry in self.entries_filtro_ventas.values():
+            entry.delete(0, tk.END)
+        self.filtrar_ventas()
+
+    def _actualizar_estadisticas(self):
         """Calcula y muestra las estadísticas actualizadas."""
+        self._estadisticas_pendientes = False
         # Obtiene datos agregados del controlador
         stats = self.controller.obtener_estadisticas()
-        self.lbl_stats_prod.config(text=f"Total Productos: {stats['total_productos']} (Valor: ${stats['valor_inventario']:,.0f})")
-        self.lbl_stats_ventas.config(text=f"Total Ventas: {stats['total_ventas']}")
-        self.lbl_stats_ingresos.config(text=f"Ingresos Totales: ${stats['ingresos_totales']:,.0f}")
-        
-        for item in self.tree_ventas.get_children():
-            self.tree_ventas.delete(item)
-            
-        for venta in reversed(self.controller.ventas):
-            id_venta = venta.get('id', 'N/A')
-            self.tree_ventas.insert('', tk.END, iid=id_venta, values=(
-                id_venta, 
-                venta['fecha'], 
-                f"${venta['total']:,.0f}", 
-                len(venta['items'])
-            ))
+        self.lbl_stats_prod.config(text=f"Total Productos: {stats['total_productos']} (Valor: {formatear(stats['valor_inventario'])})")
+        if self.controller.historial_cargado():
+            self.lbl_stats_ventas.config(text=f"Total Ventas: {stats['total_ventas']}")
+        else:
+            # Se completa al llegar el evento 'ventas_recargadas'
+            self.lbl_stats_ventas.config(text="Total Ventas: cargando historial...")
+        self.lbl_stats_ingresos.config(text=f"Ingresos Totales: {formatear(stats['ingresos_totales'])}")
+        # Ingresos recientes desde el resumen diario (sin recorrer todo el historial)
+        self.lbl_stats_semana.config(text=f"Ingresos Últimos 7 Días: {formatear(self.controller.ingresos_ultimos_dias(7))}")
+
+    def consultar_valor_historico(self):
+        """Muestra el valor que tenía el inventario en la fecha ingresada."""
+        try:
+            fecha = datetime.strptime(self.entry_fecha_valor.get().strip(), '%Y-%m-%d').date()
+        except ValueError:
+            messagebox.showerror("Error", "Ingrese una fecha válida (AAAA-MM-DD)")
+            return
+        valor = self.controller.valor_inventario_en_fecha(fecha)
+        if valor is None:
+            self.lbl_valor_historico.config(text="Sin registros para esa fecha")
+        else:
+            self.lbl_valor_historico.config(text=formatear(valor))
+
+    def mostrar_reporte_categorias(self):
+        """Muestra los ingresos mensuales por categoría."""
+        def a_filas(meses):
+            for mes, categorias in meses.items():
+                for categoria, monto in sorted(categorias.items()):
+                    yield (mes, categoria, formatear(monto))
+        self._ejecutar_reporte("Ingresos Mensuales por Categoría", self.controller.ingresos_mensuales_por_categoria,
+                               ('mes', 'categoria', 'ingresos'), a_filas)
+
+    def mostrar_reporte_interanual(self):
+        """Muestra la comparación de cada mes con el mismo mes del año anterior."""
+        def a_filas(filas):
+            for f in filas:
+                anterior = formatear(f['ingresos_anio_anterior']) if f['ingresos_anio_anterior'] else "-"
+                variacion = f"{f['variacion']:+.1f}%" if f['variacion'] is not None else "-"
+                yield (f['mes'], formatear(f['ingresos']), anterior, variacion)
+        self._ejecutar_reporte("Comparación Interanual", self.controller.comparacion_interanual,
+                               ('mes', 'ingresos', 'anterior', 'variacion'), a_filas)
+
+    def _ejecutar_reporte(self, titulo, funcion, columnas, a_filas):
+        """
+        Ejecuta un reporte pesado en un hilo aparte y muestra su avance.
+        El hilo solo deja mensajes en una cola; la ventana los lee con after()
+        porque Tkinter no debe modificarse desde otro hilo.
+        """
+        ventana = tk.Toplevel(self.root)
+        ventana.title(titulo)
+        ventana.geometry("600x400")
+
+        lbl_estado = ttk.Label(ventana, text="Calculando...")
+        lbl_estado.pack(anchor=tk.W, padx=10, pady=(10, 0))
+        barra = ttk.Progressbar(ventana, mode='determinate', maximum=1)
+        barra.pack(fill=tk.X, padx=10, pady=5)
+
+        tree = ttk.Treeview(ventana, columns=columnas, show='headings')
+        for col in columnas: tree.heading(col, text=col.capitalize())
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        cola = queue.Queue()
+
+        def trabajo():
+            try:
+                resultado = funcion(progreso=lambda hechas, total: cola.put(('progreso', hechas, total)))
+                cola.put(('resultado', resultado))
+            except Exception as e:
+                cola.put(('error', e))
+
+        threading.Thread(target=trabajo, daemon=True).start()
+
+        def revisar_cola():
+            # Si el usuario cerró la ventana, se descarta el resultado
+            if not ventana.winfo_exists():
+                return
+            while not cola.empty():
+                mensaje = cola.get_nowait()
+                if mensaje[0] == 'progreso':
+                    barra.config(maximum=mensaje[2], value=mensaje[1])
+                    lbl_estado.config(text=f"Calculando... ({mensaje[1]}/{mensaje[2]} particiones)")
+                elif mensaje[0] == 'resultado':
+                    for fila in a_filas(mensaje[1]):
+                        tree.insert('', tk.END, values=fila)
+                    lbl_estado.config(text="Reporte completado.")
+                    return
+                else:
+                    lbl_estado.config(text=f"Error al generar el reporte: {mensaje[1]}")
+                    return
+            ventana.after(100, revisar_cola)
+
+        revisar_cola()
 
     def mostrar_detalle_venta(self, event):
         """Muestra un popup con los detalles de la venta seleccionada."""
         selected = self.tree_ventas.selection()
         if not selected: return
         
-        id_venta = selected[0]
-        # Buscar la venta por ID (como es string en el treeview, convertir si es necesario)
-        venta_data = next((v for v in self.controller.ventas if str(v.get('id')) == str(id_venta)), None)
+        # Las filas de ventas con ID usan el ID como iid (string en el treeview)
+        try:
+            id_venta = int(selected[0])
+        except ValueError:
+            return
+        venta_data = self.controller.obtener_venta(id_venta)
         
         if not venta_data: return
         
@@ -610,7 +1188,7 @@ class SupermercadoGUI:
         detalle.title(f"Detalle Venta #{id_venta}")
         detalle.geometry("500x400")
         
-        ttk.Label(detalle, text=f"Venta #{id_venta} - {venta_data['fecha']}", font=('Helvetica', 12, 'bold')).pack(pady=10)
+        ttk.Label(detalle, text=f"Venta #{id_venta} - {venta_data.fecha_texto}", font=('Helvetica', 12, 'bold')).pack(pady=10)
         
         # Tabla de detalle de items
         cols = ('producto', 'cantidad', 'precio', 'subtotal')
@@ -627,21 +1205,21 @@ class SupermercadoGUI:
         
         tree_det.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        for item in venta_data['items']:
+        for item in venta_data.items:
             # Formato condicional para cantidad en el detalle histórico
-            if item.get('unidad') == 'kg':
-                cant_display = f"{item['cantidad']:.1f}"
+            if item.unidad == 'kg':
+                cant_display = f"{item.cantidad:.1f}"
             else:
-                cant_display = f"{int(item['cantidad'])}"
+                cant_display = f"{int(item.cantidad)}"
 
             tree_det.insert('', tk.END, values=(
-                item['nombre'],
-                f"{cant_display} {item.get('unidad', '')}",
-                f"${item['precio_unitario']:,.0f}",
-                f"${item['subtotal']:,.0f}"
+                f"{item.nombre} ({item.promocion})" if item.promocion else item.nombre,
+                f"{cant_display} {item.unidad or ''}",
+                formatear(item.precio_unitario),
+                formatear(item.subtotal)
             ))
             
-        ttk.Label(detalle, text=f"TOTAL: ${venta_data['total']:,.0f}", font=('Helvetica', 12, 'bold')).pack(pady=10, padx=10, anchor=tk.E)
+        ttk.Label(detalle, text=f"TOTAL: {formatear(venta_data.total)}", font=('Helvetica', 12, 'bold')).pack(pady=10, padx=10, anchor=tk.E)
         ttk.Button(detalle, text="Cerrar", command=detalle.destroy).pack(pady=10)
 
     # --- Pestaña de Alertas ---
@@ -666,14 +1244,32 @@ class SupermercadoGUI:
             
         # Obtiene productos críticos desde el controlador
         for p in self.controller.obtener_productos_stock_bajo():
-            # Formatear stock según unidad
-            if p.unidad == 'kg':
-                stock_display = f"{p.stock:.1f}"
-                min_display = f"{p.stock_minimo:.1f}"
+            self.tree_alertas.insert('', tk.END, iid=p.codigo, values=self._fila_alerta(p))
+
+    def _fila_alerta(self, p):
+        """Valores de la fila de un producto en la tabla de alertas."""
+        # Formatear stock según unidad
+        if p.unidad == 'kg':
+            stock_display = f"{p.stock:.1f}"
+            min_display = f"{p.stock_minimo:.1f}"
+        else:
+            stock_display = f"{int(p.stock)}"
+            min_display = f"{int(p.stock_minimo)}"
+        return (p.codigo, p.nombre, stock_display, min_display)
+
+    def _actualizar_filas_alertas(self, codigos):
+        """Inserta, actualiza o quita solo las filas de los productos indicados en la tabla de alertas."""
+        for codigo in codigos:
+            p = self.controller.productos.get(codigo)
+            # Misma regla que obtener_productos_stock_bajo
+            critico = p is not None and (p.tiene_stock_bajo() or p.stock == 0)
+            if not critico:
+                if self.tree_alertas.exists(codigo):
+                    self.tree_alertas.delete(codigo)
+            elif self.tree_alertas.exists(codigo):
+                self.tree_alertas.item(codigo, values=self._fila_alerta(p))
             else:
-                stock_display = f"{int(p.stock)}"
-                min_display = f"{int(p.stock_minimo)}"
-            self.tree_alertas.insert('', tk.END, values=(p.codigo, p.nombre, stock_display, min_display))
+                self.tree_alertas.insert('', tk.END, iid=codigo, values=self._fila_alerta(p))
 
     # --- Diálogos ---
     def mostrar_dialogo_producto(self):
@@ -790,9 +1386,6 @@ class SupermercadoGUI:
         def guardar():
             """Valida los datos y guarda el nuevo producto."""
             try:
-                # Generar código automáticamente al guardar
-                codigo = self.controller.producto_controller.generar_codigo()
-                
                 nombre = entries['nombre'].get().strip()
                 categoria = entries['categoria'].get().strip()
                 unidad = entries['unidad'].get().strip() # No usar lower() para mantener 'mL'
@@ -818,7 +1411,7 @@ class SupermercadoGUI:
                     messagebox.showwarning("Error", "La unidad debe ser 'unidades', 'kg' o 'mL'")
                     return
 
-                precio = int(entries['precio'].get())
+                precio = desde_texto(entries['precio'].get())
                 if precio < 0:
                     raise ValueError("El precio no puede ser negativo")
 
@@ -848,19 +1441,33 @@ class SupermercadoGUI:
                 if stock_min < 0:
                     raise ValueError("El stock mínimo no puede ser negativo")
 
-                p = Producto(codigo, nombre, precio, stock, categoria, unidad, stock_min, imagen_path)
-                
-                if self.controller.agregar_producto(p):
-                    messagebox.showinfo("Éxito", "Producto agregado correctamente")
-                    cancelar()
-                    self.cargar_inventario_admin()
-                else:
-                    messagebox.showerror("Error", "No se pudo agregar el producto.\nVerifique que el código o el nombre no existan ya.")
+                def agregar():
+                    # El código se genera al guardar, en orden con los demás guardados pendientes
+                    codigo = self.controller.producto_controller.generar_codigo()
+                    # Categoría y unidad como instancias compartidas, igual que al cargar desde JSON
+                    p = Producto(codigo, nombre, precio, stock, Categoria.obtener(categoria), Unidad.obtener(unidad),
+                                 stock_min, imagen_path)
+                    return self.controller.agregar_producto(p)
+
+                def terminar(agregado):
+                    if agregado:
+                        messagebox.showinfo("Éxito", "Producto agregado correctamente")
+                        cancelar()
+                    else:
+                        messagebox.showerror("Error", "No se pudo agregar el producto.\nVerifique que el código o el nombre no existan ya.")
+                        if form_frame.winfo_exists():
+                            btn_guardar.config(state=tk.NORMAL)
+
+                btn_guardar.config(state=tk.DISABLED)
+                self.ejecutor.enviar("Guardando producto...", agregar, terminar)
             except ValueError as e:
                 messagebox.showerror("Error", f"Valores inválidos: {str(e)}")
         
         def cancelar():
             """Cierra el formulario y restaura la vista de inventario."""
+            # El guardado termina en segundo plano: el formulario pudo cerrarse antes
+            if not form_frame.winfo_exists():
+                return
             form_frame.destroy()
             self.frame_controles.pack(fill=tk.X, pady=5)
             self.tree_inv.pack(fill=tk.BOTH, expand=True)
@@ -868,12 +1475,13 @@ class SupermercadoGUI:
         # Botones
         btn_frame = ttk.Frame(form_frame)
         btn_frame.pack(fill=tk.X, pady=20)
-        ttk.Button(btn_frame, text="Guardar", command=guardar).pack(side=tk.LEFT, padx=5)
+        btn_guardar = ttk.Button(btn_frame, text="Guardar", command=guardar)
+        btn_guardar.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Cancelar", command=cancelar).pack(side=tk.LEFT, padx=5)
 
     def mostrar_dialogo_stock(self):
         """Muestra formulario para actualizar stock en la misma ventana"""
-        selected = self.tree_inv.selection()
+        selected = self.tree_inv.seleccion()
         if not selected:
             messagebox.showwarning("Aviso", "Seleccione un producto de la lista")
             return
@@ -930,26 +1538,37 @@ class SupermercadoGUI:
                          return
                     cant = int(cant_val)
 
-                if self.controller.actualizar_stock(codigo, cant, tipo_var.get()):
-                    prod = self.controller.productos[codigo]
-                    if prod.tiene_stock_bajo():
-                        if prod.unidad == 'kg':
-                            stock_msg = f"{prod.stock:.1f}"
+                def terminar(actualizado):
+                    if actualizado:
+                        prod = self.controller.productos[codigo]
+                        if prod.tiene_stock_bajo():
+                            if prod.unidad == 'kg':
+                                stock_msg = f"{prod.stock:.1f}"
+                            else:
+                                stock_msg = f"{int(prod.stock)}"
+                            messagebox.showwarning("Alerta de Stock", f"El producto '{prod.nombre}' tiene stock bajo: {stock_msg} {prod.unidad}")
                         else:
-                            stock_msg = f"{int(prod.stock)}"
-                        messagebox.showwarning("Alerta de Stock", f"El producto '{prod.nombre}' tiene stock bajo: {stock_msg} {prod.unidad}")
+                            messagebox.showinfo("Éxito", "Stock actualizado correctamente")
+                        
+                        cancelar()
                     else:
-                        messagebox.showinfo("Éxito", "Stock actualizado correctamente")
-                    
-                    cancelar()
-                    self.cargar_inventario_admin()
-                else:
-                    messagebox.showerror("Error", "No se pudo actualizar (Stock insuficiente?)")
+                        messagebox.showerror("Error", "No se pudo actualizar (Stock insuficiente?)")
+                        if form_frame.winfo_exists():
+                            btn_actualizar.config(state=tk.NORMAL)
+
+                # Deshabilitado hasta que llegue el resultado, para no aplicar dos veces la misma cantidad
+                btn_actualizar.config(state=tk.DISABLED)
+                operacion = tipo_var.get()
+                self.ejecutor.enviar("Guardando stock...",
+                                     lambda: self.controller.actualizar_stock(codigo, cant, operacion), terminar)
             except ValueError:
                 messagebox.showerror("Error", "Cantidad inválida")
         
         def cancelar():
             """Cierra el formulario de stock y restaura la vista."""
+            # El guardado termina en segundo plano: el formulario pudo cerrarse antes
+            if not form_frame.winfo_exists():
+                return
             form_frame.destroy()
             self.frame_controles.pack(fill=tk.X, pady=5)
             self.tree_inv.pack(fill=tk.BOTH, expand=True)
@@ -957,12 +1576,13 @@ class SupermercadoGUI:
         # Botones
         btn_frame = ttk.Frame(form_frame)
         btn_frame.pack(fill=tk.X, pady=20)
-        ttk.Button(btn_frame, text="Actualizar", command=actualizar).pack(side=tk.LEFT, padx=5)
+        btn_actualizar = ttk.Button(btn_frame, text="Actualizar", command=actualizar)
+        btn_actualizar.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Cancelar", command=cancelar).pack(side=tk.LEFT, padx=5)
     
     def eliminar_producto(self):
         """Elimina el producto seleccionado"""
-        selected = self.tree_inv.selection()
+        selected = self.tree_inv.seleccion()
         if not selected:
             messagebox.showwarning("Aviso", "Seleccione un producto de la lista")
             return
@@ -972,11 +1592,13 @@ class SupermercadoGUI:
         
         if messagebox.askyesno("Confirmar Eliminación", 
                               f"¿Está seguro de eliminar el producto '{producto.nombre}'?\n\nEsta acción no se puede deshacer."):
-            if self.controller.eliminar_producto(codigo):
-                messagebox.showinfo("Éxito", f"Producto '{producto.nombre}' eliminado correctamente")
-                self.cargar_inventario_admin()
-            else:
-                messagebox.showerror("Error", "No se pudo eliminar el producto")
+            def terminar(eliminado):
+                if eliminado:
+                    messagebox.showinfo("Éxito", f"Producto '{producto.nombre}' eliminado correctamente")
+                else:
+                    messagebox.showerror("Error", "No se pudo eliminar el producto")
+
+            self.ejecutor.enviar("Eliminando producto...", lambda: self.controller.eliminar_producto(codigo), terminar)
     
     def reiniciar_productos(self):
         """Reinicia todos los productos a los valores por defecto"""
@@ -985,11 +1607,13 @@ class SupermercadoGUI:
                               "Esto eliminará todos los productos actuales y los reemplazará con los productos de ejemplo.\n"
                               "Las ventas y usuarios NO se verán afectados.\n\n"
                               "Esta acción no se puede deshacer."):
-            if self.controller.reiniciar_productos():
-                messagebox.showinfo("Éxito", "Productos reiniciados correctamente")
-                self.cargar_inventario_admin()
-            else:
-                messagebox.showerror("Error", "No se pudo reiniciar los productos")
+            def terminar(reiniciado):
+                if reiniciado:
+                    messagebox.showinfo("Éxito", "Productos reiniciados correctamente")
+                else:
+                    messagebox.showerror("Error", "No se pudo reiniciar los productos")
+
+            self.ejecutor.enviar("Reiniciando productos...", self.controller.reiniciar_productos, terminar)
 
     def mostrar_dialogo_crear_admin(self):
         """Muestra formulario para crear un nuevo administrador"""
@@ -1034,14 +1658,17 @@ class SupermercadoGUI:
                 messagebox.showwarning("Error", "Todos los campos son obligatorios")
                 return
 
-            try:
-                if self.controller.registrar_usuario(username, password, 'admin'):
+            def terminar(registrado):
+                if registrado:
                     messagebox.showinfo("Éxito", f"Administrador '{username}' creado correctamente")
                     cancelar()
                 else:
                     messagebox.showerror("Error", "El nombre de usuario ya existe")
-            except ValueError as e:
-                messagebox.showerror("Error de Validación", str(e))
+
+            # El hash de la contraseña se calcula fuera del hilo de la interfaz
+            ejecutar_en_segundo_plano(form_frame,
+                                      lambda: self.controller.registrar_usuario(username, password, 'admin'),
+                                      terminar, lambda e: messagebox.showerror("Error de Validación", str(e)))
         
         def cancelar():
             """Cierra el formulario de admin y restaura la vista."""
@@ -1057,7 +1684,7 @@ class SupermercadoGUI:
 
     def mostrar_detalle_producto(self, event):
         """Muestra una ventana con el detalle del producto y su imagen."""
-        selected = self.tree_inv.selection()
+        selected = self.tree_inv.seleccion()
         if not selected: return
         
         codigo = selected[0]
@@ -1068,18 +1695,23 @@ class SupermercadoGUI:
         detalle.title(f"Detalle: {producto.nombre}")
         detalle.geometry("400x550")
         
-        # Imagen
+        # Imagen (del caché de miniaturas; si hay que decodificarla, aparece al estar lista)
         if producto.imagen_path and os.path.exists(producto.imagen_path):
-            try:
-                img = Image.open(producto.imagen_path)
-                # Redimensionar manteniendo aspecto
-                img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                lbl_img = ttk.Label(detalle, image=photo)
-                lbl_img.image = photo # Mantener referencia
-                lbl_img.pack(pady=10)
-            except Exception as e:
-                ttk.Label(detalle, text=f"Error al cargar imagen: {e}").pack(pady=10)
+            lbl_img = ttk.Label(detalle, text="Cargando imagen...")
+            lbl_img.pack(pady=10)
+
+            def mostrar_imagen(photo):
+                if not lbl_img.winfo_exists():
+                    return
+                if photo:
+                    lbl_img.config(image=photo, text="")
+                    lbl_img.image = photo # Mantener referencia
+                else:
+                    lbl_img.config(text="Error al cargar imagen")
+
+            photo = self.miniaturas.obtener(producto.imagen_path, TAMANO_MINIATURA_DETALLE, mostrar_imagen)
+            if photo:
+                mostrar_imagen(photo)
         else:
             ttk.Label(detalle, text="Sin Imagen Disponible", font=('Helvetica', 10, 'italic')).pack(pady=50)
             
@@ -1089,7 +1721,7 @@ class SupermercadoGUI:
         
         ttk.Label(info_frame, text=f"Producto: {producto.nombre}", font=('Helvetica', 16, 'bold')).pack(pady=5)
         ttk.Label(info_frame, text=f"Código: {producto.codigo}", font=('Helvetica', 10)).pack()
-        ttk.Label(info_frame, text=f"Precio: ${producto.precio:,.0f}", font=('Helvetica', 12, 'bold'), foreground='green').pack(pady=5)
+        ttk.Label(info_frame, text=f"Precio: {formatear(producto.precio)}", font=('Helvetica', 12, 'bold'), foreground='green').pack(pady=5)
         
         if producto.unidad == 'kg':
             stock_str = f"{producto.stock:.1f} kg"
@@ -1105,7 +1737,7 @@ class SupermercadoGUI:
 
     def mostrar_dialogo_editar_producto(self):
         """Muestra formulario para editar un producto existente."""
-        selected = self.tree_inv.selection()
+        selected = self.tree_inv.seleccion()
         if not selected:
             messagebox.showwarning("Aviso", "Seleccione un producto para editar")
             return
@@ -1143,7 +1775,7 @@ class SupermercadoGUI:
         row_frame.pack(fill=tk.X, pady=5)
         ttk.Label(row_frame, text="Precio (CLP):", width=25).pack(side=tk.LEFT)
         entry_precio = ttk.Entry(row_frame)
-        entry_precio.insert(0, str(int(producto.precio)))
+        entry_precio.insert(0, a_texto(producto.precio))
         entry_precio.pack(side=tk.LEFT, fill=tk.X, expand=True)
         entries['precio'] = entry_precio
         
@@ -1204,6 +1836,9 @@ class SupermercadoGUI:
         
         def cancelar():
             """Cierra el formulario de edición y restaura la vista."""
+            # El guardado termina en segundo plano: el formulario pudo cerrarse antes
+            if not form_frame.winfo_exists():
+                return
             form_frame.destroy()
             self.frame_controles.pack(fill=tk.X, pady=5)
             self.tree_inv.pack(fill=tk.BOTH, expand=True)
@@ -1218,27 +1853,31 @@ class SupermercadoGUI:
                 
                 if not nombre: raise ValueError("El nombre es obligatorio")
                 
-                precio = int(entries['precio'].get())
+                precio = desde_texto(entries['precio'].get())
                 stock_min = float(entries['stock_minimo'].get())
                 
                 # Actualizar objeto
-                from models.categoria import Categoria
-                from models.unidad import Unidad
                 
                 producto.nombre = nombre
                 producto.precio = precio
-                producto.categoria = Categoria(categoria_str)
-                producto.unidad = Unidad(unidad_str)
+                producto.categoria = Categoria.obtener(categoria_str)
+                producto.unidad = Unidad.obtener(unidad_str)
                 producto.stock_minimo = stock_min
                 producto.imagen_path = imagen_path
                 
-                # Llamar al controlador
-                if self.controller.producto_controller.actualizar_producto(producto):
-                    messagebox.showinfo("Éxito", "Producto actualizado")
-                    cancelar()
-                    self.cargar_inventario_admin()
-                else:
-                    messagebox.showerror("Error", "No se pudo actualizar")
+                def terminar(actualizado):
+                    if actualizado:
+                        messagebox.showinfo("Éxito", "Producto actualizado")
+                        cancelar()
+                    else:
+                        messagebox.showerror("Error", "No se pudo actualizar")
+                        if form_frame.winfo_exists():
+                            btn_guardar.config(state=tk.NORMAL)
+
+                # Llamar al controlador (el guardado se hace en segundo plano)
+                btn_guardar.config(state=tk.DISABLED)
+                self.ejecutor.enviar("Guardando producto...",
+                                     lambda: self.controller.producto_controller.actualizar_producto(producto), terminar)
                     
             except ValueError as e:
                 messagebox.showerror("Error", str(e))
@@ -1246,7 +1885,8 @@ class SupermercadoGUI:
         # Botones
         btn_frame = ttk.Frame(form_frame)
         btn_frame.pack(fill=tk.X, pady=20)
-        ttk.Button(btn_frame, text="Guardar Cambios", command=guardar_cambios).pack(side=tk.LEFT, padx=5)
+        btn_guardar = ttk.Button(btn_frame, text="Guardar Cambios", command=guardar_cambios)
+        btn_guardar.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Cancelar", command=cancelar).pack(side=tk.LEFT, padx=5)
 
 class LoginWindow:
@@ -1254,9 +1894,10 @@ class LoginWindow:
     Ventana de inicio de sesión.
     Permite a los usuarios ingresar sus credenciales o navegar al registro.
     """
-    def __init__(self, root, controller: SupermercadoController, on_login_success, on_show_registro):
+    def __init__(self, root, obtener_controller: Callable[[], SupermercadoController], on_login_success, on_show_registro):
         self.root = root
-        self.controller = controller
+        # Retorna el controlador, esperando si los datos todavía se están cargando
+        self.obtener_controller = obtener_controller
         self.on_login_success = on_login_success
         self.on_show_registro = on_show_registro
         
@@ -1278,22 +1919,34 @@ class LoginWindow:
         self.entry_pass.pack(fill=tk.X, pady=5)
         
         # Botones de acción
-        ttk.Button(self.frame, text="Ingresar", command=self.login).pack(fill=tk.X, pady=20)
+        self.btn_ingresar = ttk.Button(self.frame, text="Ingresar", command=self.login)
+        self.btn_ingresar.pack(fill=tk.X, pady=20)
         ttk.Button(self.frame, text="Crear cuenta de Comprador", command=self.mostrar_registro).pack(fill=tk.X)
 
     def login(self):
         """Valida las credenciales ingresadas y procede al login si son correctas."""
         user = self.entry_user.get()
         pwd = self.entry_pass.get()
-        # Llama al controlador para verificar usuario
-        usuario = self.controller.autenticar_usuario(user, pwd)
-        
-        if usuario:
-            # Si es correcto, destruye esta vista y llama al callback de éxito
-            self.frame.destroy()
-            self.on_login_success(usuario)
-        else:
-            messagebox.showerror("Error", "Usuario o contraseña incorrectos")
+
+        def terminar(usuario):
+            if usuario:
+                # Si es correcto, destruye esta vista y llama al callback de éxito
+                self.frame.destroy()
+                self.on_login_success(usuario)
+            else:
+                self.btn_ingresar.config(state=tk.NORMAL, text="Ingresar")
+                messagebox.showerror("Error", "Usuario o contraseña incorrectos")
+
+        def fallar(e):
+            self.btn_ingresar.config(state=tk.NORMAL, text="Ingresar")
+            messagebox.showerror("Error", str(e))
+
+        # La verificación del hash toma cientos de milisegundos (y puede tener que esperar a que
+        # terminen de cargarse los datos): se hace en otro hilo para que la ventana siga
+        # respondiendo (y sin permitir un segundo intento a la vez)
+        self.btn_ingresar.config(state=tk.DISABLED, text="Verificando...")
+        ejecutar_en_segundo_plano(self.frame, lambda: self.obtener_controller().autenticar_usuario(user, pwd),
+                                  terminar, fallar)
 
     def mostrar_registro(self):
         """Navega a la pantalla de registro."""
@@ -1303,9 +1956,10 @@ class RegistroWindow:
     """
     Ventana de registro para nuevos usuarios (Compradores).
     """
-    def __init__(self, root, controller: SupermercadoController, on_volver_login, on_registro_exitoso):
+    def __init__(self, root, obtener_controller: Callable[[], SupermercadoController], on_volver_login, on_registro_exitoso):
         self.root = root
-        self.controller = controller
+        # Retorna el controlador, esperando si los datos todavía se están cargando
+        self.obtener_controller = obtener_controller
         self.on_volver_login = on_volver_login
         self.on_registro_exitoso = on_registro_exitoso
         
@@ -1347,13 +2001,14 @@ class RegistroWindow:
             messagebox.showwarning("Aviso", "Complete todos los campos")
             return
             
-        try:
-            # Intenta registrar como comprador
-            if self.controller.registrar_usuario(user, pwd, 'comprador'):
+        def terminar(registrado):
+            if registrado:
                 messagebox.showinfo("Éxito", "Usuario registrado. Ahora puede iniciar sesión.")
                 self.frame.destroy()
                 self.on_registro_exitoso()
             else:
                 messagebox.showerror("Error", "El nombre de usuario ya existe")
-        except ValueError as e:
-            messagebox.showerror("Error de Validación", str(e))
+
+        # Intenta registrar como comprador (el hash de la contraseña se calcula en otro hilo)
+        ejecutar_en_segundo_plano(self.frame, lambda: self.obtener_controller().registrar_usuario(user, pwd, 'comprador'),
+                                  terminar, lambda e: messagebox.showerror("Error de Validación", str(e)))
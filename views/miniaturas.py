@@ -0,0 +1,191 @@
+"""Caché de miniaturas de las imágenes de productos.
+
+Returns:
+    class: Clase CacheMiniaturas
+"""
+
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+# Pillow se importa al decodificar la primera imagen (ver models.importacion)
+from models.importacion import importar
+
+# Máximo de miniaturas guardadas en disco; al iniciar se borran las más antiguas
+MAXIMO_EN_DISCO = 2000
+# Pedido que hace terminar al hilo de decodificación (ver cerrar)
+_DETENER = object()
+
+
+class CacheMiniaturas:
+    """
+    Miniaturas de imágenes con dos niveles de caché:
+    - En memoria: las últimas PhotoImage usadas (LRU), listas para mostrar sin decodificar.
+    - En disco: PNG ya reducidos, identificados por ruta, fecha de modificación y tamaño
+      del archivo original y por el tamaño de la miniatura. Si la imagen original
+      cambia, su clave cambia y se genera una miniatura nueva.
+
+    Abrir y reducir la imagen (o leer el PNG del disco) se hace en un hilo aparte;
+    la PhotoImage se crea en el hilo de Tkinter, que revisa los resultados con after().
+    cerrar() termina ese hilo y libera las miniaturas (ej. al cerrar sesión).
+    """
+
+    def __init__(self, widget, directorio: str, capacidad: int = 256):
+        self.widget = widget
+        self.directorio = directorio
+        self.capacidad = capacidad
+        # clave -> PhotoImage, de la menos a la más recientemente usada
+        self._memoria: "OrderedDict[tuple, object]" = OrderedDict()
+        # Claves en decodificación con sus callbacks (varios pedidos de la misma imagen se unen)
+        self._en_curso: Dict[tuple, List[Callable]] = {}
+        # Claves que no se pudieron abrir (no se reintentan mientras el archivo no cambie)
+        self._fallidas = set()
+        self._pedidos = queue.Queue()
+        self._resultados = queue.Queue()
+        self._revisando = False
+        self._cerrado = False
+        os.makedirs(directorio, exist_ok=True)
+        threading.Thread(target=self._trabajar, daemon=True, name='miniaturas').start()
+        # La limpieza del disco es lo primero que hace el hilo
+        self._pedidos.put(None)
+
+    def obtener(self, ruta: str, tamano: Tuple[int, int],
+                al_listo: Optional[Callable[[Optional[object]], None]] = None):
+        """
+        Retorna la miniatura si está en memoria. Si no, retorna None, la prepara en
+        segundo plano y luego llama a al_listo(foto) en el hilo de Tkinter (foto es
+        None si la imagen no se pudo abrir). Las imágenes inexistentes retornan None.
+        """
+        clave = self._clave(ruta, tamano)
+        if self._cerrado or clave is None or clave in self._fallidas:
+            return None
+        foto = self._memoria.get(clave)
+        if foto is not None:
+            self._memoria.move_to_end(clave)
+            return foto
+        esperando = self._en_curso.get(clave)
+        if esperando is None:
+            self._en_curso[clave] = esperando = []
+            self._pedidos.put(clave)
+            if not self._revisando:
+                self._revisando = True
+                self.widget.after(20, self._revisar)
+        if al_listo:
+            esperando.append(al_listo)
+        return None
+
+    def cerrar(self):
+        """Termina el hilo de decodificación y descarta las miniaturas y los pedidos pendientes."""
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self._pedidos.put(_DETENER)
+        self._memoria.clear()
+        self._en_curso.clear()
+
+    @staticmethod
+    def _clave(ruta: str, tamano: Tuple[int, int]) -> Optional[tuple]:
+        """(ruta absoluta, mtime, tamaño del archivo, ancho, alto), o None si el archivo no existe."""
+        try:
+            info = os.stat(ruta)
+        except OSError:
+            return None
+        return (os.path.abspath(ruta), info.st_mtime_ns, info.st_size, tamano[0], tamano[1])
+
+    def _ruta_en_disco(self, clave: tuple) -> str:
+        """Archivo PNG de la miniatura de una clave en el caché de disco."""
+        nombre = hashlib.sha1(repr(clave).encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, f"{nombre}.png")
+
+    # --- Hilo de decodificación ---
+    def _trabajar(self):
+        """Atiende los pedidos: lee la miniatura del disco o la genera desde la imagen original."""
+        while True:
+            clave = self._pedidos.get()
+            if clave is _DETENER:
+                return
+            if clave is None:
+                self._limpiar_disco()
+                continue
+            try:
+                imagen = self._decodificar(clave)
+            except Exception as e:
+                print(f"Error al cargar imagen {clave[0]}: {e}")
+                imagen = None
+            self._resultados.put((clave, imagen))
+
+    def _decodificar(self, clave: tuple):
+        """Imagen reducida (PIL.Image) de una clave, generando y guardando el PNG en disco si no existe."""
+        Image = importar('PIL.Image')
+        en_disco = self._ruta_en_disco(clave)
+        try:
+            with Image.open(en_disco) as imagen:
+                # copy() carga los píxeles antes de cerrar el archivo
+                imagen = imagen.copy()
+            # Marca la miniatura como usada recientemente (la limpieza borra las más antiguas)
+            os.utime(en_disco)
+            return imagen
+        except OSError:
+            pass
+        ruta, _, _, ancho, alto = clave
+        with Image.open(ruta) as original:
+            # draft() permite a JPEG decodificar directamente a una escala reducida
+            original.draft('RGB', (ancho, alto))
+            imagen = original.copy()
+        # Redimensionar manteniendo aspecto
+        imagen.thumbnail((ancho, alto), Image.Resampling.LANCZOS)
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA')
+        # Escritura atómica: otra instancia puede estar leyendo el mismo caché
+        temporal = f"{en_disco}.{threading.get_ident()}.tmp"
+        try:
+            imagen.save(temporal, 'PNG')
+            os.replace(temporal, en_disco)
+        except OSError as e:
+            print(f"No se pudo guardar la miniatura en disco: {e}")
+        return imagen
+
+    def _limpiar_disco(self):
+        """Deja en disco solo las MAXIMO_EN_DISCO miniaturas usadas más recientemente."""
+        try:
+            archivos = [e for e in os.scandir(self.directorio) if e.name.endswith('.png')]
+            if len(archivos) <= MAXIMO_EN_DISCO:
+                return
+            archivos.sort(key=lambda e: e.stat().st_mtime)
+            for entrada in archivos[:len(archivos) - MAXIMO_EN_DISCO]:
+                os.remove(entrada.path)
+        except OSError as e:
+            print(f"Error al limpiar el caché de miniaturas: {e}")
+
+    # --- Hilo de Tkinter ---
+    def _revisar(self):
+        """Convierte en PhotoImage las imágenes listas y avisa a quienes las esperaban."""
+        if self._cerrado or not self.widget.winfo_exists():
+            self._revisando = False
+            return
+        while True:
+            try:
+                clave, imagen = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            esperando = self._en_curso.pop(clave, [])
+            foto = None
+            if imagen is None:
+                self._fallidas.add(clave)
+            else:
+                foto = importar('PIL.ImageTk').PhotoImage(imagen)
+                self._memoria[clave] = foto
+                # Descarta las menos usadas (las que sigan en pantalla las conserva su widget)
+                while len(self._memoria) > self.capacidad:
+                    self._memoria.popitem(last=False)
+            for al_listo in esperando:
+                try:
+                    al_listo(foto)
+                except Exception as e:
+                    print(f"Error al mostrar miniatura: {e}")
+        if self._en_curso:
+            self.widget.after(20, self._revisar)
+        else:
+            self._revisando = False
@@ -0,0 +1,209 @@
+"""Tabla virtualizada para listas grandes (miles de productos).
+
+Returns:
+    class: Clase TablaVirtual
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+class TablaVirtual(ttk.Frame):
+    """
+    Treeview que solo crea filas de Tk para la parte visible de la lista.
+
+    La tabla recibe la lista completa de claves (ej. códigos de producto ya
+    ordenados) y una función fila(clave) que arma los valores de una fila.
+    Solo existen tantos items de Tk como filas caben en pantalla; al desplazarse
+    se reutilizan esos mismos items con los valores de las nuevas claves, así que
+    cargar o filtrar 50.000 productos cuesta lo mismo que cargar 30.
+    La barra de desplazamiento representa la lista completa.
+
+    La selección (una fila) se guarda por clave, no por item de Tk, para que
+    se conserve al desplazarse: usar seleccion() en lugar de tree.selection().
+
+    Con imagen(clave) la tabla muestra además una columna con la imagen de cada
+    fila (ej. una miniatura ya decodificada; '' o None si no tiene), y alto_fila
+    fija el alto de las filas para que la imagen quepa.
+    """
+
+    def __init__(self, parent, columnas: Sequence[str], fila: Callable[[str], tuple],
+                 imagen: Optional[Callable[[str], object]] = None, alto_fila: Optional[int] = None, **kwargs):
+        super().__init__(parent, **kwargs)
+        # Función que arma los valores de la fila de una clave (se llama solo para las visibles)
+        self.fila = fila
+        # Función opcional que retorna la imagen de la fila de una clave
+        self.imagen = imagen
+        # Lista completa de claves en el orden en que se muestran
+        self.claves: List[str] = []
+        # Posición de cada clave (se arma al necesitarla)
+        self._posiciones: Optional[Dict[str, int]] = None
+        # Índice de la primera clave visible y cantidad de filas que caben
+        self.inicio = 0
+        self.filas_visibles = 20
+        # Clave seleccionada (None si no hay)
+        self.seleccionada: Optional[str] = None
+        # Items de Tk reutilizables, uno por fila visible
+        self._items: List[str] = []
+
+        estilo = 'Treeview'
+        if alto_fila:
+            # Estilo propio: el alto de fila de 'Treeview' afectaría a todas las tablas
+            estilo = f'Alto{alto_fila}.Treeview'
+            ttk.Style().configure(estilo, rowheight=alto_fila)
+        # La columna del árbol (#0) es la única de un Treeview que puede mostrar imágenes
+        mostrar = 'tree headings' if imagen else 'headings'
+        self.tree = ttk.Treeview(self, columns=tuple(columnas), show=mostrar, selectmode='browse', style=estilo)
+        if imagen:
+            self.tree.column('#0', width=(alto_fila or 20) + 8, stretch=False)
+        self.barra = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._desplazar)
+        self.barra.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Alto de fila según el tema (clam no siempre lo informa) y del encabezado (se mide luego)
+        self._alto_fila = alto_fila or int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        self._alto_encabezado = 25
+
+        self.tree.bind('<Configure>', self._al_redimensionar)
+        self.tree.bind('<Button-1>', self._al_clic)
+        # Rueda del mouse (Windows/macOS y Linux)
+        self.tree.bind('<MouseWheel>', lambda e: self._mover(-3 if e.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda e: self._mover(-3))
+        self.tree.bind('<Button-5>', lambda e: self._mover(3))
+        # Teclado: se mueve la selección sobre la lista completa, no solo sobre lo visible
+        self.tree.bind('<Up>', lambda e: self._mover_seleccion(-1))
+        self.tree.bind('<Down>', lambda e: self._mover_seleccion(1))
+        self.tree.bind('<Prior>', lambda e: self._mover_seleccion(-self.filas_visibles))
+        self.tree.bind('<Next>', lambda e: self._mover_seleccion(self.filas_visibles))
+        self.tree.bind('<Home>', lambda e: self._mover_seleccion(-len(self.claves)))
+        self.tree.bind('<End>', lambda e: self._mover_seleccion(len(self.claves)))
+
+    # --- Datos ---
+    def cargar(self, claves: List[str]):
+        """Reemplaza la lista completa de claves (ej. tras buscar o filtrar) y redibuja."""
+        self.claves = claves
+        self._posiciones = None
+        if self.seleccionada is not None and self._posicion(self.seleccionada) is None:
+            self.seleccionada = None
+        self._dibujar()
+
+    def refrescar(self):
+        """Vuelve a pedir los valores de las filas visibles (los datos cambiaron, el orden no)."""
+        self._dibujar()
+
+    def actualizar(self, claves):
+        """Vuelve a pedir los valores solo de las filas visibles de las claves indicadas."""
+        claves = set(claves)
+        for i, item in enumerate(self._items):
+            clave = self.claves[self.inicio + i]
+            if clave in claves:
+                self._pintar(item, clave)
+
+    def seleccion(self) -> tuple:
+        """Clave seleccionada como tupla (vacía si no hay), como Treeview.selection()."""
+        return (self.seleccionada,) if self.seleccionada is not None else ()
+
+    def _posicion(self, clave: str) -> Optional[int]:
+        """Índice de una clave en la lista completa."""
+        if self._posiciones is None:
+            self._posiciones = {c: i for i, c in enumerate(self.claves)}
+        return self._posiciones.get(clave)
+
+    # --- Ventana visible ---
+    def _limitar(self, inicio: int) -> int:
+        """Ajusta el inicio para que la ventana no se salga de la lista."""
+        return max(0, min(inicio, len(self.claves) - self.filas_visibles))
+
+    def _dibujar(self):
+        """Asigna las claves de la ventana visible a los items de Tk reutilizables."""
+        self.inicio = self._limitar(self.inicio)
+        cantidad = min(self.filas_visibles, len(self.claves) - self.inicio)
+        # Solo se crean o borran items si cambió la cantidad de filas visibles
+        while len(self._items) < cantidad:
+            self._items.append(self.tree.insert('', tk.END))
+        while len(self._items) > cantidad:
+            self.tree.delete(self._items.pop())
+
+        seleccionados = []
+        for i, item in enumerate(self._items):
+            clave = self.claves[self.inicio + i]
+            self._pintar(item, clave)
+            if clave == self.seleccionada:
+                seleccionados.append(item)
+        self.tree.selection_set(seleccionados)
+        # El Treeview nunca se desplaza por sí mismo: siempre muestra sus items desde el primero
+        self.tree.yview_moveto(0)
+
+        total = len(self.claves)
+        if total:
+            self.barra.set(self.inicio / total, (self.inicio + cantidad) / total)
+        else:
+            self.barra.set(0, 1)
+
+    def _pintar(self, item: str, clave: str):
+        """Muestra los valores (y la imagen, si corresponde) de una clave en un item de Tk."""
+        if self.imagen:
+            self.tree.item(item, values=self.fila(clave), image=self.imagen(clave) or '')
+        else:
+            self.tree.item(item, values=self.fila(clave))
+
+    def _mover(self, filas: int):
+        """Desplaza la ventana visible una cantidad de filas."""
+        inicio = self._limitar(self.inicio + filas)
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._dibujar()
+        return 'break'
+
+    def mostrar(self, clave: str):
+        """Desplaza la ventana lo mínimo para que la clave quede visible."""
+        posicion = self._posicion(clave)
+        if posicion is None:
+            return
+        if posicion < self.inicio:
+            self.inicio = posicion
+        elif posicion >= self.inicio + self.filas_visibles:
+            self.inicio = posicion - self.filas_visibles + 1
+        self._dibujar()
+
+    def _desplazar(self, accion, cantidad, unidad=None):
+        """Comando de la barra de desplazamiento ('moveto' fracción o 'scroll' n units/pages)."""
+        if accion == 'moveto':
+            self.inicio = self._limitar(int(float(cantidad) * len(self.claves)))
+            self._dibujar()
+        else:
+            paso = self.filas_visibles if unidad == 'pages' else 1
+            self._mover(int(cantidad) * paso)
+
+    # --- Eventos ---
+    def _al_redimensionar(self, event):
+        """Recalcula cuántas filas caben en el alto actual."""
+        if self._items:
+            caja = self.tree.bbox(self._items[0])
+            if caja:
+                # La primera fila empieza justo debajo del encabezado
+                self._alto_encabezado = caja[1]
+        filas = max(1, (event.height - self._alto_encabezado) // self._alto_fila)
+        if filas != self.filas_visibles:
+            self.filas_visibles = filas
+            self._dibujar()
+
+    def _al_clic(self, event):
+        """Selecciona la clave de la fila bajo el mouse."""
+        item = self.tree.identify_row(event.y)
+        if item in self._items:
+            self.seleccionada = self.claves[self.inicio + self._items.index(item)]
+
+    def _mover_seleccion(self, paso: int):
+        """Mueve la selección por la lista completa y la mantiene visible."""
+        if not self.claves:
+            return 'break'
+        posicion = self._posicion(self.seleccionada) if self.seleccionada is not None else None
+        if posicion is None:
+            posicion = self.inicio
+        else:
+            posicion = max(0, min(posicion + paso, len(self.claves) - 1))
+        self.seleccionada = self.claves[posicion]
+        self.mostrar(self.seleccionada)
+        return 'break'